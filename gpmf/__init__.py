@@ -2,6 +2,41 @@ from . import parse
 from . import gps
 from . import gyro
 from . import io
-from . import gps_plot
+from . import quaternion
+from . import geo
+from . import simplify
+from . import resample
+from . import quality
+from . import outliers
+from . import kalman
+from . import spatial
+from . import fusion
+from . import sync
+from . import decimate
+from . import vibration
+from . import events
+from . import calibration
+from . import projection
+from . import lod
+from . import heatmap
+from . import pyramid
+from . import tiles
 
-__version__ = "0.3.2"
\ No newline at end of file
+__version__ = "0.3.2"
+
+# Modules depending on matplotlib, geopandas, contextily and pandas are only
+# imported on first access, e.g. ``gpmf.gps_plot`` (PEP 562)
+_LAZY_MODULES = ("gps_plot",)
+
+
+def __getattr__(name):
+    if name in _LAZY_MODULES:
+        import importlib
+        module = importlib.import_module("." + name, __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_MODULES))
\ No newline at end of file
@@ -2,16 +2,47 @@ import os
 import sys
 import argparse
 import json
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from importlib import import_module
 
 import numpy
 import gpxpy
-import matplotlib.pyplot as plt
 
 
-from .gps import extract_gps_blocks, make_pgx_segment, parse_gps_block
+from .gps import (extract_gps_blocks, make_pgx_segment, parse_gps_block,
+                  concatenate_gps_blocks, make_gpx_track)
 from .parse import filter_klv
 from .io import extract_gpmf_stream
-from .gps_plot import plot_gps_trace
+from .quality import filter_track
+from .simplify import SIMPLIFY_METHODS, simplify_latlon, simplify_track
+
+
+def plot_gps_trace(latlon, **kwargs):
+    """Plot a track with `gpmf.gps_plot.plot_gps_trace`.
+
+    The plotting dependencies are only imported by the gps-plot command.
+    """
+    from .gps_plot import plot_gps_trace
+    return plot_gps_trace(latlon, **kwargs)
+
+
+def add_simplify_arguments(parser):
+    parser.add_argument("-s", "--simplify", type=float, default=None, metavar="TOLERANCE",
+                        help="Simplify the track with the given tolerance in metres")
+    parser.add_argument("--simplify-method", choices=sorted(SIMPLIFY_METHODS),
+                        default="douglas-peucker",
+                        help="The simplification algorithm (default=douglas-peucker)")
+
+
+def positive_int(value):
+    """argparse type of the strictly positive integers."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("%s is not a positive integer" % value)
+    return number
 
 
 def parse_args():
@@ -29,6 +60,16 @@ def parse_args():
                             help="Do not store speed informations as extensions")
     gps_parser.add_argument("-g", "--gpx-version", choices=["1.0", "1.1"], default="1.1",
                             help="The GPX version to use (default=1.0)")
+    add_simplify_arguments(gps_parser)
+    gps_parser.add_argument("-q", "--quality-filter", action="store_true",
+                            help="Drop bad quality points and start a new segment "
+                                 "where the GPS signal was lost")
+    gps_parser.add_argument("--precision-max", type=float, default=5.0,
+                            help="Maximum dilution of precision with --quality-filter "
+                                 "(default=5.0)")
+    gps_parser.add_argument("--max-gap", type=float, default=2.0,
+                            help="Maximum time gap in seconds within a segment with "
+                                 "--quality-filter (default=2.0)")
 
     # GPS First Position
     gps_first_parser = subparsers.add_parser("gps-first")
@@ -37,11 +78,25 @@ def parse_args():
     # GPS Plot
     gps_plot_parser = subparsers.add_parser("gps-plot")
     gps_plot_parser.add_argument("file")
+    gps_plot_parser.add_argument("files", nargs="*",
+                                 help="More input files, rendered in parallel")
     gps_plot_parser.add_argument('-o', '--output-file', default=None)
     gps_plot_parser.add_argument('-d', '--output-directory', default=None)
     gps_plot_parser.add_argument('-f', '--first-only', action="store_true",
                             help="Plot only the first GPS entry of a block")
-    return parser.parse_args()
+    add_simplify_arguments(gps_plot_parser)
+    gps_plot_parser.add_argument("-j", "--jobs", type=positive_int, default=None,
+                                 help="Number of worker processes (default=number of CPUs)")
+    gps_plot_parser.add_argument("--tiles", default=None, metavar="PATH",
+                                 help="Offline map tiles: an .mbtiles file or a "
+                                      "{z}/{x}/{y}.png directory")
+    gps_plot_parser.add_argument("--tile-cache", default=None, metavar="DIRECTORY",
+                                 help="Directory caching the downloaded map tiles, shared by "
+                                      "the worker processes (default=temporary directory)")
+    args = parser.parse_args()
+    if args.command == "gps-plot" and args.output_file is not None and args.files:
+        gps_plot_parser.error("--output-file requires a single input file")
+    return args
 
 
 def command_gpx_extract(args):
@@ -60,10 +115,20 @@ def command_gpx_extract(args):
     gps_data_blocks = map(parse_gps_block, gps_blocks)
 
     gpx = gpxpy.gpx.GPX()
-    gpx_track = gpxpy.gpx.GPXTrack()
-    gpx_segment = make_pgx_segment(gps_data_blocks)
+    if args.simplify is not None or args.quality_filter:
+        track = concatenate_gps_blocks(gps_data_blocks, first_only=args.first_only)
+        if args.quality_filter:
+            tracks = filter_track(track, max_gap=args.max_gap, precision_max=args.precision_max)
+        else:
+            tracks = [track]
+        if args.simplify is not None:
+            tracks = [simplify_track(t, args.simplify, method=args.simplify_method)
+                      for t in tracks]
+        gpx_track = make_gpx_track(tracks, speeds_as_extensions=not args.no_speed)
+    else:
+        gpx_track = gpxpy.gpx.GPXTrack()
+        gpx_track.segments.append(make_pgx_segment(gps_data_blocks))
     gpx.tracks.append(gpx_track)
-    gpx_track.segments.append(gpx_segment)
 
     with open(output_path, "w", encoding="utf-8") as out_file:
         out_file.write(gpx.to_xml(version=args.gpx_version))
@@ -101,35 +166,132 @@ def command_gps_first(args):
         print("No GPS information found", file=sys.stderr)
 
 
-def command_gps_plot(args):
-    infile = args.file
+def plot_output_path(infile, output_directory=None):
+    output_path = os.path.splitext(infile)[0] + ".png"
+    if output_directory is not None:
+        output_path = os.path.join(output_directory, os.path.basename(output_path))
+    return output_path
 
-    if args.output_file is None:
-        output_path = os.path.splitext(infile)[0] + ".png"
-        if args.output_directory is not None:
-            basename = os.path.basename(output_path)
-            output_path = os.path.join(args.output_directory, basename)
-    else:
-        output_path = args.output_file
 
+def open_tile_source(path):
+    from .tiles import DirectoryTileSource, MBTilesSource
+    if os.path.isdir(path):
+        return DirectoryTileSource(path)
+    return MBTilesSource(path)
+
+
+# Map provider of the current rendering process, see `init_plot_worker`
+_map_provider = None
+
+
+def init_plot_worker(tiles=None, tile_cache=None):
+    """Prepare a process for map rendering.
+
+    Selects the non-interactive Agg backend, points contextily to the tile
+    cache directory shared by the workers and opens the offline tile
+    source, whose decoded tiles are then cached for all the files rendered
+    by the process.
+    """
+    global _map_provider
+    import matplotlib
+    matplotlib.use("Agg")
+    if tile_cache is not None:
+        import contextily
+        contextily.set_cache_dir(tile_cache)
+    _map_provider = open_tile_source(tiles) if tiles is not None else None
+
+
+def render_gps_plot(infile, output_path, first_only=False, simplify=None,
+                    simplify_method="douglas-peucker"):
     gpmf_stream = extract_gpmf_stream(infile)
     gps_blocks = extract_gps_blocks(gpmf_stream)
     gps_data_blocks = map(parse_gps_block, gps_blocks)
 
-    if args.first_only:
+    if first_only:
         latlon = numpy.array([[b.latitude[0], b.longitude[0]] for b in gps_data_blocks])
     else:
         latlon = numpy.vstack([
             numpy.vstack([b.latitude, b.longitude]).T for b in gps_data_blocks
         ])
 
-    plot_gps_trace(latlon)
+    if simplify is not None:
+        latlon = latlon[simplify_latlon(*latlon.T, simplify, method=simplify_method)]
+
+    import matplotlib.pyplot as plt
+
+    plot_gps_trace(latlon, map_provider=_map_provider)
     plt.tight_layout()
     plt.savefig(output_path)
+    plt.close("all")
+    return output_path
+
+
+def report_plots(results):
+    """Print the output path of every plot, or the error of its input file.
+
+    Parameters
+    ----------
+    results: iterable
+        (input file, callable returning the output path) pairs
+
+    Returns
+    -------
+    failures: int
+        Number of input files whose plot failed
+    """
+    failures = 0
+    for infile, result in results:
+        try:
+            print(result())
+        except Exception as error:
+            print("%s: %s" % (infile, error), file=sys.stderr)
+            failures += 1
+    return failures
+
+
+def command_gps_plot(args):
+    infiles = [args.file] + list(args.files)
+    if args.output_file is not None and len(infiles) > 1:
+        print("--output-file requires a single input file", file=sys.stderr)
+        sys.exit(2)
+
+    jobs = [(infile,
+             args.output_file or plot_output_path(infile, args.output_directory),
+             args.first_only, args.simplify, args.simplify_method)
+            for infile in infiles]
+    nworkers = args.jobs
+    if nworkers is None:
+        nworkers = os.cpu_count() or 1
+    nworkers = min(nworkers, len(jobs))
+
+    if nworkers == 1:
+        init_plot_worker(args.tiles, args.tile_cache)
+        failures = report_plots((job[0], partial(render_gps_plot, *job)) for job in jobs)
+        if failures:
+            sys.exit(1)
+        return
+
+    tile_cache = args.tile_cache
+    if tile_cache is None:
+        tile_cache = tempfile.mkdtemp(prefix="gpmf-tiles-")
+    # Resolve the worker by its module name, so that it can be pickled
+    # when this module runs as __main__ (python -m gpmf)
+    module = import_module("gpmf.__main__")
+    try:
+        with ProcessPoolExecutor(nworkers, initializer=module.init_plot_worker,
+                                 initargs=(args.tiles, tile_cache)) as executor:
+            futures = {executor.submit(module.render_gps_plot, *job): job[0] for job in jobs}
+            failures = report_plots((futures[future], future.result)
+                                    for future in as_completed(futures))
+    finally:
+        if args.tile_cache is None:
+            shutil.rmtree(tile_cache, ignore_errors=True)
+    if failures:
+        sys.exit(1)
 
 
 COMMANDS = {
-    "gpx-extract": command_gpx_extract,
+    "gps-extract": command_gpx_extract,
     "gps-first": command_gps_first,
     "gps-plot": command_gps_plot
 }
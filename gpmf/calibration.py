@@ -0,0 +1,230 @@
+"""Gyroscope bias and temperature drift estimation.
+
+The gyroscope bias is measured while the camera is at rest. Stationary
+samples are found with moving statistics over whole arrays (low variance
+of the accelerometer norm and low angular velocity), then the bias of
+every axis is fitted as a polynomial of the sensor temperature (TMPC) with
+one least-squares solve. The fitted model is evaluated at every sample and
+subtracted from the angular velocities.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+from .events import intervals
+from .resample import interpolate_linear
+
+
+# Gyroscope bias as a polynomial of the temperature
+BiasModel = namedtuple("BiasModel", [
+    "coefficients",             # (degree + 1, 3) coefficients, constant term first
+    "reference_temperature",    # temperature the polynomial is centred on, in °C
+])
+
+
+def block_temperatures(sensor_blocks):
+    """Temperature of every GyroData/AccelData block.
+
+    Parameters
+    ----------
+    sensor_blocks: seq of GyroData or AccelData
+        Sensor data from `gpmf.gyro.parse_gyro_block`
+
+    Returns
+    -------
+    temperature: numpy.ndarray
+        (nblocks,) TMPC temperatures in °C, nan for blocks without one
+    """
+    return numpy.array([numpy.nan if block.temperature is None else float(block.temperature)
+                        for block in sensor_blocks])
+
+
+def _moving_mean(values, size):
+    """Centred moving average over `size` samples, shrinking at the edges."""
+    values = numpy.asarray(values, dtype=float)
+    cumsum = numpy.concatenate([numpy.zeros((1,) + values.shape[1:]), numpy.cumsum(values, axis=0)])
+    index = numpy.arange(len(values))
+    lo = numpy.maximum(index - size // 2, 0)
+    hi = numpy.minimum(index - size // 2 + size, len(values))
+    count = (hi - lo).reshape((-1,) + (1,) * (values.ndim - 1))
+    return (cumsum[hi] - cumsum[lo]) / count
+
+
+def stationary_mask(time, gyro, accel=None, window=0.5, gyro_threshold=0.05,
+                    accel_std=0.2, min_duration=1.0):
+    """Find the samples recorded while the camera was at rest.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times in seconds
+    gyro: numpy.ndarray
+        (n, 3) angular velocities in rad/s
+    accel: numpy.ndarray, optional
+        (n, 3) accelerations in m/s² on the same clock
+    window: float, optional (default=0.5)
+        Length of the moving window in seconds
+    gyro_threshold: float, optional (default=0.05)
+        Maximum moving average of the angular velocity norm in rad/s. It
+        must exceed the expected bias.
+    accel_std: float, optional (default=0.2)
+        Maximum moving standard deviation of the acceleration norm in m/s²
+    min_duration: float, optional (default=1.0)
+        Minimum duration of a stationary interval in seconds
+
+    Returns
+    -------
+    mask: numpy.ndarray
+        (n,) boolean mask of the stationary samples
+    """
+    time = numpy.asarray(time, dtype=float)
+    n = len(time)
+    if n < 2:
+        return numpy.zeros(n, dtype=bool)
+    size = max(int(round(window / numpy.median(numpy.diff(time)))), 1)
+
+    gyro_norm = numpy.linalg.norm(numpy.asarray(gyro, dtype=float).reshape(-1, 3), axis=1)
+    mask = _moving_mean(gyro_norm, size) < gyro_threshold
+
+    if accel is not None:
+        accel_norm = numpy.linalg.norm(numpy.asarray(accel, dtype=float).reshape(-1, 3), axis=1)
+        mean = _moving_mean(accel_norm, size)
+        variance = _moving_mean(accel_norm ** 2, size) - mean ** 2
+        mask &= variance < accel_std ** 2
+
+    starts, stops = intervals(time, mask, min_duration=min_duration)
+    edges = numpy.zeros(n + 1, dtype=numpy.int64)
+    edges[starts] += 1
+    edges[stops] -= 1
+    return numpy.cumsum(edges[:-1]) > 0
+
+
+def fit_gyro_bias(gyro, temperature=None, mask=None, degree=1):
+    """Fit the gyroscope bias as a function of temperature.
+
+    Parameters
+    ----------
+    gyro: numpy.ndarray
+        (n, 3) angular velocities in rad/s
+    temperature: numpy.ndarray, optional
+        (n,) temperatures in °C. If None, a constant bias is fitted.
+    mask: numpy.ndarray, optional
+        (n,) boolean mask of the stationary samples. If None, all the
+        samples are used.
+    degree: int, optional (default=1)
+        Degree of the polynomial. It is lowered when the observed
+        temperatures do not span enough distinct values.
+
+    Returns
+    -------
+    model: BiasModel
+        The fitted bias model
+
+    Raises
+    ------
+    ValueError: If no sample can be used for the fit.
+    """
+    gyro = numpy.asarray(gyro, dtype=float).reshape(-1, 3)
+    use = numpy.ones(len(gyro), dtype=bool) if mask is None else numpy.asarray(mask, dtype=bool)
+    if temperature is None:
+        temperature = numpy.zeros(len(gyro))
+        degree = 0
+    temperature = numpy.asarray(temperature, dtype=float)
+    use = use & numpy.isfinite(temperature) & numpy.all(numpy.isfinite(gyro), axis=1)
+    if not use.any():
+        raise ValueError("No stationary sample to estimate the gyroscope bias")
+
+    t = temperature[use]
+    reference = float(t.mean())
+    degree = min(degree, len(numpy.unique(t)) - 1)
+    vandermonde = (t - reference)[:, None] ** numpy.arange(degree + 1)
+    coefficients = numpy.linalg.lstsq(vandermonde, gyro[use], rcond=None)[0]
+    return BiasModel(coefficients, reference)
+
+
+def gyro_bias(model, temperature=None, n=None):
+    """Evaluate a bias model.
+
+    Parameters
+    ----------
+    model: BiasModel
+        A model from `fit_gyro_bias`
+    temperature: numpy.ndarray, optional
+        (n,) temperatures in °C. If None (or nan), the bias at the reference
+        temperature is used.
+    n: int, optional
+        Number of samples when `temperature` is None
+
+    Returns
+    -------
+    bias: numpy.ndarray
+        (n, 3) bias of every sample in rad/s, or (3,) if both `temperature`
+        and `n` are None
+    """
+    if temperature is None:
+        bias = model.coefficients[0]
+        return bias if n is None else numpy.tile(bias, (n, 1))
+    dt = numpy.nan_to_num(numpy.asarray(temperature, dtype=float) - model.reference_temperature)
+    return (dt[:, None] ** numpy.arange(len(model.coefficients))) @ model.coefficients
+
+
+def correct_gyro_track(track, model, temperature=None):
+    """Remove the modelled bias from a gyroscope SensorTrack.
+
+    Parameters
+    ----------
+    track: SensorTrack
+        Gyroscope samples in rad/s
+    model: BiasModel
+        A model from `fit_gyro_bias`
+    temperature: numpy.ndarray, optional
+        (n,) temperature of every sample in °C
+
+    Returns
+    -------
+    track: SensorTrack
+        The corrected track
+    """
+    bias = gyro_bias(model, temperature, n=len(track.x))
+    return track._replace(x=track.x - bias[:, 0], y=track.y - bias[:, 1], z=track.z - bias[:, 2])
+
+
+def estimate_gyro_bias(gyro_track, accel_track=None, temperature=None, degree=1, **kwargs):
+    """Estimate the gyroscope bias of a recording in a single pass.
+
+    Parameters
+    ----------
+    gyro_track: SensorTrack
+        Gyroscope samples in rad/s
+    accel_track: SensorTrack, optional
+        Accelerometer samples, resampled at the gyroscope times
+    temperature: numpy.ndarray, optional
+        Temperature in °C of every gyroscope sample, or of every block
+        (indexed by `block_id`, see `block_temperatures`)
+    degree: int, optional (default=1)
+        Degree of the temperature polynomial
+    kwargs:
+        Extra arguments passed to `stationary_mask`
+
+    Returns
+    -------
+    model: BiasModel
+        The fitted bias model
+    temperature: numpy.ndarray or None
+        Temperature of every gyroscope sample, to use with `correct_gyro_track`
+    """
+    time = numpy.asarray(gyro_track.time, dtype=float)
+    gyro = numpy.column_stack([gyro_track.x, gyro_track.y, gyro_track.z])
+    accel = None
+    if accel_track is not None:
+        accel = interpolate_linear(accel_track.time,
+                                   numpy.column_stack([accel_track.x, accel_track.y,
+                                                       accel_track.z]), time)
+    if temperature is not None:
+        temperature = numpy.asarray(temperature, dtype=float)
+        if len(temperature) != len(time):
+            temperature = temperature[gyro_track.block_id]
+
+    mask = stationary_mask(time, gyro, accel, **kwargs)
+    return fit_gyro_bias(gyro, temperature, mask, degree), temperature
@@ -0,0 +1,220 @@
+"""Anti-aliased decimation of high-rate sensor streams.
+
+Samples are low-pass filtered before being downsampled, either with a
+windowed-sinc FIR filter or a moving average. Only the kept output samples
+are computed: the input is viewed as strided windows of the filter length
+(`numpy.lib.stride_tricks.sliding_window_view`), one window per output
+sample, which is the polyphase form of the filter.
+
+`Decimator` processes data chunk by chunk and carries the filter history
+over, so a stream can be decimated at extraction time with bounded memory.
+Output timestamps account for the filter delay.
+"""
+
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .gyro import SensorTrack
+
+
+DECIMATION_METHODS = ("fir", "mean")
+
+
+def lowpass_taps(factor, ntaps=None, cutoff=0.8):
+    """Windowed-sinc low-pass filter for a decimation factor.
+
+    Parameters
+    ----------
+    factor: int
+        Decimation factor
+    ntaps: int, optional
+        Filter length. If None, ``20 * factor + 1``.
+    cutoff: float, optional (default=0.8)
+        Cutoff frequency as a fraction of the output Nyquist frequency
+
+    Returns
+    -------
+    taps: numpy.ndarray
+        Symmetric filter taps with unit gain at 0 Hz
+    """
+    if ntaps is None:
+        ntaps = 20 * factor + 1
+    k = numpy.arange(ntaps) - 0.5 * (ntaps - 1)
+    taps = numpy.sinc(cutoff * k / factor) * numpy.hamming(ntaps)
+    return taps / taps.sum()
+
+
+class Decimator:
+    """Streaming decimation of sensor samples.
+
+    Parameters
+    ----------
+    factor: int
+        Decimation factor, e.g. 10 to go from 400 Hz to 40 Hz
+    method: str, optional (default="fir")
+        "fir" (windowed-sinc filter, see `lowpass_taps`) or "mean" (moving
+        average over `factor` samples, cheaper but with a weaker
+        attenuation of the aliased frequencies).
+    ntaps: int, optional
+        Length of the FIR filter
+    """
+
+    def __init__(self, factor, method="fir", ntaps=None):
+        if method not in DECIMATION_METHODS:
+            raise ValueError("Unknown decimation method: %s" % method)
+        self.factor = int(factor)
+        if self.factor < 1:
+            raise ValueError("The decimation factor must be a positive integer")
+
+        if method == "fir" and self.factor > 1:
+            self.taps = lowpass_taps(self.factor, ntaps)
+        else:
+            self.taps = numpy.full(self.factor, 1.0 / self.factor)
+        # Filter delay, possibly half a sample
+        delay = 0.5 * (len(self.taps) - 1)
+        self._center = (int(numpy.floor(delay)), int(numpy.ceil(delay)))
+        # The FIR filter is centred on the first sample, the moving average
+        # starts with a full block
+        self._pad = self._center[0] if method == "fir" else 0
+        self._time = None
+        self._values = None
+
+    def _windows(self, time, values):
+        """Filter every complete window and keep the remaining samples."""
+        ntaps = len(self.taps)
+        nout = max((len(time) - ntaps) // self.factor + 1, 0)
+        self._time = time[nout * self.factor:].copy()
+        self._values = values[nout * self.factor:].copy()
+        if nout == 0:
+            return time[:0], values[:0]
+
+        windows = sliding_window_view(values, ntaps, axis=0)[::self.factor][:nout]
+        out_values = windows @ self.taps
+        starts = numpy.arange(nout) * self.factor
+        out_time = 0.5 * (time[starts + self._center[0]] + time[starts + self._center[1]])
+        return out_time, out_values
+
+    def process(self, time, values):
+        """Decimate a chunk of samples.
+
+        Parameters
+        ----------
+        time: numpy.ndarray
+            (n,) sample times in seconds
+        values: numpy.ndarray
+            (n,) or (n, k) sample values
+
+        Returns
+        -------
+        time: numpy.ndarray
+            Times of the output samples
+        values: numpy.ndarray
+            Decimated values, the remaining samples are kept for the next
+            chunk (see `flush`)
+        """
+        time = numpy.asarray(time, dtype=float)
+        values = numpy.asarray(values, dtype=float)
+        if len(time) == 0:
+            return time, values
+
+        if self._time is None:
+            # Start with a constant extension of the first sample
+            self._time = numpy.full(self._pad, numpy.nan)
+            self._values = numpy.repeat(values[:1], self._pad, axis=0)
+
+        return self._windows(numpy.concatenate([self._time, time]),
+                             numpy.concatenate([self._values, values]))
+
+    def flush(self):
+        """Decimate the samples left over by `process`.
+
+        The end of the stream is extended with its last sample.
+
+        Returns
+        -------
+        time: numpy.ndarray
+            Times of the last output samples
+        values: numpy.ndarray
+            Last decimated values
+        """
+        if self._time is None or not numpy.isfinite(self._time).any():
+            empty = numpy.empty(0)
+            return empty, empty if self._values is None else self._values[:0]
+
+        last = numpy.flatnonzero(numpy.isfinite(self._time))[-1]
+        pad = len(self.taps) - 1
+        time = numpy.concatenate([self._time[:last + 1], numpy.full(pad, numpy.nan)])
+        values = numpy.concatenate([self._values[:last + 1],
+                                    numpy.repeat(self._values[last:last + 1], pad, axis=0)])
+        out_time, out_values = self._windows(time, values)
+        keep = numpy.isfinite(out_time)
+        self._time = self._values = None
+        return out_time[keep], out_values[keep]
+
+
+def decimate(time, values, factor, method="fir", ntaps=None, chunk_size=1 << 18):
+    """Low-pass filter and downsample sensor samples.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times in seconds
+    values: numpy.ndarray
+        (n,) or (n, k) sample values
+    factor: int
+        Decimation factor
+    method: str, optional (default="fir")
+        "fir" or "mean", see `Decimator`
+    ntaps: int, optional
+        Length of the FIR filter
+    chunk_size: int, optional (default=262144)
+        Number of samples processed at once
+
+    Returns
+    -------
+    time: numpy.ndarray
+        Times of the output samples
+    values: numpy.ndarray
+        Decimated values
+    """
+    decimator = Decimator(factor, method, ntaps)
+    times, chunks = [], []
+    for start in range(0, len(time), chunk_size):
+        out_time, out_values = decimator.process(time[start:start + chunk_size],
+                                                 values[start:start + chunk_size])
+        times.append(out_time)
+        chunks.append(out_values)
+    out_time, out_values = decimator.flush()
+    times.append(out_time)
+    chunks.append(out_values)
+    return numpy.concatenate(times), numpy.concatenate(chunks)
+
+
+def decimate_sensor_track(track, factor, method="fir", ntaps=None):
+    """Decimate a SensorTrack.
+
+    Parameters
+    ----------
+    track: SensorTrack
+        A track from `gpmf.gyro.concatenate_sensor_blocks`
+    factor: int
+        Decimation factor
+    method: str, optional (default="fir")
+        "fir" or "mean", see `Decimator`
+    ntaps: int, optional
+        Length of the FIR filter
+
+    Returns
+    -------
+    track: SensorTrack
+        The decimated track. Output samples keep the block id of the input
+        sample at or before their time.
+    """
+    time = numpy.asarray(track.time, dtype=float)
+    values = numpy.column_stack([track.x, track.y, track.z])
+    out_time, out_values = decimate(time, values, factor, method, ntaps)
+    block = numpy.maximum(numpy.searchsorted(time, out_time, side="right") - 1, 0)
+    x, y, z = out_values.reshape(-1, 3).T
+    return SensorTrack(time=out_time, x=x, y=y, z=z,
+                       block_id=numpy.asarray(track.block_id)[block] if len(time) else
+                       numpy.empty(0, dtype=numpy.int32))
@@ -0,0 +1,266 @@
+"""Detection of events in IMU and GPS data.
+
+Detectors threshold a whole signal at once, apply a hysteresis (an event
+starts above an entry threshold and lasts until the signal falls back
+under a release threshold), and run-length encode the resulting mask into
+intervals. Intervals separated by short gaps are merged and too short ones
+are dropped, without any loop over the samples.
+
+Events are returned column-wise as an `Events` tuple of arrays, which can be
+concatenated across detectors with `concatenate_events`.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+from .resample import to_seconds
+
+
+# Column-wise table of detected events
+Events = namedtuple("Events", [
+    "kind",     # (n,) event kind, e.g. "impact"
+    "start",    # (n,) time of the first sample of each event
+    "stop",     # (n,) time of the last sample of each event
+    "peak",     # (n,) extreme value of the signal during each event
+])
+
+STANDARD_GRAVITY = 9.80665
+
+
+def runs(mask):
+    """Run-length encode the True values of a boolean mask.
+
+    Parameters
+    ----------
+    mask: numpy.ndarray
+        (n,) boolean mask
+
+    Returns
+    -------
+    starts, stops: numpy.ndarray
+        Start and stop (exclusive) indices of every run of True values
+    """
+    edges = numpy.diff(numpy.concatenate([[0], numpy.asarray(mask, dtype=numpy.int8), [0]]))
+    return numpy.flatnonzero(edges == 1), numpy.flatnonzero(edges == -1)
+
+
+def hysteresis(signal, high, low):
+    """Schmitt trigger on a signal.
+
+    The output switches on at the first sample above `high` and off at the
+    first following sample not above `low`.
+
+    Parameters
+    ----------
+    signal: numpy.ndarray
+        (n,) signal
+    high: float
+        Entry threshold
+    low: float
+        Release threshold, lower or equal to `high`
+
+    Returns
+    -------
+    mask: numpy.ndarray
+        (n,) boolean mask of the active samples
+    """
+    signal = numpy.asarray(signal, dtype=float)
+    starts, stops = runs(signal > low)
+    triggers = numpy.flatnonzero(signal > high)
+
+    # First trigger of every run above the release threshold
+    first = numpy.searchsorted(triggers, starts)
+    trigger = triggers[numpy.minimum(first, len(triggers) - 1)] if len(triggers) else starts
+    active = (first < len(triggers)) & (trigger < stops)
+
+    edges = numpy.zeros(len(signal) + 1, dtype=numpy.int64)
+    numpy.add.at(edges, trigger[active], 1)
+    numpy.add.at(edges, stops[active], -1)
+    return numpy.cumsum(edges[:-1]) > 0
+
+
+def intervals(time, mask, min_duration=0.0, max_gap=0.0):
+    """Merge and filter the runs of a mask.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times in seconds
+    mask: numpy.ndarray
+        (n,) boolean mask
+    min_duration: float, optional (default=0.0)
+        Minimum duration of an interval in seconds
+    max_gap: float, optional (default=0.0)
+        Runs separated by at most this time in seconds are merged
+
+    Returns
+    -------
+    starts, stops: numpy.ndarray
+        Start and stop (exclusive) indices of the intervals
+    """
+    time = numpy.asarray(time, dtype=float)
+    starts, stops = runs(mask)
+    if len(starts) > 1 and max_gap > 0:
+        gap = time[starts[1:]] - time[stops[:-1] - 1]
+        keep = numpy.concatenate([[True], gap > max_gap])
+        starts = starts[keep]
+        stops = stops[numpy.concatenate([keep[1:], [True]])]
+    duration = time[stops - 1] - time[starts] if len(starts) else numpy.empty(0)
+    keep = duration >= min_duration
+    return starts[keep], stops[keep]
+
+
+def _events(kind, time, signal, starts, stops, reduce=numpy.maximum):
+    time = numpy.asarray(time)
+    peak = numpy.empty(0)
+    if len(starts):
+        # Reduce over [start, stop) only: the odd entries of the interleaved
+        # indices reduce the gaps between events and are dropped. The signal
+        # is padded so that a stop at its end is a valid index.
+        signal = numpy.append(signal, signal[-1:])
+        peak = reduce.reduceat(signal, numpy.column_stack([starts, stops]).ravel())[::2]
+    return Events(
+        kind=numpy.full(len(starts), kind, dtype=object),
+        start=time[starts],
+        stop=time[stops - 1],
+        peak=peak,
+    )
+
+
+def _norm(values):
+    return numpy.linalg.norm(numpy.asarray(values, dtype=float).reshape(-1, 3), axis=1)
+
+
+def detect_impacts(time, accel, threshold=4.0, release=2.0, max_gap=0.05):
+    """Impacts: acceleration norm above a threshold.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times in seconds
+    accel: numpy.ndarray
+        (n, 3) accelerations in m/s²
+    threshold: float, optional (default=4.0)
+        Entry threshold in g
+    release: float, optional (default=2.0)
+        Release threshold in g
+    max_gap: float, optional (default=0.05)
+        Impacts closer than this time in seconds are merged
+
+    Returns
+    -------
+    events: Events
+        "impact" events, with the peak acceleration in g
+    """
+    g = _norm(accel) / STANDARD_GRAVITY
+    starts, stops = intervals(time, hysteresis(g, threshold, release), max_gap=max_gap)
+    return _events("impact", time, g, starts, stops)
+
+
+def detect_free_fall(time, accel, threshold=0.3, release=0.6, min_duration=0.2, max_gap=0.05):
+    """Free-fall (jumps, drops): acceleration norm close to zero.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times in seconds
+    accel: numpy.ndarray
+        (n, 3) accelerations in m/s²
+    threshold: float, optional (default=0.3)
+        Entry threshold in g, the norm must fall under it
+    release: float, optional (default=0.6)
+        Release threshold in g
+    min_duration: float, optional (default=0.2)
+        Minimum duration in seconds
+    max_gap: float, optional (default=0.05)
+        Intervals closer than this time in seconds are merged
+
+    Returns
+    -------
+    events: Events
+        "free-fall" events, with the lowest acceleration in g
+    """
+    g = _norm(accel) / STANDARD_GRAVITY
+    starts, stops = intervals(time, hysteresis(-g, -threshold, -release),
+                              min_duration=min_duration, max_gap=max_gap)
+    return _events("free-fall", time, g, starts, stops, reduce=numpy.minimum)
+
+
+def detect_hard_braking(time, speed, threshold=4.0, release=2.0, min_duration=0.3):
+    """Hard braking: GPS speed decreasing faster than a threshold.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times, in seconds or as `numpy.datetime64`
+    speed: numpy.ndarray
+        (n,) speeds in m/s, e.g. `GPSTrack.speed_2d`
+    threshold: float, optional (default=4.0)
+        Entry deceleration in m/s²
+    release: float, optional (default=2.0)
+        Release deceleration in m/s²
+    min_duration: float, optional (default=0.3)
+        Minimum duration in seconds
+
+    Returns
+    -------
+    events: Events
+        "hard-braking" events, with the peak deceleration in m/s²
+    """
+    seconds = to_seconds(time)
+    speed = numpy.asarray(speed, dtype=float)
+    if len(speed) < 2:
+        return _events("hard-braking", time, speed, numpy.empty(0, int), numpy.empty(0, int))
+    deceleration = -numpy.gradient(speed, seconds)
+    starts, stops = intervals(seconds, hysteresis(deceleration, threshold, release),
+                              min_duration=min_duration)
+    return _events("hard-braking", time, deceleration, starts, stops)
+
+
+def detect_stops(time, speed, max_speed=0.5, release=1.0, min_duration=5.0, max_gap=1.0):
+    """Stationary periods: GPS speed under a threshold.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times, in seconds or as `numpy.datetime64`
+    speed: numpy.ndarray
+        (n,) speeds in m/s
+    max_speed: float, optional (default=0.5)
+        Entry speed in m/s
+    release: float, optional (default=1.0)
+        Speed in m/s above which the stop ends
+    min_duration: float, optional (default=5.0)
+        Minimum duration in seconds
+    max_gap: float, optional (default=1.0)
+        Stops closer than this time in seconds are merged
+
+    Returns
+    -------
+    events: Events
+        "stop" events, with the lowest speed
+    """
+    seconds = to_seconds(time)
+    speed = numpy.asarray(speed, dtype=float)
+    starts, stops = intervals(seconds, hysteresis(-speed, -max_speed, -release),
+                              min_duration=min_duration, max_gap=max_gap)
+    return _events("stop", time, speed, starts, stops, reduce=numpy.minimum)
+
+
+def concatenate_events(*events):
+    """Concatenate event tables and sort them by start time.
+
+    Parameters
+    ----------
+    events: Events
+        Event tables with times of the same type
+
+    Returns
+    -------
+    events: Events
+        The merged table
+    """
+    merged = Events._make(numpy.concatenate(columns) for columns in zip(*events))
+    order = numpy.argsort(merged.start, kind="stable")
+    return Events._make(column[order] for column in merged)
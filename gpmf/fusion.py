@@ -0,0 +1,301 @@
+"""Gyroscope and accelerometer fusion into orientation.
+
+Two complementary filters are provided: a Mahony filter (proportional-integral
+feedback of the accelerometer error) and a constant-rate variant, which
+rotates the estimate towards the measured "up" direction at the fixed rate
+`beta` like the steady state of Madgwick's normalised gradient step, without
+its gradient-descent formulation.
+
+The filters apply their accelerometer correction once per block of
+`block_size` samples instead of once per sample:
+
+* gyro increments inside every block are chained for all the blocks at once
+  (vectorised prefix products from the block start);
+* the mean error ``â × v̂`` between the measured and estimated "up" directions
+  over a block is linear in the estimated up direction at the block start,
+  so it reduces to a 3x3 matrix per block, also computed for all the blocks
+  at once;
+* only the block-to-block recursion (a few dozen float operations) is
+  sequential.
+
+Data is processed chunk by chunk with a carried `FusionState`, so memory is
+bounded by the chunk size. Blocks are counted from the first sample of the
+stream: the samples of an incomplete block at the end of a chunk are carried
+in the state and the block is completed by the next chunk, and the reference
+accelerometer norm is fixed by the first chunk (or given), so the output
+does not depend on how the stream is split. With the default 32-sample blocks at 400 Hz the
+correction runs at 12.5 Hz, well above the bandwidth of usual filter gains.
+"""
+
+from collections import namedtuple
+import math
+
+import numpy
+
+from . import quaternion
+from .gyro import OrientationTrack
+from .resample import interpolate_linear
+
+
+FusionState = namedtuple("FusionState", [
+    "quaternion",       # (4,) orientation at the end of the last complete block
+    "integral_error",   # (3,) integral term of the Mahony filter at that point
+    "time",             # time of the last sample of that block
+    "gyro",             # (3,) angular velocity of the last sample of that block
+    "gravity",          # reference accelerometer norm, None until estimated
+    "pending",          # (time, gyro, accel) samples of the incomplete block, or None
+], defaults=(None, None))
+
+
+def initial_orientation(accel):
+    """Orientation with zero yaw whose "up" direction matches an accelerometer reading.
+
+    Parameters
+    ----------
+    accel: numpy.ndarray
+        (3,) accelerometer reading (specific force, pointing up at rest)
+
+    Returns
+    -------
+    q: numpy.ndarray
+        (4,) unit quaternion rotating the sensor frame into the reference frame
+    """
+    a = numpy.asarray(accel, dtype=float)
+    a = a / numpy.linalg.norm(a)
+    # Rotation taking `a` onto the z axis
+    q = numpy.array([1.0 + a[2], a[1], -a[0], 0.0])
+    if q[0] < 1e-9:
+        return numpy.array([0.0, 1.0, 0.0, 0.0])
+    return q / numpy.linalg.norm(q)
+
+
+def _multiply(p, q):
+    """Hamilton product of quaternions given as (w, x, y, z) component arrays."""
+    pw, px, py, pz = p
+    qw, qx, qy, qz = q
+    return (pw * qw - px * qx - py * qy - pz * qz,
+            pw * qx + px * qw + py * qz - pz * qy,
+            pw * qy - px * qz + py * qw + pz * qx,
+            pw * qz + px * qy - py * qx + pz * qw)
+
+
+def fuse_imu(time, gyro, accel, method="mahony", kp=1.0, ki=0.0, beta=0.1,
+             block_size=32, accel_tolerance=0.5, gravity=None, state=None):
+    """Fuse gyroscope and accelerometer samples into orientation quaternions.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times in seconds
+    gyro: numpy.ndarray
+        (n, 3) angular velocities in rad/s
+    accel: numpy.ndarray
+        (n, 3) accelerometer readings on the same clock, in any unit
+    method: str, optional (default="mahony")
+        "mahony" (proportional-integral correction with gains `kp`, `ki`)
+        or "madgwick" (correction at the constant rate `beta` rad/s along
+        the error direction, a simplification of Madgwick's gradient step).
+    kp, ki: float, optional (default=1.0, 0.0)
+        Mahony gains in 1/s and 1/s²
+    beta: float, optional (default=0.1)
+        Correction rate of the "madgwick" method in rad/s
+    block_size: int, optional (default=32)
+        Number of samples between two corrections
+    accel_tolerance: float, optional (default=0.5)
+        Samples whose acceleration norm differs from the reference norm by
+        more than this fraction are not used for the correction.
+    gravity: float, optional
+        Reference accelerometer norm at rest, in the unit of `accel`. If
+        None, the median norm of the first chunk is used and carried in the
+        state.
+    state: FusionState, optional
+        State returned by the previous chunk. If None, the orientation is
+        initialised from the first accelerometer sample.
+
+    Returns
+    -------
+    quaternions: numpy.ndarray
+        (n, 4) orientation for every sample
+    state: FusionState
+        The state to pass along with the next chunk
+    """
+    if method not in ("mahony", "madgwick"):
+        raise ValueError("Unknown fusion method: %s" % method)
+
+    time = numpy.asarray(time, dtype=float)
+    gyro = numpy.asarray(gyro, dtype=float).reshape(-1, 3)
+    accel = numpy.asarray(accel, dtype=float).reshape(-1, 3)
+    if len(time) == 0:
+        return numpy.empty((0, 4)), state
+
+    if state is None:
+        state = FusionState(initial_orientation(accel[0]), numpy.zeros(3), time[0], gyro[0])
+    if gravity is None:
+        gravity = state.gravity
+    if gravity is None:
+        gravity = float(numpy.median(numpy.linalg.norm(accel, axis=1)))
+
+    # Complete the block left over by the previous chunk
+    npending = 0
+    if state.pending is not None:
+        pending_time, pending_gyro, pending_accel = state.pending
+        npending = len(pending_time)
+        time = numpy.concatenate([pending_time, time])
+        gyro = numpy.vstack([pending_gyro, gyro])
+        accel = numpy.vstack([pending_accel, accel])
+    n = len(time)
+
+    # Gyro increments, the first one bridging from the previous chunk
+    previous_time = numpy.concatenate([[state.time], time[:-1]])
+    previous_gyro = numpy.vstack([state.gyro, gyro[:-1]])
+    dt = time - previous_time
+    increments = quaternion.from_rotation_vector(0.5 * (previous_gyro + gyro) * dt[:, None])
+
+    # Blocks, padded with identity increments, stored component-major as
+    # (4, block_size, nblocks) so that each step of the scan is contiguous
+    nblocks = -(-n // block_size)
+    padded = nblocks * block_size
+    components = numpy.zeros((4, padded))
+    components[:, :n] = increments.T
+    components[0, n:] = 1.0
+    blocks = components.reshape(4, nblocks, block_size).transpose(0, 2, 1).copy()
+    for j in range(1, block_size):
+        blocks[:, j] = _multiply(blocks[:, j - 1], blocks[:, j])
+    # Rotation from the block start, per sample
+    rw, rx, ry, rz = blocks.transpose(0, 2, 1).reshape(4, padded)
+
+    # Block error matrices: e = mean_k [â_k]x R(P_k)^T u, whose column j is
+    # the mean of â_k x (row j of R(P_k))
+    norm = numpy.linalg.norm(accel, axis=1)
+    valid = numpy.zeros(padded, dtype=bool)
+    valid[:n] = (numpy.abs(norm - gravity) <= accel_tolerance * gravity) & (norm > 0)
+    unit_accel = numpy.zeros((padded, 3))
+    unit_accel[valid] = accel[valid[:n]] / norm[valid[:n], None]
+    rows = (
+        numpy.column_stack([1 - 2 * (ry * ry + rz * rz), 2 * (rx * ry - rw * rz),
+                            2 * (rx * rz + rw * ry)]),
+        numpy.column_stack([2 * (rx * ry + rw * rz), 1 - 2 * (rx * rx + rz * rz),
+                            2 * (ry * rz - rw * rx)]),
+        numpy.column_stack([2 * (rx * rz - rw * ry), 2 * (ry * rz + rw * rx),
+                            1 - 2 * (rx * rx + ry * ry)]),
+    )
+    columns = [numpy.cross(unit_accel, row).reshape(nblocks, block_size, 3).sum(axis=1)
+               for row in rows]
+    counts = numpy.maximum(valid.reshape(nblocks, block_size).sum(axis=1), 1)
+    error_matrices = (numpy.stack(columns, axis=2) / counts[:, None, None]).reshape(
+        nblocks, 9).tolist()
+    totals = blocks[:, -1].T.tolist()
+    durations = numpy.concatenate([dt, numpy.zeros(padded - n)]).reshape(
+        nblocks, block_size).sum(axis=1).tolist()
+
+    # Sequential block recursion on floats
+    w, x, y, z = state.quaternion.tolist()
+    ix, iy, iz = state.integral_error.tolist()
+    starts = numpy.empty((nblocks, 4))
+    for b in range(nblocks):
+        starts[b] = (w, x, y, z)
+        integral = (ix, iy, iz)
+        # Estimated up direction in the sensor frame: R(q)^T e_z
+        ux = 2.0 * (x * z - w * y)
+        uy = 2.0 * (y * z + w * x)
+        uz = w * w - x * x - y * y + z * z
+        m = error_matrices[b]
+        ex = m[0] * ux + m[1] * uy + m[2] * uz
+        ey = m[3] * ux + m[4] * uy + m[5] * uz
+        ez = m[6] * ux + m[7] * uy + m[8] * uz
+        h = durations[b]
+
+        if method == "mahony":
+            ix += ki * ex * h
+            iy += ki * ey * h
+            iz += ki * ez * h
+            cx, cy, cz = kp * ex + ix, kp * ey + iy, kp * ez + iz
+        else:
+            # Constant rate along the error, without overshooting it within the block
+            e = math.sqrt(ex * ex + ey * ey + ez * ez)
+            scale = min(beta, e / h) / e if e > 1e-12 and h > 0 else 0.0
+            cx, cy, cz = scale * ex, scale * ey, scale * ez
+
+        # q ⊗ P_total
+        pw, px, py, pz = totals[b]
+        w, x, y, z = (w * pw - x * px - y * py - z * pz,
+                      w * px + x * pw + y * pz - z * py,
+                      w * py - x * pz + y * pw + z * px,
+                      w * pz + x * py - y * px + z * pw)
+        # ⊗ exp(c h / 2), first order
+        cw, cx, cy, cz = 1.0, 0.5 * cx * h, 0.5 * cy * h, 0.5 * cz * h
+        w, x, y, z = (w * cw - x * cx - y * cy - z * cz,
+                      w * cx + x * cw + y * cz - z * cy,
+                      w * cy - x * cz + y * cw + z * cx,
+                      w * cz + x * cy - y * cx + z * cw)
+        norm_q = math.sqrt(w * w + x * x + y * y + z * z)
+        w, x, y, z = w / norm_q, x / norm_q, y / norm_q, z / norm_q
+
+    quaternions = numpy.column_stack(_multiply(
+        numpy.repeat(starts, block_size, axis=0)[:n].T, (rw[:n], rx[:n], ry[:n], rz[:n])))
+    quaternions = quaternion.normalize(quaternions)
+
+    remainder = n % block_size
+    if remainder == 0:
+        # The carried orientation includes the correction of the last block
+        state = FusionState(numpy.array([w, x, y, z]), numpy.array([ix, iy, iz]),
+                            time[-1], gyro[-1], gravity)
+    else:
+        # Restart from the beginning of the incomplete block with the next chunk
+        first = n - remainder
+        state = FusionState(
+            starts[-1].copy(), numpy.array(integral),
+            state.time if first == 0 else time[first - 1],
+            state.gyro if first == 0 else gyro[first - 1],
+            gravity, (time[first:].copy(), gyro[first:].copy(), accel[first:].copy()))
+    return quaternions[npending:], state
+
+
+def fuse_imu_tracks(gyro_track, accel_track, rate=None, chunk_size=1 << 18, **kwargs):
+    """Fuse a gyroscope and an accelerometer SensorTrack.
+
+    Both tracks are resampled onto a common clock, chunk by chunk, and fused
+    with `fuse_imu`. The result does not depend on `chunk_size`.
+
+    Parameters
+    ----------
+    gyro_track: SensorTrack
+        Gyroscope samples in rad/s
+    accel_track: SensorTrack
+        Accelerometer samples
+    rate: float, optional
+        Rate of the common clock in Hz. If None, the gyroscope times are used.
+    chunk_size: int, optional (default=262144)
+        Number of samples processed at once
+    kwargs:
+        Extra arguments passed to `fuse_imu`
+
+    Returns
+    -------
+    orientation: OrientationTrack
+        Orientation quaternions on the common clock
+    """
+    if rate is None:
+        clock = numpy.asarray(gyro_track.time, dtype=float)
+    else:
+        start, stop = gyro_track.time[0], gyro_track.time[-1]
+        clock = start + numpy.arange(int((stop - start) * rate) + 1) / float(rate)
+
+    gyro_values = numpy.column_stack([gyro_track.x, gyro_track.y, gyro_track.z])
+    accel_values = numpy.column_stack([accel_track.x, accel_track.y, accel_track.z])
+    # Reference norm of the whole track, so that the result does not depend
+    # on the chunk size
+    kwargs.setdefault("gravity", float(numpy.median(numpy.linalg.norm(accel_values, axis=1))))
+
+    state = None
+    quaternions = numpy.empty((len(clock), 4))
+    for start in range(0, len(clock), chunk_size):
+        time = clock[start:start + chunk_size]
+        gyro = interpolate_linear(gyro_track.time, gyro_values, time)
+        accel = interpolate_linear(accel_track.time, accel_values, time)
+        quaternions[start:start + len(time)], state = fuse_imu(time, gyro, accel,
+                                                               state=state, **kwargs)
+
+    block = numpy.searchsorted(gyro_track.time, clock, side="right") - 1
+    return OrientationTrack(time=clock, quaternions=quaternions,
+                            block_id=numpy.asarray(gyro_track.block_id)[numpy.maximum(block, 0)])
@@ -0,0 +1,189 @@
+"""Geodesy helpers used to work on GPS tracks in metric coordinates."""
+
+import numpy
+
+
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+EARTH_RADIUS = 6371008.8
+
+
+def geodetic_to_ecef(latitude, longitude, altitude=0.0):
+    """Convert geodetic coordinates to Earth-Centered Earth-Fixed coordinates.
+
+    Parameters
+    ----------
+    latitude: numpy.ndarray
+        Latitudes in degrees
+    longitude: numpy.ndarray
+        Longitudes in degrees
+    altitude: numpy.ndarray or float, optional (default=0.0)
+        Altitudes above the WGS84 ellipsoid in metres
+
+    Returns
+    -------
+    x, y, z: numpy.ndarray
+        The ECEF coordinates in metres
+    """
+    lat = numpy.radians(numpy.asarray(latitude, dtype=float))
+    lon = numpy.radians(numpy.asarray(longitude, dtype=float))
+    alt = numpy.asarray(altitude, dtype=float)
+
+    sin_lat = numpy.sin(lat)
+    cos_lat = numpy.cos(lat)
+    n = WGS84_A / numpy.sqrt(1 - WGS84_E2 * sin_lat ** 2)
+
+    x = (n + alt) * cos_lat * numpy.cos(lon)
+    y = (n + alt) * cos_lat * numpy.sin(lon)
+    z = (n * (1 - WGS84_E2) + alt) * sin_lat
+    return x, y, z
+
+
+def ecef_to_enu(x, y, z, lat0, lon0, alt0=0.0):
+    """Convert ECEF coordinates to a local East-North-Up frame.
+
+    Parameters
+    ----------
+    x, y, z: numpy.ndarray
+        ECEF coordinates in metres
+    lat0, lon0: float
+        Latitude and longitude of the frame origin in degrees
+    alt0: float, optional (default=0.0)
+        Altitude of the frame origin in metres
+
+    Returns
+    -------
+    east, north, up: numpy.ndarray
+        The local coordinates in metres
+    """
+    x0, y0, z0 = geodetic_to_ecef(lat0, lon0, alt0)
+    dx = numpy.asarray(x) - x0
+    dy = numpy.asarray(y) - y0
+    dz = numpy.asarray(z) - z0
+
+    lat = numpy.radians(lat0)
+    lon = numpy.radians(lon0)
+    sin_lat, cos_lat = numpy.sin(lat), numpy.cos(lat)
+    sin_lon, cos_lon = numpy.sin(lon), numpy.cos(lon)
+
+    east = -sin_lon * dx + cos_lon * dy
+    north = -sin_lat * cos_lon * dx - sin_lat * sin_lon * dy + cos_lat * dz
+    up = cos_lat * cos_lon * dx + cos_lat * sin_lon * dy + sin_lat * dz
+    return east, north, up
+
+
+def geodetic_to_enu(latitude, longitude, altitude=0.0, origin=None):
+    """Convert geodetic coordinates to a local East-North-Up frame.
+
+    Parameters
+    ----------
+    latitude: numpy.ndarray
+        Latitudes in degrees
+    longitude: numpy.ndarray
+        Longitudes in degrees
+    altitude: numpy.ndarray or float, optional (default=0.0)
+        Altitudes in metres
+    origin: tuple of float, optional
+        (latitude, longitude, altitude) of the frame origin. If None, the
+        first point is used.
+
+    Returns
+    -------
+    east, north, up: numpy.ndarray
+        The local coordinates in metres
+    """
+    latitude = numpy.asarray(latitude, dtype=float)
+    longitude = numpy.asarray(longitude, dtype=float)
+    altitude = numpy.broadcast_to(numpy.asarray(altitude, dtype=float), latitude.shape)
+
+    if origin is None:
+        origin = (latitude.flat[0], longitude.flat[0], altitude.flat[0])
+
+    x, y, z = geodetic_to_ecef(latitude, longitude, altitude)
+    return ecef_to_enu(x, y, z, *origin)
+
+
+def enu_to_geodetic(east, north, up, origin):
+    """Convert local East-North-Up coordinates back to geodetic coordinates.
+
+    Parameters
+    ----------
+    east, north, up: numpy.ndarray
+        Local coordinates in metres
+    origin: tuple of float
+        (latitude, longitude, altitude) of the frame origin
+
+    Returns
+    -------
+    latitude, longitude, altitude: numpy.ndarray
+        Geodetic coordinates (degrees, degrees, metres)
+    """
+    lat0, lon0, alt0 = origin
+    lat = numpy.radians(lat0)
+    lon = numpy.radians(lon0)
+    sin_lat, cos_lat = numpy.sin(lat), numpy.cos(lat)
+    sin_lon, cos_lon = numpy.sin(lon), numpy.cos(lon)
+
+    east = numpy.asarray(east, dtype=float)
+    north = numpy.asarray(north, dtype=float)
+    up = numpy.asarray(up, dtype=float)
+
+    x0, y0, z0 = geodetic_to_ecef(lat0, lon0, alt0)
+    x = x0 - sin_lon * east - sin_lat * cos_lon * north + cos_lat * cos_lon * up
+    y = y0 + cos_lon * east - sin_lat * sin_lon * north + cos_lat * sin_lon * up
+    z = z0 + cos_lat * north + sin_lat * up
+
+    return ecef_to_geodetic(x, y, z)
+
+
+def ecef_to_geodetic(x, y, z):
+    """Convert ECEF coordinates to geodetic coordinates (Bowring's method).
+
+    Parameters
+    ----------
+    x, y, z: numpy.ndarray
+        ECEF coordinates in metres
+
+    Returns
+    -------
+    latitude, longitude, altitude: numpy.ndarray
+        Geodetic coordinates (degrees, degrees, metres)
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    z = numpy.asarray(z, dtype=float)
+
+    b = WGS84_A * (1 - WGS84_F)
+    ep2 = (WGS84_A ** 2 - b ** 2) / b ** 2
+    p = numpy.hypot(x, y)
+    theta = numpy.arctan2(z * WGS84_A, p * b)
+
+    lat = numpy.arctan2(z + ep2 * b * numpy.sin(theta) ** 3,
+                        p - WGS84_E2 * WGS84_A * numpy.cos(theta) ** 3)
+    lon = numpy.arctan2(y, x)
+    n = WGS84_A / numpy.sqrt(1 - WGS84_E2 * numpy.sin(lat) ** 2)
+    alt = p / numpy.cos(lat) - n
+
+    return numpy.degrees(lat), numpy.degrees(lon), alt
+
+
+def haversine(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two sets of points.
+
+    Parameters
+    ----------
+    lat1, lon1, lat2, lon2: numpy.ndarray
+        Coordinates in degrees
+
+    Returns
+    -------
+    distance: numpy.ndarray
+        The distances in metres
+    """
+    lat1, lon1, lat2, lon2 = map(numpy.radians, (lat1, lon1, lat2, lon2))
+    a = (numpy.sin((lat2 - lat1) / 2) ** 2
+         + numpy.cos(lat1) * numpy.cos(lat2) * numpy.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS * numpy.arcsin(numpy.sqrt(numpy.minimum(a, 1.0)))
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from xml.etree import ElementTree as ET
 
 import gpxpy
+import numpy
 from . import parse
 
 
@@ -22,6 +23,20 @@ GPSData = namedtuple("GPSData",
                      ])
 
 
+GPSTrack = namedtuple("GPSTrack",
+                      [
+                          "time",
+                          "latitude",
+                          "longitude",
+                          "altitude",
+                          "speed_2d",
+                          "speed_3d",
+                          "precision",
+                          "fix",
+                          "block_id"
+                      ])
+
+
 def extract_gps_blocks(stream):
     """ Extract GPS data blocks from binary stream
 
@@ -176,3 +191,128 @@ def make_pgx_segment(gps_blocks, first_only=False, speeds_as_extensions=True):
             track_segment.points.append(tp)
 
     return track_segment
+
+
+def parse_gps_timestamp(timestamp):
+    """Convert a GPSU timestamp string into a `numpy.datetime64`.
+
+    Parameters
+    ----------
+    timestamp: str
+        A timestamp as returned by `parse_gps_block`, e.g. "2020-07-03 12:36:56.940".
+
+    Returns
+    -------
+    time: numpy.datetime64
+        The timestamp with microsecond resolution.
+    """
+    return numpy.datetime64(timestamp.strip().replace(" ", "T"), "us")
+
+
+def concatenate_gps_blocks(gps_blocks, first_only=False):
+    """Concatenate GPSData blocks into a single per-point `GPSTrack`.
+
+    Samples of a block are assumed to be evenly spread over the second
+    following the block GPSU timestamp. Block level values (precision, fix)
+    are repeated for every sample of the block.
+
+    Parameters
+    ----------
+    gps_blocks: seq of GPSData
+        A sequence of GPSData objects
+    first_only: bool, optional (default=False)
+        If True use only the first GPS entry of each data block.
+
+    Returns
+    -------
+    track: GPSTrack
+        A GPSTrack whose fields are arrays with one entry per GPS sample.
+    """
+    columns = {name: [] for name in GPSTrack._fields}
+
+    for block_id, block in enumerate(gps_blocks):
+        latitude = numpy.atleast_1d(numpy.asarray(block.latitude, dtype=float))
+        npoints = 1 if first_only else len(latitude)
+        if npoints == 0:
+            continue
+
+        offsets = (numpy.arange(npoints) * (1e6 / len(latitude))).astype("timedelta64[us]")
+        columns["time"].append(parse_gps_timestamp(block.timestamp) + offsets)
+        columns["latitude"].append(latitude[:npoints])
+        for name in ["longitude", "altitude", "speed_2d", "speed_3d"]:
+            values = numpy.atleast_1d(numpy.asarray(getattr(block, name), dtype=float))
+            columns[name].append(values[:npoints])
+        columns["precision"].append(numpy.full(npoints, block.precision, dtype=float))
+        columns["fix"].append(numpy.full(npoints, block.fix, dtype=numpy.int8))
+        columns["block_id"].append(numpy.full(npoints, block_id, dtype=numpy.int32))
+
+    dtypes = {"time": "datetime64[us]", "fix": numpy.int8, "block_id": numpy.int32}
+    return GPSTrack(**{
+        name: (numpy.concatenate(values) if values
+               else numpy.empty(0, dtype=dtypes.get(name, float)))
+        for name, values in columns.items()
+    })
+
+
+def make_gpx_segment_from_track(track, speeds_as_extensions=True):
+    """Convert a GPSTrack into a GPX track segment.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `concatenate_gps_blocks`.
+    speeds_as_extensions: bool, optional (default=True)
+        If True, include 2d and 3d speed values as exentensions of
+        the GPX trackpoints.
+
+    Returns
+    -------
+    gpx_segment: gpxpy.gpx.GPXTrackSegment
+        A gpx track segment.
+    """
+    track_segment = gpxpy.gpx.GPXTrackSegment()
+    times = track.time.astype(datetime)
+
+    for i in range(len(track.latitude)):
+        tp = gpxpy.gpx.GPXTrackPoint(
+            latitude=track.latitude[i],
+            longitude=track.longitude[i],
+            elevation=track.altitude[i],
+            speed=track.speed_3d[i],
+            position_dilution=track.precision[i],
+            time=times[i],
+            symbol="Square",
+        )
+        tp.type_of_gpx_fix = FIX_TYPE.get(int(track.fix[i]))
+
+        if speeds_as_extensions:
+            for e in _make_speed_extensions(track, i):
+                tp.extensions.append(e)
+
+        track_segment.points.append(tp)
+
+    return track_segment
+
+
+def make_gpx_track(tracks, speeds_as_extensions=True):
+    """Convert a list of GPSTrack segments into a GPX track.
+
+    Parameters
+    ----------
+    tracks: seq of GPSTrack
+        The segments of the track, e.g. as returned by `gpmf.quality.filter_track`.
+    speeds_as_extensions: bool, optional (default=True)
+        If True, include 2d and 3d speed values as exentensions of
+        the GPX trackpoints.
+
+    Returns
+    -------
+    gpx_track: gpxpy.gpx.GPXTrack
+        A gpx track with one segment per input track.
+    """
+    gpx_track = gpxpy.gpx.GPXTrack()
+    for track in tracks:
+        gpx_track.segments.append(
+            make_gpx_segment_from_track(track, speeds_as_extensions=speeds_as_extensions)
+        )
+    return gpx_track
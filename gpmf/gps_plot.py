@@ -1,50 +1,121 @@
 import matplotlib.pyplot as plt
-import geopandas as gpd
+from matplotlib.collections import LineCollection
 import contextily as ctx
 import numpy
 import pandas
 
 
-from .gps import extract_gps_blocks, parse_gps_block
+from .gps import extract_gps_blocks, parse_gps_block, concatenate_gps_blocks
+from .quality import quality_mask
+from . import tiles
+from .projection import project
+from .lod import decimate_path, decimate_points, path_segments
+from .outliers import quantile_bounds
+from .heatmap import HeatmapGrid
 
 
 LATLON = "EPSG:4326"
 LAMBERT93 = "EPSG:2154"
 
+# GPS fix types: no fix, 2d and 3d
+FIX_TYPES = (0, 2, 3)
 
-def to_dataframe(gps_data_blocks):
+
+def track_to_dataframe(track, float32=False):
+    """Convert a GPSTrack into a pandas dataframe.
+
+    Every column is adopted from the track arrays without copy, except when
+    a dtype conversion is requested.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    float32: bool, optional (default=False)
+        If True store altitude, speeds and precision as float32. Latitude
+        and longitude are kept as float64, float32 only resolves about a
+        metre at these magnitudes.
+
+    Returns
+    -------
+    df_gps: pandas.DataFrame
+        The output dataframe, indexed by the sample times.
+    """
+    dtype = numpy.float32 if float32 else float
+    fix = numpy.asarray(track.fix)
+    columns = {
+        "latitude": numpy.asarray(track.latitude, dtype=float),
+        "longitude": numpy.asarray(track.longitude, dtype=float),
+        "altitude": numpy.asarray(track.altitude, dtype=dtype),
+        "time": numpy.asarray(track.time, dtype="datetime64[us]"),
+        "speed_2d": numpy.asarray(track.speed_2d, dtype=dtype),
+        "speed_3d": numpy.asarray(track.speed_3d, dtype=dtype),
+        "precision": numpy.asarray(track.precision, dtype=dtype),
+        "fix": pandas.Categorical(fix, categories=numpy.union1d(FIX_TYPES, fix)),
+        "block_id": numpy.asarray(track.block_id),
+    }
+    return pandas.DataFrame(columns, index=pandas.DatetimeIndex(columns["time"]), copy=False)
+
+
+def to_dataframe(gps_data_blocks, first_only=False, float32=False):
     """Convert a sequence of GPSData into pandas dataframe.
 
     Parameters
     ----------
     gps_data_blocks: seq of GPSData
         A sequence of GPSData objects
+    first_only: bool, optional (default=False)
+        If True use only the first GPS entry of each data block.
+    float32: bool, optional (default=False)
+        If True store altitude, speeds and precision as float32.
+
     Returns
     -------
     df_gps: pandas.DataFrame
-        The output dataframe
+        The output dataframe, with one row per GPS sample indexed by its time.
+
+    Raises
+    ------
+    ValueError: If there is no GPS sample.
     """
-    df_blocks = []
-    for i, block in enumerate(gps_data_blocks):
-        df_block = pandas.DataFrame()
-        df_block["latitude"] = block.latitude
-        df_block["longitude"] = block.longitude
-        df_block["altitude"] = block.altitude
-        df_block["time"] = block.timestamp
-        df_block["speed_2d"] = block.speed_2d
-        df_block["speed_3d"] = block.speed_3d
-        df_block["precision"] = block.precision
-        df_block["fix"] = block.fix
-        df_block["block_id"] = i
-        df_blocks.append(df_block)
+    track = concatenate_gps_blocks(gps_data_blocks, first_only=first_only)
+    if len(track.time) == 0:
+        raise ValueError("No GPS data to convert")
+    return track_to_dataframe(track, float32=float32)
 
-    return pandas.concat(df_blocks)
 
+def filter_outliers(x, sketch=None):
+    """Filter outliers based on 0.01 and 0.99 quantiles
 
-def filter_outliers(x):
-    """Filter outliers based on 0.01 and 0.99 quantiles"""
-    q01, q50, q99 = numpy.quantile(x, q=[0.01, 0.5, 0.99])
-    return (q50 - (1.1 * (q50 - q01)) < x) & (x < q50 + (1.1 * (q99 - q50)))
+    Parameters
+    ----------
+    x: numpy.ndarray
+        The values to filter
+    sketch: gpmf.outliers.QuantileSketch, optional
+        Approximate quantiles of the values. It can be built in a single pass
+        over chunks of a large track, which then are filtered one by one
+        without sorting. If None, the exact quantiles of `x` are computed.
+
+    Returns
+    -------
+    mask: numpy.ndarray
+        Boolean mask of the inliers
+    """
+    if sketch is None:
+        q01, q50, q99 = numpy.quantile(x, q=[0.01, 0.5, 0.99])
+        return (q50 - (1.1 * (q50 - q01)) < x) & (x < q50 + (1.1 * (q99 - q50)))
+    low, high = quantile_bounds(sketch)
+    return (low < x) & (x < high)
+
+
+def _add_basemap(ax, map_provider, zoom, proj_crs):
+    """Draw a contextily provider or a local tile source under the axis content."""
+    if map_provider is None:
+        map_provider = ctx.providers.OpenStreetMap.Mapnik
+    if isinstance(map_provider, tiles.TileSource):
+        tiles.add_basemap(ax, map_provider, zoom=zoom, crs=proj_crs)
+    else:
+        ctx.add_basemap(ax, source=map_provider, zoom=zoom, crs=proj_crs)
 
 
 def plot_gps_trace(latlon,
@@ -53,7 +124,13 @@ def plot_gps_trace(latlon,
                    zoom=12,
                    figsize=(10, 10),
                    proj_crs=LAMBERT93,
-                   color="tab:red"):
+                   color="tab:red",
+                   style="scatter",
+                   lod=True,
+                   linewidth=2.0,
+                   values=None,
+                   cmap="viridis",
+                   label=None):
     """ Plot a (lat, lon) coordinates on a Map
 
     Parameters
@@ -62,8 +139,9 @@ def plot_gps_trace(latlon,
         Array of (latitude, longitude) coordinates
     min_tile_size: int, optional (default=10)
         Minimum size of the map in km
-    map_provider: dict
-        Dictionnary describing a map provider as given by `contextly.providers`. If None
+    map_provider: dict or gpmf.tiles.TileSource
+        Dictionnary describing a map provider as given by `contextly.providers`, or a
+        local tile source (see `gpmf.tiles`). If None
         `contextily.providers.OpenStreetMap.Mapnik` is used.
     zoom: int, optional (default=12)
         The zoom level used.
@@ -74,9 +152,25 @@ def plot_gps_trace(latlon,
         corresponds to the Lambert 93 system.
     color: str, optional (default="tab:red")
         The color used to plot the track.
+    style: str, optional (default="scatter")
+        "scatter" to draw a marker per point or "line" to draw the track as a
+        single LineCollection.
+    lod: bool, optional (default=True)
+        If True drop the points that do not change the rendered image at the
+        figure resolution (see `gpmf.lod`), which bounds the drawing time.
+    linewidth: float, optional (default=2.0)
+        Line width in points with ``style="line"``.
+    values: numpy.ndarray, optional
+        (n,) value of every point, e.g. speed or altitude. If given, the
+        track is coloured with `cmap` instead of `color` (each line segment
+        takes the value of its first point) and a colorbar is added.
+    cmap: str, optional (default="viridis")
+        The matplotlib colormap used with `values`.
+    label: str, optional
+        Label of the colorbar.
     """
-    if map_provider is None:
-        map_provider = ctx.providers.OpenStreetMap.Mapnik
+    if style not in ("scatter", "line"):
+        raise ValueError("Unknown plot style: %s" % style)
 
     min_tile_size *= 1000
 
@@ -84,14 +178,36 @@ def plot_gps_trace(latlon,
 
     mask = filter_outliers(x) & filter_outliers(y)
 
-    df = gpd.GeoDataFrame(
-        geometry=gpd.points_from_xy(x[mask], y[mask], crs=LATLON)
-    )
+    px, py = project(x[mask], y[mask], proj_crs)
+    if values is not None:
+        values = numpy.asarray(values, dtype=float)[mask]
 
-    plt.figure(figsize=figsize)
+    fig = plt.figure(figsize=figsize)
     ax = plt.gca()
 
-    df.to_crs(proj_crs).plot(ax=ax, color=color)
+    if lod and len(px):
+        width, height = (int(numpy.ceil(size * fig.dpi)) for size in figsize)
+        decimate = decimate_path if style == "line" else decimate_points
+        index = decimate(px, py, width, height)
+        px, py = px[index], py[index]
+        if values is not None:
+            values = values[index]
+
+    if style == "line":
+        if values is None:
+            artist = LineCollection(path_segments(px, py), colors=color, linewidths=linewidth)
+        else:
+            artist = LineCollection(path_segments(px, py), array=values[:-1], cmap=cmap,
+                                    linewidths=linewidth)
+        ax.add_collection(artist)
+        ax.autoscale_view()
+    elif values is None:
+        artist = ax.scatter(px, py, color=color)
+    else:
+        artist = ax.scatter(px, py, c=values, cmap=cmap)
+    ax.set_aspect("equal")
+    if values is not None:
+        fig.colorbar(artist, ax=ax, shrink=0.6, label=label)
 
     xmin, xmax = plt.xlim()
     dx = xmax - xmin
@@ -111,7 +227,7 @@ def plot_gps_trace(latlon,
         ymax = yc + min_tile_size / 2
         plt.ylim(ymin, ymax)
 
-    ctx.add_basemap(ax, source=map_provider, zoom=zoom, crs=proj_crs)
+    _add_basemap(ax, map_provider, zoom, proj_crs)
     ax.set_axis_off()
 
 
@@ -124,7 +240,9 @@ def plot_gps_trace_from_stream(stream,
                                proj_crs=LAMBERT93,
                                output_path=None,
                                precision_max=3.0,
-                               color="tab:red"):
+                               color="tab:red",
+                               color_by=None,
+                               **kwargs):
     """ Plot GPS data from a string on a map.
 
         Parameters
@@ -133,8 +251,9 @@ def plot_gps_trace_from_stream(stream,
             The raw GPMF binary stream.
         min_tile_size: int, optional (default=10)
             Minimum size of the map in km
-        map_provider: dict
-            Dictionnary describing a map provider as given by `contextly.providers`. If None
+        map_provider: dict or gpmf.tiles.TileSource
+            Dictionnary describing a map provider as given by `contextly.providers`, or a
+            local tile source (see `gpmf.tiles`). If None
             `contextily.providers.OpenStreetMap.Mapnik` is used.
         zoom: int, optional (default=12)
             The zoom level used.
@@ -143,28 +262,121 @@ def plot_gps_trace_from_stream(stream,
         proj_crs: str or geopandas.CRS object, optional (default="EPSG:2154")
             The projection system used to compute distances on the map. The default value
             corresponds to the Lambert 93 system.
+        precision_max: float, optional (default=3.0)
+            Points with a dilution of precision greater or equal to this value are
+            not plotted. Points without fix and implausible jumps are dropped as well,
+            see `gpmf.quality.quality_mask`.
         color: str, optional (default="tab:red")
             The color used to plot the track.
+        color_by: str, optional
+            Name of a `gpmf.gps.GPSTrack` column, e.g. "speed_3d" or
+            "altitude", used to colour the track instead of `color`.
+        kwargs:
+            Extra arguments passed to `plot_gps_trace`, e.g. ``style="line"``
+            or `cmap`.
     """
     gps_data_blocks = map(parse_gps_block, extract_gps_blocks(stream))
-
-    if first_only:
-        latlon = numpy.array([[b.latitude[0], b.longitude[0]]
-                              for b in gps_data_blocks
-                              if b.precision < precision_max])
-    else:
-        latlon = numpy.vstack([
-            numpy.vstack([b.latitude, b.longitude]).T
-            for b in gps_data_blocks
-            if b.precision < precision_max
-        ])
+    track = concatenate_gps_blocks(gps_data_blocks, first_only=first_only)
+    mask = quality_mask(track, precision_max=precision_max)
+    latlon = numpy.column_stack([track.latitude[mask], track.longitude[mask]])
+    if color_by is not None:
+        kwargs.setdefault("values", numpy.asarray(getattr(track, color_by))[mask])
+        kwargs.setdefault("label", color_by)
 
     plot_gps_trace(latlon, min_tile_size=min_tile_size,
                    map_provider=map_provider,
                    zoom=zoom, figsize=figsize,
-                   proj_crs=proj_crs, color=color)
+                   proj_crs=proj_crs, color=color, **kwargs)
     plt.tight_layout()
 
     if output_path is not None:
         plt.savefig(output_path)
 
+
+def heatmap(tracks,
+            cell_size=50.0,
+            value="count",
+            basemap=True,
+            map_provider=None,
+            zoom=12,
+            figsize=(10, 10),
+            proj_crs=LAMBERT93,
+            cmap="inferno",
+            alpha=0.8,
+            output_path=None):
+    """Plot the density or the mean speed of many tracks on a map.
+
+    The tracks are accumulated one at a time into a `gpmf.heatmap.HeatmapGrid`,
+    so memory depends on the covered area and not on the number of points,
+    and the grid is drawn as a single image.
+
+    Parameters
+    ----------
+    tracks: iterable of GPSTrack or HeatmapGrid
+        Tracks as returned by `gpmf.gps.concatenate_gps_blocks`, or grids
+        already accumulated (e.g. by worker processes), with the same cell
+        size and projection
+    cell_size: float, optional (default=50.0)
+        Size of the cells in metres
+    value: str, optional (default="count")
+        "count" for the number of points per cell (log scale) or "speed" for
+        the mean 2d speed of the cells in m/s
+    basemap: bool, optional (default=True)
+        If True draw the map tiles under the heatmap.
+    map_provider: dict or gpmf.tiles.TileSource
+        Dictionnary describing a map provider as given by `contextly.providers`, or a
+        local tile source (see `gpmf.tiles`). If None
+        `contextily.providers.OpenStreetMap.Mapnik` is used.
+    zoom: int, optional (default=12)
+        The zoom level used.
+    figsize: tuple of int, optional (default=(10, 10))
+        The matplotlib figure size
+    proj_crs: str or pyproj.CRS, optional (default="EPSG:2154")
+        The projection system of the grid.
+    cmap: str, optional (default="inferno")
+        The matplotlib colormap
+    alpha: float, optional (default=0.8)
+        Opacity of the heatmap
+    output_path: str, optional
+        If given, the figure is saved to this path.
+
+    Returns
+    -------
+    grid: HeatmapGrid
+        The accumulated grid
+    """
+    from matplotlib.colors import LogNorm
+
+    if value not in ("count", "speed"):
+        raise ValueError("Unknown heatmap value: %s" % value)
+
+    grid = HeatmapGrid(cell_size=cell_size, crs=proj_crs)
+    for track in tracks:
+        if isinstance(track, HeatmapGrid):
+            grid.merge(track)
+        else:
+            grid.add_track(track)
+    if grid.origin is None:
+        raise ValueError("No GPS data to plot")
+
+    if value == "count":
+        image = numpy.ma.masked_equal(grid.count, 0)
+        norm = LogNorm(vmin=1, vmax=max(int(grid.count.max()), 2))
+    else:
+        image = numpy.ma.masked_invalid(grid.mean_speed())
+        norm = None
+
+    plt.figure(figsize=figsize)
+    ax = plt.gca()
+    mappable = ax.imshow(image, extent=grid.extent, origin="lower", cmap=cmap, norm=norm,
+                         alpha=alpha, interpolation="nearest", zorder=1)
+    plt.colorbar(mappable, ax=ax, shrink=0.6,
+                 label="points per cell" if value == "count" else "mean speed (m/s)")
+    if basemap:
+        _add_basemap(ax, map_provider, zoom, proj_crs)
+    ax.set_axis_off()
+    plt.tight_layout()
+
+    if output_path is not None:
+        plt.savefig(output_path)
+    return grid
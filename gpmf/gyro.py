@@ -4,6 +4,10 @@ Supports Hero 5+ models with gyro/accelerometer telemetry for video stabilizatio
 """
 
 from collections import namedtuple
+import io
+import json
+import re
+
 import numpy as np
 
 # Data container for gyroscope readings
@@ -26,6 +30,94 @@ AccelData = namedtuple('AccelData', [
     'npoints',          # Number of data points
 ])
 
+# Data container for camera/image orientation readings (CORI, IORI)
+OrientationData = namedtuple('OrientationData', [
+    'description',      # Stream description
+    'timestamp',        # Timestamp string
+    'quaternions',      # (n, 4) unit quaternions (w, x, y, z)
+    'units',            # Units string
+    'npoints',          # Number of data points
+])
+
+# Data container for gravity vector readings (GRAV)
+GravityData = namedtuple('GravityData', [
+    'description',      # Stream description
+    'timestamp',        # Timestamp string
+    'x', 'y', 'z',     # Gravity direction (x, y, z axes, unit norm)
+    'units',            # Units string
+    'npoints',          # Number of data points
+])
+
+# Per-sample container for concatenated orientation blocks
+OrientationTrack = namedtuple('OrientationTrack', [
+    'time',             # Seconds since the start of the stream
+    'quaternions',      # (n, 4) unit quaternions (w, x, y, z)
+    'block_id',         # Index of the source block
+])
+
+# Per-sample container for concatenated gyro/accel blocks
+SensorTrack = namedtuple('SensorTrack', [
+    'time',             # Seconds since the start of the stream
+    'x', 'y', 'z',     # Sensor axes
+    'block_id',         # Index of the source block
+])
+
+
+# Sensor streams recorded by Hero 5+ cameras
+SENSOR_FOURCCS = ("GYRO", "ACCL", "GRAV", "CORI", "IORI", "MAGN")
+
+
+def extract_sensor_blocks(gpmf_bytes, fourccs=SENSOR_FOURCCS):
+    """Extract sensor data blocks for several sensors in a single pass.
+    
+    Every STRM container is walked once and routed to the first of its
+    items whose FourCC is in `fourccs`.
+    
+    Parameters
+    ----------
+    gpmf_bytes : bytes
+        Raw GPMF data bytes
+    fourccs : seq of str, optional
+        FourCC codes of the sensor streams to extract (default SENSOR_FOURCCS)
+    
+    Yields
+    ------
+    fourcc : str
+        The FourCC of the sensor stream
+    block : list of KVLItem
+        A list of KVLItem corresponding to the sensor data block
+    """
+    from .parse import filter_klv
+    
+    fourccs = frozenset(fourccs)
+    for stream in filter_klv(gpmf_bytes, "STRM"):
+        block = list(stream.value)
+        for item in block:
+            if item.key in fourccs:
+                yield item.key, block
+                break
+
+
+def group_sensor_blocks(gpmf_bytes, fourccs=SENSOR_FOURCCS):
+    """Extract sensor data blocks grouped by FourCC in a single pass.
+    
+    Parameters
+    ----------
+    gpmf_bytes : bytes
+        Raw GPMF data bytes
+    fourccs : seq of str, optional
+        FourCC codes of the sensor streams to extract (default SENSOR_FOURCCS)
+    
+    Returns
+    -------
+    blocks : dict
+        Mapping of each requested FourCC to its list of blocks
+    """
+    blocks = {fourcc: [] for fourcc in fourccs}
+    for fourcc, block in extract_sensor_blocks(gpmf_bytes, fourccs):
+        blocks[fourcc].append(block)
+    return blocks
+
 
 def extract_gyro_blocks(gpmf_bytes):
     """Extract all gyroscope data blocks from GPMF stream.
@@ -42,21 +134,8 @@ def extract_gyro_blocks(gpmf_bytes):
     gyro_block : list of KVLItem
         A list of KVLItem corresponding to a gyroscope data block
     """
-    from .parse import iter_klv, KLV_LIST
-    
-    for elt in iter_klv(gpmf_bytes, KLV_LIST):
-        if elt.key == "STRM":
-            # Found a stream container, extract GYRO data
-            for sub_elt in iter_klv(elt.value, KLV_LIST):
-                if sub_elt.key == "GYRO":
-                    # Found GYRO stream, yield the containing block
-                    # Collect all items in this stream
-                    block = []
-                    for item in iter_klv(elt.value, KLV_LIST):
-                        block.append(item)
-                    if any(item.key == "GYRO" for item in block):
-                        yield block
-                    break
+    for _, block in extract_sensor_blocks(gpmf_bytes, ["GYRO"]):
+        yield block
 
 
 def extract_accel_blocks(gpmf_bytes):
@@ -74,20 +153,8 @@ def extract_accel_blocks(gpmf_bytes):
     accel_block : list of KVLItem
         A list of KVLItem corresponding to an accelerometer data block
     """
-    from .parse import iter_klv, KLV_LIST
-    
-    for elt in iter_klv(gpmf_bytes, KLV_LIST):
-        if elt.key == "STRM":
-            # Found a stream container, extract ACCL data
-            for sub_elt in iter_klv(elt.value, KLV_LIST):
-                if sub_elt.key == "ACCL":
-                    # Found ACCL stream, yield the containing block
-                    block = []
-                    for item in iter_klv(elt.value, KLV_LIST):
-                        block.append(item)
-                    if any(item.key == "ACCL" for item in block):
-                        yield block
-                    break
+    for _, block in extract_sensor_blocks(gpmf_bytes, ["ACCL"]):
+        yield block
 
 
 def parse_gyro_block(gyro_block):
@@ -172,45 +239,506 @@ def parse_accel_block(accel_block):
     )
 
 
-def calculate_rotation_from_gyro(gyro_data, sample_rate=None):
+def _scaled_rows(block_dict, fourcc, ncols):
+    """Scaled values of a sensor stream as a (n, ncols) array."""
+    values = np.asarray(block_dict[fourcc].value, dtype=float).reshape(-1, ncols)
+    scale = np.asarray(block_dict["SCAL"].value, dtype=float) if "SCAL" in block_dict else 1.0
+    return values / scale
+
+
+def parse_orientation_block(orientation_block, fourcc="CORI"):
+    """Parse a camera (CORI) or image (IORI) orientation block.
+    
+    Hero 8+ cameras record their fused orientation at frame rate as
+    quaternions (w, x, y, z).
+    
+    Parameters
+    ----------
+    orientation_block : list of KVLItem
+        A list of KVLItem corresponding to a CORI or IORI data block
+    fourcc : str, optional
+        "CORI" (default) or "IORI"
+    
+    Returns
+    -------
+    orientation_data : OrientationData
+        An OrientationData object holding normalised quaternions
+    """
+    block_dict = {s.key: s for s in orientation_block}
+    quaternions = _scaled_rows(block_dict, fourcc, 4)
+    norm = np.linalg.norm(quaternions, axis=1, keepdims=True)
+    quaternions = quaternions / np.where(norm > 0, norm, 1.0)
+    
+    return OrientationData(
+        description=block_dict.get("STNM", namedtuple('Item', ['value'])(fourcc)).value,
+        timestamp=block_dict.get("GPSU", namedtuple('Item', ['value'])("")).value,
+        quaternions=quaternions,
+        units=block_dict.get("UNIT", namedtuple('Item', ['value'])("")).value,
+        npoints=len(quaternions)
+    )
+
+
+def parse_gravity_block(gravity_block):
+    """Parse a gravity vector (GRAV) block into GravityData objects.
+    
+    Parameters
+    ----------
+    gravity_block : list of KVLItem
+        A list of KVLItem corresponding to a GRAV data block
+    
+    Returns
+    -------
+    gravity_data : GravityData
+        A GravityData object holding the gravity direction as unit vectors
+    """
+    block_dict = {s.key: s for s in gravity_block}
+    gravity = _scaled_rows(block_dict, "GRAV", 3)
+    norm = np.linalg.norm(gravity, axis=1, keepdims=True)
+    # Null vectors are kept as is
+    x, y, z = (gravity / np.where(norm > 0, norm, 1.0)).T
+    
+    return GravityData(
+        description=block_dict.get("STNM", namedtuple('Item', ['value'])("Gravity Vector")).value,
+        timestamp=block_dict.get("GPSU", namedtuple('Item', ['value'])("")).value,
+        x=x,
+        y=y,
+        z=z,
+        units=block_dict.get("UNIT", namedtuple('Item', ['value'])("")).value,
+        npoints=len(x)
+    )
+
+
+def concatenate_sensor_blocks(sensor_blocks, block_duration=1.0, start=0.0):
+    """Concatenate GyroData/AccelData blocks into a single SensorTrack.
+
+    GPMF payloads cover about one second each; samples of a block are
+    assumed to be evenly spread over ``block_duration`` seconds.
+    
+    Parameters
+    ----------
+    sensor_blocks : seq of GyroData or AccelData
+        Sensor data from parse_gyro_block() or parse_accel_block()
+    block_duration : float, optional
+        Duration covered by each block in seconds (default 1.0)
+    start : float, optional
+        Time of the first block in seconds (default 0.0)
+    
+    Returns
+    -------
+    track : SensorTrack
+        Per-sample arrays with times in seconds
+    """
+    times, xs, ys, zs, block_ids = [], [], [], [], []
+    for block_id, block in enumerate(sensor_blocks):
+        x = np.atleast_1d(np.asarray(block.x, dtype=float))
+        n = len(x)
+        times.append(start + block_duration * (block_id + np.arange(n) / n))
+        xs.append(x)
+        ys.append(np.atleast_1d(np.asarray(block.y, dtype=float)))
+        zs.append(np.atleast_1d(np.asarray(block.z, dtype=float)))
+        block_ids.append(np.full(n, block_id, dtype=np.int32))
+    
+    if not times:
+        empty = np.empty(0)
+        return SensorTrack(empty, empty, empty, empty, np.empty(0, dtype=np.int32))
+    
+    return SensorTrack(
+        time=np.concatenate(times),
+        x=np.concatenate(xs),
+        y=np.concatenate(ys),
+        z=np.concatenate(zs),
+        block_id=np.concatenate(block_ids),
+    )
+
+
+def concatenate_orientation_blocks(orientation_blocks, block_duration=1.0, start=0.0):
+    """Concatenate OrientationData blocks into a single OrientationTrack.
+    
+    Parameters
+    ----------
+    orientation_blocks : seq of OrientationData
+        Orientation data from parse_orientation_block()
+    block_duration : float, optional
+        Duration covered by each block in seconds (default 1.0)
+    start : float, optional
+        Time of the first block in seconds (default 0.0)
+    
+    Returns
+    -------
+    track : OrientationTrack
+        Per-sample times in seconds and (n, 4) quaternions
+    """
+    times, quaternions, block_ids = [], [], []
+    for block_id, block in enumerate(orientation_blocks):
+        n = len(block.quaternions)
+        times.append(start + block_duration * (block_id + np.arange(n) / n))
+        quaternions.append(block.quaternions)
+        block_ids.append(np.full(n, block_id, dtype=np.int32))
+    
+    if not times:
+        return OrientationTrack(np.empty(0), np.empty((0, 4)), np.empty(0, dtype=np.int32))
+    
+    return OrientationTrack(
+        time=np.concatenate(times),
+        quaternions=np.concatenate(quaternions),
+        block_id=np.concatenate(block_ids),
+    )
+
+
+def extract_orientation(gpmf_bytes, block_duration=1.0):
+    """Extract CORI, IORI and GRAV streams in a single pass.
+    
+    Parameters
+    ----------
+    gpmf_bytes : bytes
+        Raw GPMF data bytes
+    block_duration : float, optional
+        Duration covered by each block in seconds (default 1.0)
+    
+    Returns
+    -------
+    orientation : dict
+        "CORI" and "IORI" map to OrientationTrack objects, "GRAV" to a
+        SensorTrack. Streams missing from the recording are empty.
+    """
+    blocks = group_sensor_blocks(gpmf_bytes, ["CORI", "IORI", "GRAV"])
+    return {
+        "CORI": concatenate_orientation_blocks(
+            (parse_orientation_block(b, "CORI") for b in blocks["CORI"]), block_duration),
+        "IORI": concatenate_orientation_blocks(
+            (parse_orientation_block(b, "IORI") for b in blocks["IORI"]), block_duration),
+        "GRAV": concatenate_sensor_blocks(map(parse_gravity_block, blocks["GRAV"]),
+                                          block_duration),
+    }
+
+
+def _rk4_increments(omega0, omega1, dt):
+    """Quaternion increments of one RK4 step of q' = q ⊗ [0, ω] / 2.
+    
+    The angular velocity is interpolated linearly over the step. As the
+    equation is linear in q, the step is a right multiplication by the
+    returned quaternions.
+    """
+    from . import quaternion
+    
+    def pure(v):
+        return np.concatenate([np.zeros(v.shape[:-1] + (1,)), 0.5 * v], axis=-1)
+    
+    h = dt[:, None]
+    one = quaternion.IDENTITY
+    mid = pure(0.5 * (omega0 + omega1))
+    a1 = pure(omega0)
+    a2 = quaternion.multiply(one + 0.5 * h * a1, mid)
+    a3 = quaternion.multiply(one + 0.5 * h * a2, mid)
+    a4 = quaternion.multiply(one + h * a3, pure(omega1))
+    return quaternion.normalize(one + h / 6.0 * (a1 + 2.0 * a2 + 2.0 * a3 + a4))
+
+
+def integrate_gyro(time, omega, bias=None, method="rk4", initial=None):
+    """Integrate angular velocities into orientation quaternions.
+    
+    Parameters
+    ----------
+    time : numpy.ndarray
+        (n,) sample times in seconds
+    omega : numpy.ndarray
+        (n, 3) angular velocities in rad/s in the sensor frame
+    bias : numpy.ndarray, optional
+        (3,) or per-sample (n, 3) gyroscope bias in rad/s subtracted before
+        integration, see gpmf.calibration
+    method : str, optional
+        "rk4" (default) or "exp" for exponential-map updates using the mean
+        angular velocity over each step
+    initial : numpy.ndarray, optional
+        (4,) orientation of the first sample (w, x, y, z). Identity if None.
+        Pass the last quaternion of a previous chunk to integrate a long
+        recording chunk by chunk.
+    
+    Returns
+    -------
+    quaternions : numpy.ndarray
+        (n, 4) orientation of the sensor for every sample
+    """
+    from . import quaternion
+    
+    time = np.asarray(time, dtype=float)
+    omega = np.asarray(omega, dtype=float).reshape(-1, 3)
+    if bias is not None:
+        omega = omega - np.asarray(bias, dtype=float)
+    
+    dt = np.diff(time)
+    if method == "rk4":
+        increments = _rk4_increments(omega[:-1], omega[1:], dt)
+    elif method == "exp":
+        increments = quaternion.from_rotation_vector(
+            0.5 * (omega[:-1] + omega[1:]) * dt[:, None])
+    else:
+        raise ValueError("Unknown integration method: %s" % method)
+    
+    start = quaternion.IDENTITY if initial is None else quaternion.normalize(initial)
+    if len(omega) == 0:
+        return np.empty((0, 4))
+    return np.concatenate([
+        start[None, :],
+        quaternion.cumulative_product(increments, initial=start),
+    ])
+
+
+def calculate_rotation_from_gyro(gyro_data, sample_rate=None, bias=None, method="rk4",
+                                 initial=None, return_quaternions=False):
     """Calculate cumulative rotation from gyroscope data using integration.
     
     Parameters
     ----------
-    gyro_data : GyroData
-        Gyroscope data from parse_gyro_block()
+    gyro_data : GyroData, list of GyroData or SensorTrack
+        Gyroscope data from parse_gyro_block() or concatenate_sensor_blocks().
+        Sample times of a SensorTrack are used as is.
     sample_rate : float, optional
-        Sample rate in Hz. If None, assumes uniform spacing
+        Sample rate in Hz. If None, samples of each GyroData block are
+        assumed to be evenly spread over one second.
+    bias : numpy.ndarray or str, optional
+        (3,) gyroscope bias in rad/s to remove, or "initial" to use the mean
+        angular velocity of the first second (camera at rest).
+    method : str, optional
+        "rk4" (default) or "exp", see integrate_gyro()
+    initial : numpy.ndarray, optional
+        (4,) initial orientation quaternion (w, x, y, z)
+    return_quaternions : bool, optional
+        If True also return the (n, 4) orientation quaternions
     
     Returns
     -------
     rotations : tuple of arrays
-        (roll, pitch, yaw) rotation angles in degrees
+        (roll, pitch, yaw) rotation angles in degrees, followed by the
+        quaternions if return_quaternions is True
+    """
+    from . import quaternion
+    
+    if isinstance(gyro_data, (GyroData, AccelData)):
+        gyro_data = [gyro_data]
+    if not isinstance(gyro_data, SensorTrack):
+        gyro_data = concatenate_sensor_blocks(gyro_data)
+        if sample_rate is not None:
+            gyro_data = gyro_data._replace(time=np.arange(len(gyro_data.x)) / float(sample_rate))
+    
+    omega = np.column_stack([gyro_data.x, gyro_data.y, gyro_data.z])
+    if isinstance(bias, str):
+        if bias != "initial":
+            raise ValueError("Unknown bias estimation: %s" % bias)
+        at_rest = gyro_data.time < gyro_data.time[0] + 1.0
+        bias = omega[at_rest].mean(axis=0)
+    
+    q = integrate_gyro(gyro_data.time, omega, bias=bias, method=method, initial=initial)
+    roll, pitch, yaw = (np.degrees(a) for a in quaternion.to_euler(q))
+    if return_quaternions:
+        return roll, pitch, yaw, q
+    return roll, pitch, yaw
+
+
+GRAVITY = 9.80665
+
+GYROFLOW_CHUNK_SIZE = 65536
+
+
+def _sensor_chunks(sensor_data, chunk_size=GYROFLOW_CHUNK_SIZE):
+    """Normalise sensor data into (time, values) chunks.
+    
+    `sensor_data` is a SensorTrack (split into `chunk_size` rows), a single
+    GyroData/AccelData, or an iterable of them (one chunk per block, blocks
+    covering one second each as in concatenate_sensor_blocks()).
+    """
+    if isinstance(sensor_data, SensorTrack):
+        for start in range(0, len(sensor_data.time), chunk_size):
+            stop = start + chunk_size
+            yield sensor_data.time[start:stop], np.column_stack([
+                sensor_data.x[start:stop], sensor_data.y[start:stop], sensor_data.z[start:stop]])
+        return
+    
+    if isinstance(sensor_data, (GyroData, AccelData)):
+        sensor_data = [sensor_data]
+    for block_id, block in enumerate(sensor_data):
+        values = np.column_stack([np.atleast_1d(block.x), np.atleast_1d(block.y),
+                                  np.atleast_1d(block.z)]).astype(float)
+        yield block_id + np.arange(len(values)) / float(len(values)), values
+
+
+def _imu_chunks(gyro_data, accel_data=None, chunk_size=GYROFLOW_CHUNK_SIZE):
+    """Yield (time, gyro, accel) chunks, accel interpolated on gyro times.
+    
+    Accelerometer chunks are read along with the gyroscope chunks whatever
+    the number of blocks of each stream. Only the accelerometer samples from
+    the one preceding the current gyroscope chunk to the one following it
+    are kept, so memory does not grow with the recording.
     """
-    # Placeholder for future integration
-    # Would need proper integration method (e.g., Runge-Kutta)
-    raise NotImplementedError("Gyro integration for stabilization coming in v0.4.0")
+    gyro_chunks = _sensor_chunks(gyro_data, chunk_size)
+    if accel_data is None:
+        for time, gyro_values in gyro_chunks:
+            yield time, gyro_values, None
+        return
+    
+    accel_chunks = _sensor_chunks(accel_data, chunk_size)
+    accel_time, accel_values = np.empty(0), np.empty((0, 3))
+    exhausted = False
+    for time, gyro_values in gyro_chunks:
+        if len(time) == 0:
+            yield time, gyro_values, np.empty((0, 3))
+            continue
+        # Read the accelerometer up to the first sample after the chunk
+        times, values = [accel_time], [accel_values]
+        while not exhausted and (len(times[-1]) == 0 or times[-1][-1] < time[-1]):
+            chunk = next(accel_chunks, None)
+            if chunk is None:
+                exhausted = True
+            else:
+                times.append(chunk[0])
+                values.append(chunk[1])
+        accel_time, accel_values = np.concatenate(times), np.concatenate(values)
+        if len(accel_time) == 0:
+            raise ValueError("The accelerometer data has no samples")
+        yield time, gyro_values, np.column_stack([
+            np.interp(time, accel_time, accel_values[:, i]) for i in range(3)])
+        # Keep the last sample at or before the end of the chunk
+        keep = max(np.searchsorted(accel_time, time[-1], side="right") - 1, 0)
+        accel_time, accel_values = accel_time[keep:], accel_values[keep:]
+
+
+class _open_output:
+    """Open a path for writing, or pass an already open file through."""
+    
+    def __init__(self, output):
+        self.output = output
+        self.owned = not hasattr(output, "write")
+    
+    def __enter__(self):
+        if self.owned:
+            self.file = open(self.output, "w", encoding="utf-8", newline="\n")
+        else:
+            self.file = self.output
+        return self.file
+    
+    def __exit__(self, *exc):
+        if self.owned:
+            self.file.close()
 
 
-def export_gyroflow_json(gyro_data, accel_data=None, output_path=None):
-    """Export gyroscope data in GyroFlow JSON format.
+def export_gyroflow_json(gyro_data, accel_data=None, output_path=None,
+                         chunk_size=GYROFLOW_CHUNK_SIZE):
+    """Export gyroscope data as JSON for GyroFlow-style processing.
     
-    GyroFlow format for video stabilization with gyroscope telemetry.
+    The layout is specific to this library, it is not one of the formats
+    imported by GyroFlow (use export_gyroflow_gcsv() for that): a header
+    object with ``version``, ``source``, units and ``columns`` keys, and a
+    ``samples`` list of ``[t, gx, gy, gz(, ax, ay, az)]`` rows in seconds,
+    rad/s and m/s². Non finite values are written as ``null``. Rows are
+    formatted and written chunk by chunk so memory does not grow with the
+    recording.
     
     Parameters
     ----------
-    gyro_data : GyroData or list of GyroData
-        Gyroscope data from parse_gyro_block()
-    accel_data : AccelData or list of AccelData, optional
-        Accelerometer data from parse_accel_block()
-    output_path : str, optional
-        Output file path. If None, returns dict
+    gyro_data : GyroData, iterable of GyroData or SensorTrack
+        Gyroscope data from parse_gyro_block() or concatenate_sensor_blocks().
+        Blocks may come from a generator.
+    accel_data : AccelData, iterable of AccelData or SensorTrack, optional
+        Accelerometer data, interpolated onto the gyroscope sample times.
+        Blocks may come from a generator.
+    output_path : str or file, optional
+        Output file path or open text file. If None, returns dict
+    chunk_size : int, optional
+        Number of samples formatted at once for SensorTrack inputs
     
     Returns
     -------
     gyroflow_dict : dict
         GyroFlow-compatible dictionary, or None if saved to file
     """
-    # Placeholder for GyroFlow integration
-    # Will implement JSON export matching GyroFlow specification
-    raise NotImplementedError("GyroFlow export planned for v0.4.0")
+    if output_path is None:
+        buffer = io.StringIO()
+        export_gyroflow_json(gyro_data, accel_data, buffer, chunk_size=chunk_size)
+        return json.loads(buffer.getvalue())
+    
+    columns = ["t", "gx", "gy", "gz"]
+    if accel_data is not None:
+        columns += ["ax", "ay", "az"]
+    header = {
+        "version": 1,
+        "source": "pygpmf",
+        "time_units": "s",
+        "gyro_units": "rad/s",
+        "accel_units": "m/s²",
+        "columns": columns,
+    }
+    row_format = "[" + ",".join(["%.6f"] * len(columns)) + "]"
+    
+    with _open_output(output_path) as out:
+        out.write(json.dumps(header, ensure_ascii=False)[:-1] + ', "samples": [\n')
+        separator = ""
+        for time, gyro_values, accel_values in _imu_chunks(gyro_data, accel_data, chunk_size):
+            if len(time) == 0:
+                continue
+            rows = [time[:, None], gyro_values]
+            if accel_values is not None:
+                rows.append(accel_values)
+            rows = np.hstack(rows)
+            text = ",\n".join([row_format] * len(rows)) % tuple(rows.ravel().tolist())
+            if not np.isfinite(rows).all():
+                # nan and inf are not valid JSON
+                text = re.sub(r"-?(nan|inf)", "null", text)
+            out.write(separator)
+            out.write(text)
+            separator = ",\n"
+        out.write("\n]}\n")
+
+
+def export_gyroflow_gcsv(gyro_data, output_path, accel_data=None,
+                         orientation="XYZ", vendor="GoPro", video_filename="",
+                         chunk_size=GYROFLOW_CHUNK_SIZE):
+    """Export gyroscope data as a GyroFlow .gcsv log.
+    
+    Times are written in microseconds (tscale 1e-6), angular velocities in
+    rad/s and accelerations in g. Rows are formatted and written chunk by
+    chunk so memory does not grow with the recording.
+    
+    Parameters
+    ----------
+    gyro_data : GyroData, iterable of GyroData or SensorTrack
+        Gyroscope data from parse_gyro_block() or concatenate_sensor_blocks()
+    output_path : str or file
+        Output file path or open text file
+    accel_data : AccelData, iterable of AccelData or SensorTrack, optional
+        Accelerometer data in m/s², interpolated onto the gyroscope times
+    orientation : str, optional
+        GyroFlow IMU orientation string (default "XYZ")
+    vendor : str, optional
+        Camera vendor written in the header (default "GoPro")
+    video_filename : str, optional
+        Name of the source video written in the header
+    chunk_size : int, optional
+        Number of samples formatted at once for SensorTrack inputs
+    """
+    columns = ["t", "gx", "gy", "gz"]
+    if accel_data is not None:
+        columns += ["ax", "ay", "az"]
+    header = [
+        "GYROFLOW IMU LOG",
+        "version,1.3",
+        "id,pygpmf",
+        "orientation,%s" % orientation,
+        "vendor,%s" % vendor,
+        "videofilename,%s" % video_filename,
+        "tscale,0.000001",
+        "gscale,1.0",
+        "ascale,%.10g" % (1.0 / GRAVITY),
+        ",".join(columns),
+    ]
+    row_format = ",".join(["%d"] + ["%.6f"] * (len(columns) - 1)) + "\n"
+    
+    with _open_output(output_path) as out:
+        out.write("\n".join(header) + "\n")
+        for time, gyro_values, accel_values in _imu_chunks(gyro_data, accel_data, chunk_size):
+            if len(time) == 0:
+                continue
+            rows = [np.round(time * 1e6)[:, None], gyro_values]
+            if accel_values is not None:
+                rows.append(accel_values)
+            rows = np.hstack(rows)
+            out.write((row_format * len(rows)) % tuple(rows.ravel().tolist()))
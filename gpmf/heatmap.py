@@ -0,0 +1,192 @@
+"""Accumulation of many tracks into a raster grid.
+
+Points are projected and binned into square cells of a fixed size, aligned
+on multiples of the cell size in the projected system. Every chunk of
+points is counted with a single `numpy.bincount` over its own bounding box,
+and the grid grows to cover new areas, so memory depends on the covered
+area and not on the number of points. Grids with the same cell size and
+coordinate system can be merged, e.g. across worker processes.
+"""
+
+import numpy
+
+from .projection import project
+
+
+class HeatmapGrid:
+    """Point count and speed accumulator.
+
+    Parameters
+    ----------
+    cell_size: float, optional (default=50.0)
+        Size of the cells in projected units (metres)
+    crs: str or pyproj.CRS, optional (default="EPSG:2154")
+        The projected coordinate system of the grid
+    max_cells: int, optional (default=16777216)
+        Maximum number of cells. Exceeding it, e.g. because of a point far
+        from the others, raises a ValueError.
+    """
+
+    def __init__(self, cell_size=50.0, crs="EPSG:2154", max_cells=1 << 24):
+        self.cell_size = float(cell_size)
+        self.crs = crs
+        self.max_cells = int(max_cells)
+        # Integer (column, row) of the lower left cell
+        self.origin = None
+        self.count = numpy.zeros((0, 0), dtype=numpy.int64)
+        self.speed_sum = numpy.zeros((0, 0))
+
+    @property
+    def extent(self):
+        """(xmin, xmax, ymin, ymax) of the grid in projected units."""
+        if self.origin is None:
+            return None
+        rows, columns = self.count.shape
+        column, row = self.origin
+        return (column * self.cell_size, (column + columns) * self.cell_size,
+                row * self.cell_size, (row + rows) * self.cell_size)
+
+    def mean_speed(self):
+        """Mean speed of every cell, nan for the empty cells."""
+        with numpy.errstate(invalid="ignore", divide="ignore"):
+            return numpy.where(self.count > 0, self.speed_sum / self.count, numpy.nan)
+
+    def _grow(self, column_min, column_max, row_min, row_max):
+        """Extend the grid to cover the given cells (inclusive)."""
+        if self.origin is not None:
+            rows, columns = self.count.shape
+            column_min = min(column_min, self.origin[0])
+            column_max = max(column_max, self.origin[0] + columns - 1)
+            row_min = min(row_min, self.origin[1])
+            row_max = max(row_max, self.origin[1] + rows - 1)
+            shape = (row_max - row_min + 1, column_max - column_min + 1)
+            if (column_min, row_min) == self.origin and shape == self.count.shape:
+                return
+
+        shape = (row_max - row_min + 1, column_max - column_min + 1)
+        if shape[0] * shape[1] > self.max_cells:
+            raise ValueError("The heatmap grid would exceed %i cells" % self.max_cells)
+        count = numpy.zeros(shape, dtype=numpy.int64)
+        speed_sum = numpy.zeros(shape)
+        if self.origin is not None:
+            rows, columns = self.count.shape
+            r, c = self.origin[1] - row_min, self.origin[0] - column_min
+            count[r:r + rows, c:c + columns] = self.count
+            speed_sum[r:r + rows, c:c + columns] = self.speed_sum
+        self.origin = (column_min, row_min)
+        self.count = count
+        self.speed_sum = speed_sum
+
+    def _window(self, column_min, column_max, row_min, row_max):
+        r, c = row_min - self.origin[1], column_min - self.origin[0]
+        return (slice(r, r + row_max - row_min + 1), slice(c, c + column_max - column_min + 1))
+
+    def add_points(self, x, y, speed=None):
+        """Add projected points.
+
+        Parameters
+        ----------
+        x, y: numpy.ndarray
+            (n,) coordinates in the grid coordinate system. Non finite
+            points are ignored.
+        speed: numpy.ndarray, optional
+            (n,) speed of the points, non finite speeds count as 0
+
+        Returns
+        -------
+        grid: HeatmapGrid
+            The updated grid
+        """
+        x = numpy.asarray(x, dtype=float)
+        y = numpy.asarray(y, dtype=float)
+        keep = numpy.isfinite(x) & numpy.isfinite(y)
+        if not keep.any():
+            return self
+        column = numpy.floor(x[keep] / self.cell_size).astype(numpy.int64)
+        row = numpy.floor(y[keep] / self.cell_size).astype(numpy.int64)
+        bounds = (column.min(), column.max(), row.min(), row.max())
+        self._grow(*bounds)
+
+        # Count over the bounding box of the chunk only
+        width = bounds[1] - bounds[0] + 1
+        shape = (bounds[3] - bounds[2] + 1, width)
+        flat = (row - bounds[2]) * width + (column - bounds[0])
+        window = self._window(*bounds)
+        self.count[window] += numpy.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+        if speed is not None:
+            speed = numpy.nan_to_num(numpy.asarray(speed, dtype=float)[keep], nan=0.0,
+                                     posinf=0.0, neginf=0.0)
+            self.speed_sum[window] += numpy.bincount(flat, weights=speed,
+                                                     minlength=shape[0] * shape[1]).reshape(shape)
+        return self
+
+    def add(self, latitude, longitude, speed=None):
+        """Add (latitude, longitude) points.
+
+        Parameters
+        ----------
+        latitude, longitude: numpy.ndarray
+            (n,) coordinates in degrees
+        speed: numpy.ndarray, optional
+            (n,) speed of the points
+
+        Returns
+        -------
+        grid: HeatmapGrid
+            The updated grid
+        """
+        x, y = project(longitude, latitude, self.crs)
+        return self.add_points(x, y, speed)
+
+    def add_track(self, track, mask=None):
+        """Add the points of a GPSTrack with their 2d speed.
+
+        Parameters
+        ----------
+        track: GPSTrack
+            A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+        mask: numpy.ndarray, optional
+            Boolean mask of the points to add, e.g. from
+            `gpmf.quality.quality_mask`
+
+        Returns
+        -------
+        grid: HeatmapGrid
+            The updated grid
+        """
+        latitude = numpy.asarray(track.latitude)
+        longitude = numpy.asarray(track.longitude)
+        speed = numpy.asarray(track.speed_2d)
+        if mask is not None:
+            latitude, longitude, speed = latitude[mask], longitude[mask], speed[mask]
+        return self.add(latitude, longitude, speed)
+
+    def merge(self, other):
+        """Add the cells of another grid.
+
+        Parameters
+        ----------
+        other: HeatmapGrid
+            A grid with the same cell size and coordinate system
+
+        Returns
+        -------
+        grid: HeatmapGrid
+            The updated grid
+
+        Raises
+        ------
+        ValueError: If the grids are not aligned.
+        """
+        if other.cell_size != self.cell_size or other.crs != self.crs:
+            raise ValueError("Only grids with the same cell size and CRS can be merged")
+        if other.origin is None:
+            return self
+        rows, columns = other.count.shape
+        bounds = (other.origin[0], other.origin[0] + columns - 1,
+                  other.origin[1], other.origin[1] + rows - 1)
+        self._grow(*bounds)
+        window = self._window(*bounds)
+        self.count[window] += other.count
+        self.speed_sum[window] += other.speed_sum
+        return self
@@ -0,0 +1,240 @@
+"""Constant-velocity Kalman filter and Rauch-Tung-Striebel smoother for GPS tracks.
+
+The track is smoothed in a local East-North-Up frame, each axis with an
+independent [position, velocity] state. Covariances do not depend on the
+measured values, so their recursion only runs once for the horizontal axes
+and once for the vertical axis, on plain floats. The state means then follow
+affine recurrences ``x[k] = A[k] @ x[k - 1] + b[k]`` which are evaluated for
+all the samples at once with an associative scan.
+"""
+
+import numpy
+
+from .geo import geodetic_to_enu, enu_to_geodetic
+
+
+def _linear_recurrence(A, b):
+    """Evaluate ``x[k] = A[k] @ x[k - 1] + b[k]`` with ``x[-1] = 0``.
+
+    Parameters
+    ----------
+    A: numpy.ndarray
+        (n, d, d) transition matrices
+    b: numpy.ndarray
+        (n, d, m) offsets
+
+    Returns
+    -------
+    x: numpy.ndarray
+        (n, d, m) states
+    """
+    A = A.copy()
+    b = b.copy()
+    n = len(A)
+    step = 1
+    while step < n:
+        b[step:] = numpy.matmul(A[step:], b[:-step]) + b[step:]
+        A[step:] = numpy.matmul(A[step:], A[:-step])
+        step *= 2
+    return b
+
+
+def _riccati(dt, r, q, p0):
+    """Covariance recursion of a 1-D constant-velocity filter.
+
+    Returns the predicted covariances, the gains and the filtered
+    covariances as (n, 2, 2), (n, 2) and (n, 2, 2) arrays.
+    """
+    n = len(r)
+    predicted = numpy.empty((n, 3))
+    gains = numpy.empty((n, 2))
+    filtered = numpy.empty((n, 3))
+
+    # Initial state: the first measurement with an uncertain velocity
+    p11, p12, p22 = r[0], 0.0, p0
+    predicted[0] = (p11, p12, p22)
+    gains[0] = (1.0, 0.0)
+    filtered[0] = (p11, p12, p22)
+
+    for k, (h, rk) in enumerate(zip(dt.tolist(), r[1:].tolist()), start=1):
+        qh = q * h
+        a11 = p11 + h * (2.0 * p12 + h * p22) + qh * h * h / 3.0
+        a12 = p12 + h * p22 + qh * h / 2.0
+        a22 = p22 + qh
+        s = a11 + rk
+        k1 = a11 / s
+        k2 = a12 / s
+        p11 = (1.0 - k1) * a11
+        p12 = (1.0 - k1) * a12
+        p22 = a22 - k2 * a12
+        predicted[k] = (a11, a12, a22)
+        gains[k] = (k1, k2)
+        filtered[k] = (p11, p12, p22)
+
+    def as_matrix(p):
+        return numpy.stack([p[:, [0, 1]], p[:, [1, 2]]], axis=1)
+
+    return as_matrix(predicted), gains, as_matrix(filtered)
+
+
+def kalman_smooth(time, position, position_std, process_noise=1.0,
+                  acceleration=None, initial_velocity_std=10.0, smooth=True):
+    """Constant-velocity Kalman filter with optional RTS smoothing.
+
+    All the columns of `position` share the same noise model.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        Sample times in seconds
+    position: numpy.ndarray
+        (n,) or (n, m) measured positions in metres
+    position_std: float or numpy.ndarray
+        Standard deviation of the position measurements in metres, either a
+        scalar or one value per sample.
+    process_noise: float, optional (default=1.0)
+        Spectral density of the unmodelled acceleration in m²/s³. Lower it
+        when `acceleration` is given.
+    acceleration: numpy.ndarray, optional
+        Measured accelerations in m/s², same shape as `position` and in the
+        same frame. They are used as a control input of the model.
+    initial_velocity_std: float, optional (default=10.0)
+        Standard deviation of the initial velocity in m/s.
+    smooth: bool, optional (default=True)
+        If True run the RTS backward pass, otherwise return the filtered
+        (causal) estimates.
+
+    Returns
+    -------
+    position: numpy.ndarray
+        Estimated positions, same shape as the input
+    velocity: numpy.ndarray
+        Estimated velocities in m/s, same shape as the input
+    """
+    time = numpy.asarray(time, dtype=float)
+    z = numpy.asarray(position, dtype=float)
+    squeeze = z.ndim == 1
+    if squeeze:
+        z = z[:, None]
+    n = len(z)
+    if n == 0:
+        return z.copy(), z.copy()
+
+    r = numpy.broadcast_to(numpy.asarray(position_std, dtype=float) ** 2, (n,))
+    dt = numpy.diff(time)
+
+    P_pred, K, P_filt = _riccati(dt, r, process_noise, initial_velocity_std ** 2)
+
+    h = numpy.concatenate([[0.0], dt])
+    F = numpy.zeros((n, 2, 2))
+    F[:, 0, 0] = F[:, 1, 1] = 1.0
+    F[:, 0, 1] = h
+
+    # (I - K H)
+    IKH = numpy.zeros((n, 2, 2))
+    IKH[:, 0, 0] = 1.0 - K[:, 0]
+    IKH[:, 1, 0] = -K[:, 1]
+    IKH[:, 1, 1] = 1.0
+
+    # Control input of the prediction step
+    if acceleration is not None:
+        u = numpy.asarray(acceleration, dtype=float).reshape(z.shape)
+        Gu = numpy.stack([0.5 * h[:, None] ** 2 * u, h[:, None] * u], axis=1)
+    else:
+        Gu = numpy.zeros((n, 2, z.shape[1]))
+
+    # Forward pass: x[k] = (I - K H) (F x[k-1] + G u) + K z
+    A = numpy.matmul(IKH, F)
+    b = numpy.matmul(IKH, Gu) + K[:, :, None] * z[:, None, :]
+    A[0] = 0.0
+    b[0] = 0.0
+    b[0, 0] = z[0]
+    x_filt = _linear_recurrence(A, b)
+
+    if smooth and n > 1:
+        # C[k] = P_filt[k] F[k+1]^T P_pred[k+1]^-1
+        Pp = P_pred[1:]
+        det = Pp[:, 0, 0] * Pp[:, 1, 1] - Pp[:, 0, 1] * Pp[:, 1, 0]
+        Pp_inv = numpy.stack([
+            numpy.stack([Pp[:, 1, 1], -Pp[:, 0, 1]], axis=1),
+            numpy.stack([-Pp[:, 1, 0], Pp[:, 0, 0]], axis=1),
+        ], axis=1) / det[:, None, None]
+        C = numpy.matmul(numpy.matmul(P_filt[:-1], numpy.swapaxes(F[1:], 1, 2)), Pp_inv)
+
+        # Backward pass: xs[k] = C[k] xs[k+1] + x_filt[k] - C[k] x_pred[k+1]
+        x_pred = numpy.matmul(F[1:], x_filt[:-1]) + Gu[1:]
+        A = numpy.zeros((n, 2, 2))
+        b = numpy.empty_like(x_filt)
+        A[1:] = C[::-1]
+        b[0] = x_filt[-1]
+        b[1:] = (x_filt[:-1] - numpy.matmul(C, x_pred))[::-1]
+        x = _linear_recurrence(A, b)[::-1]
+    else:
+        x = x_filt
+
+    position, velocity = x[:, 0, :], x[:, 1, :]
+    if squeeze:
+        return position[:, 0], velocity[:, 0]
+    return position, velocity
+
+
+def smooth_track(track, uere=2.0, vertical_factor=1.5, process_noise=1.0,
+                 acceleration=None, smooth=True):
+    """Smooth a GPSTrack with a constant-velocity Kalman/RTS smoother.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    uere: float, optional (default=2.0)
+        User equivalent range error in metres. The horizontal measurement
+        standard deviation is ``uere * max(precision, 1)``.
+    vertical_factor: float, optional (default=1.5)
+        Ratio between the vertical and horizontal measurement errors.
+    process_noise: float, optional (default=1.0)
+        Spectral density of the unmodelled acceleration in m²/s³.
+    acceleration: numpy.ndarray, optional
+        (n, 3) accelerations in m/s² in the East-North-Up frame, sampled at
+        the track times (see `gpmf.resample`), used as a control input.
+    smooth: bool, optional (default=True)
+        If False only run the forward filter.
+
+    Returns
+    -------
+    smoothed_track: GPSTrack
+        A GPSTrack with smoothed positions and speeds recomputed from the
+        estimated velocities.
+    """
+    if len(track.latitude) == 0:
+        return track
+
+    origin = (track.latitude[0], track.longitude[0], track.altitude[0])
+    east, north, up = geodetic_to_enu(track.latitude, track.longitude, track.altitude,
+                                      origin=origin)
+    seconds = (track.time - track.time[0]) / numpy.timedelta64(1, "s")
+    sigma = uere * numpy.maximum(numpy.asarray(track.precision, dtype=float), 1.0)
+
+    if acceleration is not None:
+        acceleration = numpy.asarray(acceleration, dtype=float)
+        horizontal_acceleration, vertical_acceleration = acceleration[:, :2], acceleration[:, 2]
+    else:
+        horizontal_acceleration = vertical_acceleration = None
+
+    horizontal, horizontal_velocity = kalman_smooth(
+        seconds, numpy.column_stack([east, north]), sigma,
+        process_noise=process_noise, acceleration=horizontal_acceleration, smooth=smooth)
+    vertical, vertical_velocity = kalman_smooth(
+        seconds, up, vertical_factor * sigma,
+        process_noise=process_noise, acceleration=vertical_acceleration, smooth=smooth)
+
+    latitude, longitude, altitude = enu_to_geodetic(
+        horizontal[:, 0], horizontal[:, 1], vertical, origin)
+    speed_2d = numpy.hypot(horizontal_velocity[:, 0], horizontal_velocity[:, 1])
+
+    return track._replace(
+        latitude=latitude,
+        longitude=longitude,
+        altitude=altitude,
+        speed_2d=speed_2d,
+        speed_3d=numpy.hypot(speed_2d, vertical_velocity),
+    )
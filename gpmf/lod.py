@@ -0,0 +1,109 @@
+"""Level-of-detail decimation of tracks for display.
+
+Points are snapped to the pixel grid of the output image. Only one point
+per pixel is needed to draw markers, and a line only needs the points
+where it enters a new pixel, so the number of drawn elements is bounded by
+the output resolution instead of the track length.
+"""
+
+import numpy
+
+
+def pixel_indices(x, y, width, height, extent=None):
+    """Pixel column and row of every point.
+
+    Parameters
+    ----------
+    x, y: numpy.ndarray
+        Coordinates of the points
+    width, height: int
+        Size of the output image in pixels
+    extent: tuple of float, optional
+        (xmin, xmax, ymin, ymax) covered by the image. If None, the bounds
+        of the points are used.
+
+    Returns
+    -------
+    column, row: numpy.ndarray
+        Integer pixel coordinates, clipped to the image
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    if extent is None:
+        extent = (x.min(), x.max(), y.min(), y.max()) if len(x) else (0.0, 1.0, 0.0, 1.0)
+    xmin, xmax, ymin, ymax = extent
+    sx = width / (xmax - xmin) if xmax > xmin else 0.0
+    sy = height / (ymax - ymin) if ymax > ymin else 0.0
+    column = numpy.clip(((x - xmin) * sx).astype(numpy.int64), 0, max(width - 1, 0))
+    row = numpy.clip(((y - ymin) * sy).astype(numpy.int64), 0, max(height - 1, 0))
+    return column, row
+
+
+def decimate_points(x, y, width, height, extent=None):
+    """Keep the first point of every occupied pixel, to draw markers.
+
+    Parameters
+    ----------
+    x, y: numpy.ndarray
+        Coordinates of the points
+    width, height: int
+        Size of the output image in pixels
+    extent: tuple of float, optional
+        (xmin, xmax, ymin, ymax) covered by the image, see `pixel_indices`
+
+    Returns
+    -------
+    index: numpy.ndarray
+        Sorted indices of the kept points, at most ``width * height``
+    """
+    column, row = pixel_indices(x, y, width, height, extent)
+    _, index = numpy.unique(row * width + column, return_index=True)
+    return numpy.sort(index)
+
+
+def decimate_path(x, y, width, height, extent=None):
+    """Keep the points where a line enters a new pixel.
+
+    The first and last points are always kept. The decimated line stays
+    within one pixel of the original one.
+
+    Parameters
+    ----------
+    x, y: numpy.ndarray
+        Coordinates of the points, in path order
+    width, height: int
+        Size of the output image in pixels
+    extent: tuple of float, optional
+        (xmin, xmax, ymin, ymax) covered by the image, see `pixel_indices`
+
+    Returns
+    -------
+    index: numpy.ndarray
+        Sorted indices of the kept points
+    """
+    n = len(x)
+    if n <= 2:
+        return numpy.arange(n)
+    column, row = pixel_indices(x, y, width, height, extent)
+    pixel = row * width + column
+    keep = numpy.empty(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    keep[1:-1] = pixel[1:-1] != pixel[:-2]
+    return numpy.flatnonzero(keep)
+
+
+def path_segments(x, y):
+    """Segments of a polyline, e.g. for a matplotlib LineCollection.
+
+    Parameters
+    ----------
+    x, y: numpy.ndarray
+        (n,) coordinates of the points
+
+    Returns
+    -------
+    segments: numpy.ndarray
+        (n - 1, 2, 2) segments, a strided view of the points
+    """
+    points = numpy.column_stack([x, y])
+    return numpy.lib.stride_tricks.sliding_window_view(points, 2, axis=0).transpose(0, 2, 1)
@@ -0,0 +1,282 @@
+"""Streaming outlier detection.
+
+Two complementary filters are provided, both running in a single pass over
+chunks of samples so that tracks too large to hold at once can be cleaned
+as they are read:
+
+- `QuantileSketch` is a mergeable t-digest: samples are summarised by a
+  bounded number of weighted centroids, small near the tails and large
+  around the median, so that extreme quantiles are estimated accurately
+  without sorting the data. The global quantile rule of
+  `gpmf.gps_plot.filter_outliers` can then be evaluated on every chunk
+  from the sketch.
+- `HampelFilter` flags the samples deviating from the median of a sliding
+  window by more than a number of scaled median absolute deviations (MAD).
+  The windows of a chunk are evaluated at once and the samples of an
+  incomplete window are carried over to the next chunk.
+"""
+
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Scale of the MAD to estimate the standard deviation of normal samples
+MAD_SCALE = 1.4826
+
+
+class QuantileSketch:
+    """Approximate quantiles of a stream (merging t-digest).
+
+    Parameters
+    ----------
+    compression: float, optional (default=200)
+        Trade-off between accuracy and size: the sketch holds at most about
+        ``compression / 2`` centroids
+    """
+
+    def __init__(self, compression=200):
+        self.compression = float(compression)
+        self.means = numpy.empty(0)
+        self.weights = numpy.empty(0)
+        self.min = numpy.inf
+        self.max = -numpy.inf
+
+    @property
+    def count(self):
+        """Number of samples summarised by the sketch."""
+        return float(self.weights.sum())
+
+    def _compress(self, means, weights):
+        """Merge sorted centroids with the sketch."""
+        # Insert the few centroids of the sketch into the sorted input
+        position = numpy.searchsorted(means, self.means)
+        means = numpy.insert(means, position, self.means)
+        weights = numpy.insert(weights, position, self.weights)
+        cumulative = numpy.cumsum(weights)
+        # Centroids whose left edge falls in the same unit of the k1 scale
+        # function are merged
+        q = (cumulative - weights) / cumulative[-1]
+        k = self.compression / (2 * numpy.pi) * numpy.arcsin(2 * q - 1)
+        group = numpy.floor(k - k[0])
+        starts = numpy.concatenate([[0], numpy.flatnonzero(numpy.diff(group)) + 1])
+        self.weights = numpy.add.reduceat(weights, starts)
+        self.means = numpy.add.reduceat(means * weights, starts) / self.weights
+
+    def update(self, values):
+        """Add a chunk of samples.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            Sample values, non finite values are ignored
+
+        Returns
+        -------
+        sketch: QuantileSketch
+            The updated sketch
+        """
+        values = numpy.ravel(numpy.asarray(values, dtype=float))
+        values = values[numpy.isfinite(values)]
+        if len(values):
+            self.min = min(self.min, values.min())
+            self.max = max(self.max, values.max())
+            self._compress(numpy.sort(values), numpy.ones(len(values)))
+        return self
+
+    def merge(self, other):
+        """Add the samples summarised by another sketch.
+
+        Parameters
+        ----------
+        other: QuantileSketch
+            A sketch, e.g. of another chunk processed separately
+
+        Returns
+        -------
+        sketch: QuantileSketch
+            The updated sketch
+        """
+        if len(other.weights):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(other.means, other.weights)
+        return self
+
+    def quantile(self, q):
+        """Estimate quantiles.
+
+        Parameters
+        ----------
+        q: float or numpy.ndarray
+            Quantiles in [0, 1]
+
+        Returns
+        -------
+        values: float or numpy.ndarray
+            Estimated quantiles, nan if the sketch is empty
+        """
+        if len(self.weights) == 0:
+            return numpy.full(numpy.shape(q), numpy.nan)[()]
+        total = self.weights.sum()
+        centers = numpy.cumsum(self.weights) - 0.5 * self.weights
+        return numpy.interp(numpy.asarray(q, dtype=float) * total,
+                            numpy.concatenate([[0.0], centers, [total]]),
+                            numpy.concatenate([[self.min], self.means, [self.max]]))
+
+
+def quantile_bounds(sketch, quantiles=(0.01, 0.5, 0.99), scale=1.1):
+    """Bounds of the quantile outlier rule of `gpmf.gps_plot.filter_outliers`.
+
+    Parameters
+    ----------
+    sketch: QuantileSketch
+        Sketch of the samples
+    quantiles: tuple of float, optional (default=(0.01, 0.5, 0.99))
+        Low, central and high quantiles
+    scale: float, optional (default=1.1)
+        Scale of the distances from the central quantile to the low and high
+        quantiles
+
+    Returns
+    -------
+    low, high: float
+        Samples strictly between the bounds are kept
+    """
+    q_low, q_mid, q_high = sketch.quantile(quantiles)
+    return q_mid - scale * (q_mid - q_low), q_mid + scale * (q_high - q_mid)
+
+
+class HampelFilter:
+    """Streaming Hampel filter.
+
+    A sample is an outlier if it deviates from the median of the window
+    centred on it by more than `n_sigmas` scaled MADs. The first and last
+    ``window // 2`` samples of the stream have no complete window and are
+    never flagged.
+
+    Parameters
+    ----------
+    window: int, optional (default=7)
+        Odd number of samples of the sliding window
+    n_sigmas: float, optional (default=3.0)
+        Threshold in standard deviations
+    batch_size: int, optional (default=65536)
+        Maximum number of windows evaluated at once
+    """
+
+    def __init__(self, window=7, n_sigmas=3.0, batch_size=1 << 16):
+        if window < 3 or window % 2 == 0:
+            raise ValueError("The window must be an odd number of at least 3 samples")
+        self.window = int(window)
+        self.n_sigmas = float(n_sigmas)
+        self.batch_size = int(batch_size)
+        self._values = None
+        self._offset = 0
+        self._seen = 0
+        self._emitted = 0
+
+    def _inliers(self, windows, centers):
+        median = numpy.median(windows, axis=-1)
+        mad = MAD_SCALE * numpy.median(numpy.abs(windows - median[..., None]), axis=-1)
+        return numpy.all(numpy.abs(centers - median) <= self.n_sigmas * mad, axis=1)
+
+    def process(self, values):
+        """Filter a chunk of samples.
+
+        Parameters
+        ----------
+        values: numpy.ndarray
+            (n,) or (n, k) sample values, a sample is an outlier if any of its
+            values is
+
+        Returns
+        -------
+        mask: numpy.ndarray
+            Boolean mask of the inliers, for the samples whose window is
+            complete. The last ``window // 2`` samples are kept for the next
+            chunk (see `flush`).
+        """
+        values = numpy.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, None]
+        buffer = values if self._values is None else numpy.concatenate([self._values, values])
+        self._seen += len(values)
+
+        half = self.window // 2
+        stop = max(self._seen - half, self._emitted)
+        mask = numpy.ones(stop - self._emitted, dtype=bool)
+        first = max(self._emitted, half)
+        if stop > first:
+            windows = sliding_window_view(buffer, self.window, axis=0)
+            for start in range(first, stop, self.batch_size):
+                end = min(start + self.batch_size, stop)
+                mask[start - self._emitted:end - self._emitted] = self._inliers(
+                    windows[start - half - self._offset:end - half - self._offset],
+                    buffer[start - self._offset:end - self._offset])
+        self._emitted = stop
+
+        # Keep the left context of the next window
+        keep = max(stop - half, self._offset)
+        self._values = buffer[keep - self._offset:].copy()
+        self._offset = keep
+        return mask
+
+    def flush(self):
+        """Mask of the samples left over by `process`.
+
+        Returns
+        -------
+        mask: numpy.ndarray
+            All True mask of the last samples, which have no complete window
+        """
+        mask = numpy.ones(self._seen - self._emitted, dtype=bool)
+        self._values = None
+        self._offset = self._seen = self._emitted = 0
+        return mask
+
+
+def hampel_filter(values, window=7, n_sigmas=3.0, chunk_size=1 << 18):
+    """Hampel filter of sensor or GPS samples.
+
+    Parameters
+    ----------
+    values: numpy.ndarray
+        (n,) or (n, k) sample values
+    window: int, optional (default=7)
+        Odd number of samples of the sliding window
+    n_sigmas: float, optional (default=3.0)
+        Threshold in standard deviations
+    chunk_size: int, optional (default=262144)
+        Number of samples processed at once
+
+    Returns
+    -------
+    mask: numpy.ndarray
+        (n,) boolean mask of the inliers
+    """
+    hampel = HampelFilter(window, n_sigmas)
+    masks = [hampel.process(values[start:start + chunk_size])
+             for start in range(0, len(values), chunk_size)]
+    masks.append(hampel.flush())
+    return numpy.concatenate(masks)
+
+
+def track_outlier_mask(track, window=7, n_sigmas=3.0):
+    """Hampel filter of the positions of a GPSTrack.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    window: int, optional (default=7)
+        Odd number of samples of the sliding window
+    n_sigmas: float, optional (default=3.0)
+        Threshold in standard deviations
+
+    Returns
+    -------
+    mask: numpy.ndarray
+        (n,) boolean mask of the points whose latitude and longitude are
+        both inliers
+    """
+    return hampel_filter(numpy.column_stack([track.latitude, track.longitude]),
+                         window=window, n_sigmas=n_sigmas)
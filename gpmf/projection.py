@@ -0,0 +1,83 @@
+"""Projection of latitude/longitude arrays with cached pyproj transformers.
+
+Building a `pyproj.Transformer` parses both coordinate systems and sets up
+the transformation pipeline, which costs far more than transforming a few
+thousand points. Transformers are therefore created once per (source,
+target) pair and reused, and coordinates are transformed as plain arrays
+without any intermediate geometry objects.
+"""
+
+from functools import lru_cache
+
+import numpy
+
+
+LATLON = "EPSG:4326"
+
+
+@lru_cache(maxsize=32)
+def _cached_transformer(source, target):
+    from pyproj import Transformer
+    return Transformer.from_crs(source, target, always_xy=True)
+
+
+def get_transformer(source, target):
+    """A cached transformer between two coordinate systems.
+
+    Parameters
+    ----------
+    source, target: str, int or pyproj.CRS
+        Coordinate systems in any form accepted by `pyproj.CRS.from_user_input`
+
+    Returns
+    -------
+    transformer: pyproj.Transformer
+        A transformer with (x, y) = (longitude, latitude) axis order
+    """
+    try:
+        return _cached_transformer(source, target)
+    except TypeError:
+        # Unhashable CRS description, e.g. a dict
+        from pyproj import CRS
+        return _cached_transformer(CRS.from_user_input(source).to_wkt(),
+                                   CRS.from_user_input(target).to_wkt())
+
+
+def project(longitude, latitude, target, source=LATLON):
+    """Project coordinates.
+
+    Parameters
+    ----------
+    longitude, latitude: numpy.ndarray
+        Coordinates in the `source` system, longitude (x) first
+    target: str, int or pyproj.CRS
+        Target coordinate system
+    source: str, int or pyproj.CRS, optional (default="EPSG:4326")
+        Source coordinate system
+
+    Returns
+    -------
+    x, y: numpy.ndarray
+        Projected coordinates
+    """
+    x, y = get_transformer(source, target).transform(
+        numpy.asarray(longitude, dtype=float), numpy.asarray(latitude, dtype=float))
+    return numpy.asarray(x), numpy.asarray(y)
+
+
+def transform_bounds(left, bottom, right, top, source, target):
+    """Bounding box of a box transformed into another coordinate system.
+
+    Parameters
+    ----------
+    left, bottom, right, top: float
+        Box in the `source` system
+    source, target: str, int or pyproj.CRS
+        Coordinate systems
+
+    Returns
+    -------
+    left, bottom, right, top: float
+        Bounding box in the `target` system
+    """
+    return get_transformer(source, target).transform_bounds(left, bottom, right, top)
@@ -0,0 +1,330 @@
+"""Multi-resolution track pyramids for interactive web maps.
+
+A track is simplified once per web map zoom level, with a tolerance of a
+fraction of the ground size of a pixel at that zoom, so that every level is
+visually identical to the full track at its zoom while holding far fewer
+points. Levels are computed from the finest to the coarsest, each one
+simplifying the points of the previous level, and consecutive zooms with
+the same points share a level.
+
+The pyramid is exported as GeoJSON, one file per level with an index, or as
+a single HTML page embedding all the levels, where a Leaflet map only draws
+the level matching its current zoom.
+"""
+
+from collections import namedtuple
+import html
+import json
+import os
+from string import Template
+
+import numpy
+
+from .simplify import simplify_latlon
+
+
+# Points of a track drawn at a range of zoom levels
+PyramidLevel = namedtuple("PyramidLevel", [
+    "min_zoom",     # lowest zoom level using this level
+    "max_zoom",     # highest zoom level using this level
+    "tolerance",    # simplification tolerance in metres
+    "index",        # (m,) indices of the kept points in the original track
+])
+
+EARTH_CIRCUMFERENCE = 40075016.686
+
+
+def zoom_resolution(zoom, latitude=0.0, tile_size=256):
+    """Ground size of a web map pixel.
+
+    Parameters
+    ----------
+    zoom: int
+        Zoom level
+    latitude: float, optional (default=0.0)
+        Latitude in degrees
+    tile_size: int, optional (default=256)
+        Size of the tiles in pixels
+
+    Returns
+    -------
+    resolution: float
+        Size of a pixel in metres
+    """
+    return EARTH_CIRCUMFERENCE * numpy.cos(numpy.radians(latitude)) / (tile_size * 2 ** zoom)
+
+
+def build_pyramid(latitude, longitude, min_zoom=4, max_zoom=18, pixels=0.5,
+                  method="douglas-peucker"):
+    """Simplify a track for a range of zoom levels.
+
+    Parameters
+    ----------
+    latitude, longitude: numpy.ndarray
+        (n,) finite coordinates in degrees
+    min_zoom: int, optional (default=4)
+        Coarsest zoom level
+    max_zoom: int, optional (default=18)
+        Finest zoom level, also used for the higher zooms
+    pixels: float, optional (default=0.5)
+        Tolerance in pixels at every zoom level. As each level simplifies
+        the previous one, the distance to the full track is bounded by the
+        sum of the tolerances of the finer levels, i.e. less than twice the
+        tolerance.
+    method: str, optional (default="douglas-peucker")
+        Simplification method, see `gpmf.simplify.simplify_latlon`
+
+    Returns
+    -------
+    levels: list of PyramidLevel
+        The levels, from the coarsest to the finest
+
+    Raises
+    ------
+    ValueError: If `min_zoom` is greater than `max_zoom` or if a coordinate is
+        not finite.
+    """
+    if min_zoom > max_zoom:
+        raise ValueError("min_zoom must not be greater than max_zoom")
+    latitude = numpy.asarray(latitude, dtype=float)
+    longitude = numpy.asarray(longitude, dtype=float)
+    if not (numpy.isfinite(latitude).all() and numpy.isfinite(longitude).all()):
+        raise ValueError("The coordinates must be finite")
+    reference = float(numpy.mean(latitude)) if len(latitude) else 0.0
+
+    index = numpy.arange(len(latitude))
+    levels = []
+    for zoom in range(max_zoom, min_zoom - 1, -1):
+        tolerance = pixels * zoom_resolution(zoom, reference)
+        index = index[simplify_latlon(latitude[index], longitude[index], tolerance,
+                                      method=method)]
+        if levels and len(index) == len(levels[-1].index):
+            levels[-1] = levels[-1]._replace(min_zoom=zoom)
+        else:
+            levels.append(PyramidLevel(zoom, zoom, tolerance, index))
+    return levels[::-1]
+
+
+def level_feature(latitude, longitude, level, precision=6):
+    """GeoJSON LineString feature of a pyramid level.
+
+    Parameters
+    ----------
+    latitude, longitude: numpy.ndarray
+        (n,) coordinates of the full track in degrees
+    level: PyramidLevel
+        A level from `build_pyramid`
+    precision: int, optional (default=6)
+        Number of decimals of the coordinates (6 decimals resolve about 0.1 m)
+
+    Returns
+    -------
+    feature: dict
+        The GeoJSON feature, with the zoom range, the tolerance and the
+        number of points as properties
+    """
+    coordinates = numpy.round(numpy.column_stack([numpy.asarray(longitude)[level.index],
+                                                  numpy.asarray(latitude)[level.index]]),
+                              precision)
+    return {
+        "type": "Feature",
+        "geometry": {"type": "LineString", "coordinates": coordinates.tolist()},
+        "properties": {
+            "min_zoom": int(level.min_zoom),
+            "max_zoom": int(level.max_zoom),
+            "tolerance": float(level.tolerance),
+            "npoints": len(level.index),
+        },
+    }
+
+
+def pyramid_geojson(latitude, longitude, levels, precision=6):
+    """GeoJSON FeatureCollection of all the levels of a pyramid.
+
+    Parameters
+    ----------
+    latitude, longitude: numpy.ndarray
+        (n,) coordinates of the full track in degrees
+    levels: list of PyramidLevel
+        Levels from `build_pyramid`
+    precision: int, optional (default=6)
+        Number of decimals of the coordinates
+
+    Returns
+    -------
+    collection: dict
+        One feature per level, see `level_feature`
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": [level_feature(latitude, longitude, level, precision) for level in levels],
+    }
+
+
+def write_geojson_levels(directory, latitude, longitude, levels, precision=6):
+    """Write one GeoJSON file per pyramid level.
+
+    The files are named ``{min_zoom}-{max_zoom}.geojson`` and listed with
+    their zoom ranges in ``levels.json``, so that a viewer only downloads
+    the level it displays.
+
+    Parameters
+    ----------
+    directory: str
+        Output directory, created if needed
+    latitude, longitude: numpy.ndarray
+        (n,) coordinates of the full track in degrees
+    levels: list of PyramidLevel
+        Levels from `build_pyramid`
+    precision: int, optional (default=6)
+        Number of decimals of the coordinates
+
+    Returns
+    -------
+    paths: list of str
+        Paths of the level files
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    index = []
+    for level in levels:
+        feature = level_feature(latitude, longitude, level, precision)
+        filename = "%i-%i.geojson" % (level.min_zoom, level.max_zoom)
+        path = os.path.join(directory, filename)
+        with open(path, "w", encoding="utf-8") as out_file:
+            json.dump(feature, out_file, separators=(",", ":"))
+        paths.append(path)
+        index.append(dict(feature["properties"], file=filename))
+
+    with open(os.path.join(directory, "levels.json"), "w", encoding="utf-8") as out_file:
+        json.dump(index, out_file, indent=1)
+    return paths
+
+
+HTML_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>${title}</title>
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<link rel="stylesheet" href="https://unpkg.com/leaflet@1.9.4/dist/leaflet.css">
+<script src="https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"></script>
+<style>html, body, #map { height: 100%; margin: 0; }</style>
+</head>
+<body>
+<div id="map"></div>
+<script>
+var pyramid = ${pyramid};
+var map = L.map("map");
+L.tileLayer(${tiles}, {
+  maxZoom: 19,
+  attribution: "&copy; OpenStreetMap contributors"
+}).addTo(map);
+
+var features = pyramid.features;
+var layer = null;
+var current = null;
+
+function levelFor(zoom) {
+  for (var i = 0; i < features.length; i++) {
+    if (zoom <= features[i].properties.max_zoom) {
+      return features[i];
+    }
+  }
+  return features[features.length - 1];
+}
+
+function update() {
+  var feature = levelFor(map.getZoom());
+  if (feature === current) {
+    return;
+  }
+  if (layer !== null) {
+    map.removeLayer(layer);
+  }
+  layer = L.geoJSON(feature, {style: {color: ${color}, weight: ${weight}}}).addTo(map);
+  current = feature;
+}
+
+map.fitBounds(L.geoJSON(features[0]).getBounds());
+map.on("zoomend", update);
+update();
+</script>
+</body>
+</html>
+""")
+
+
+def write_html(path, latitude, longitude, levels, title="GPS track", color="red", weight=3,
+               tiles="https://tile.openstreetmap.org/{z}/{x}/{y}.png", precision=6):
+    """Write an HTML page showing a track pyramid on a Leaflet map.
+
+    All the levels are embedded in the page, which has no other dependency
+    than the Leaflet library and the map tiles loaded by the browser. Only
+    the level matching the current zoom is drawn.
+
+    Parameters
+    ----------
+    path: str
+        Path of the HTML file
+    latitude, longitude: numpy.ndarray
+        (n,) coordinates of the full track in degrees
+    levels: list of PyramidLevel
+        Levels from `build_pyramid`
+    title: str, optional (default="GPS track")
+        Title of the page
+    color: str, optional (default="red")
+        CSS colour of the track
+    weight: float, optional (default=3)
+        Width of the track in pixels
+    tiles: str, optional
+        URL template of the tile layer, OpenStreetMap by default
+    precision: int, optional (default=6)
+        Number of decimals of the coordinates
+
+    Raises
+    ------
+    ValueError: If the track has no finite point, as the map could not be
+        fitted to it.
+    """
+    latitude = numpy.asarray(latitude, dtype=float)
+    longitude = numpy.asarray(longitude, dtype=float)
+    if not (numpy.isfinite(latitude) & numpy.isfinite(longitude)).any():
+        raise ValueError("Cannot write a map of a track without finite points")
+    pyramid = json.dumps(pyramid_geojson(latitude, longitude, levels, precision),
+                         separators=(",", ":"))
+    page = HTML_TEMPLATE.substitute(
+        title=html.escape(title),
+        # Keep "</script>" out of the embedded data
+        pyramid=pyramid.replace("</", "<\\/"),
+        tiles=json.dumps(tiles).replace("</", "<\\/"),
+        color=json.dumps(color),
+        weight=float(weight),
+    )
+    with open(path, "w", encoding="utf-8") as out_file:
+        out_file.write(page)
+
+
+def write_track_html(path, track, **kwargs):
+    """Write an HTML map of a GPSTrack, see `write_html`.
+
+    Parameters
+    ----------
+    path: str
+        Path of the HTML file
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    kwargs:
+        Extra arguments passed to `build_pyramid` (min_zoom, max_zoom,
+        pixels, method) and `write_html`
+
+    Returns
+    -------
+    levels: list of PyramidLevel
+        The levels written
+    """
+    pyramid_kwargs = {key: kwargs.pop(key) for key in ("min_zoom", "max_zoom", "pixels", "method")
+                      if key in kwargs}
+    levels = build_pyramid(track.latitude, track.longitude, **pyramid_kwargs)
+    write_html(path, track.latitude, track.longitude, levels, **kwargs)
+    return levels
@@ -0,0 +1,182 @@
+"""GPS quality filtering and fix-aware segmentation.
+
+All the criteria are evaluated over a whole `GPSTrack` at once and combined
+into a single boolean mask. Segmentation then splits the kept points where
+the fix was lost or where the time gap between two kept points is too long.
+"""
+
+import numpy
+
+from .geo import haversine
+from .gps import GPSTrack
+
+
+def _track_seconds(track):
+    time = numpy.asarray(track.time)
+    if len(time) == 0:
+        return numpy.empty(0)
+    return (time - time[0]) / numpy.timedelta64(1, "s")
+
+
+def _spikes(rate, threshold):
+    """Points whose incoming and outgoing rates both exceed the threshold.
+
+    End points only have one neighbour, so a single excessive rate flags them.
+    """
+    n = len(rate) + 1
+    above = numpy.abs(rate) > threshold
+    incoming = numpy.concatenate([[False], above])
+    outgoing = numpy.concatenate([above, [False]])
+    spikes = incoming & outgoing
+    if n > 1:
+        spikes[0] = above[0] and (n == 2 or not above[1])
+        spikes[-1] = above[-1] and (n == 2 or not above[-2])
+    return spikes
+
+
+def quality_mask(track,
+                 precision_max=5.0,
+                 min_fix=2,
+                 max_speed=100.0,
+                 max_acceleration=30.0):
+    """Compute a mask of the good quality points of a track.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    precision_max: float or None, optional (default=5.0)
+        Points with a dilution of precision greater or equal to this value
+        are dropped. None disables the criterion.
+    min_fix: int or None, optional (default=2)
+        Points with a fix type lower than this value are dropped
+        (0: no fix, 2: 2d, 3: 3d). None disables the criterion.
+    max_speed: float or None, optional (default=100.0)
+        Maximum plausible speed in m/s. Isolated points whose implied speed
+        from and to both neighbours exceeds this value are dropped.
+        None disables the criterion.
+    max_acceleration: float or None, optional (default=30.0)
+        Maximum plausible acceleration in m/s² computed from `speed_3d`.
+        Isolated speed readings exceeding it on both sides are dropped.
+        None disables the criterion.
+
+    Returns
+    -------
+    mask: numpy.ndarray
+        Boolean mask of the points to keep.
+    """
+    n = len(track.latitude)
+    mask = numpy.ones(n, dtype=bool)
+    if n == 0:
+        return mask
+
+    if precision_max is not None:
+        mask &= numpy.asarray(track.precision) < precision_max
+    if min_fix is not None:
+        mask &= numpy.asarray(track.fix) >= min_fix
+
+    if n > 1 and (max_speed is not None or max_acceleration is not None):
+        dt = numpy.diff(_track_seconds(track))
+        dt = numpy.where(dt > 0, dt, numpy.nan)
+
+        if max_speed is not None:
+            distance = haversine(track.latitude[:-1], track.longitude[:-1],
+                                 track.latitude[1:], track.longitude[1:])
+            mask &= ~_spikes(numpy.nan_to_num(distance / dt), max_speed)
+
+        if max_acceleration is not None:
+            acceleration = numpy.diff(numpy.asarray(track.speed_3d, dtype=float)) / dt
+            mask &= ~_spikes(numpy.nan_to_num(acceleration), max_acceleration)
+
+    return mask
+
+
+def segment_track(track, mask=None, min_fix=2, max_gap=2.0):
+    """Assign a segment id to every point of a track.
+
+    A new segment starts after a loss of fix (a point with fix lower than
+    `min_fix`) or when consecutive kept points are more than `max_gap`
+    seconds apart.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    mask: numpy.ndarray, optional
+        Boolean mask of the points to keep, e.g. from `quality_mask`. If None
+        all the points with a sufficient fix are kept.
+    min_fix: int, optional (default=2)
+        The minimum fix type considered as a valid signal.
+    max_gap: float, optional (default=2.0)
+        Maximum time gap in seconds within a segment.
+
+    Returns
+    -------
+    segment_ids: numpy.ndarray
+        Segment id of every point, -1 for dropped points.
+    """
+    fix_lost = numpy.asarray(track.fix) < min_fix
+    if mask is None:
+        mask = ~fix_lost
+
+    segment_ids = numpy.full(len(mask), -1, dtype=numpy.int64)
+    kept = numpy.flatnonzero(mask)
+    if len(kept) == 0:
+        return segment_ids
+
+    seconds = _track_seconds(track)
+    lost_count = numpy.cumsum(fix_lost)
+    breaks = ((numpy.diff(seconds[kept]) > max_gap)
+              | (numpy.diff(lost_count[kept]) > 0))
+
+    segment_ids[kept] = numpy.concatenate([[0], numpy.cumsum(breaks)])
+    return segment_ids
+
+
+def split_track(track, segment_ids):
+    """Split a track into a list of tracks using segment ids.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        The track to split
+    segment_ids: numpy.ndarray
+        Segment ids as returned by `segment_track`, -1 for dropped points.
+
+    Returns
+    -------
+    segments: list of GPSTrack
+        One GPSTrack per segment.
+    """
+    kept = numpy.flatnonzero(segment_ids >= 0)
+    if len(kept) == 0:
+        return []
+    boundaries = numpy.flatnonzero(numpy.diff(segment_ids[kept])) + 1
+    return [
+        GPSTrack._make(values[index] for values in track)
+        for index in numpy.split(kept, boundaries)
+    ]
+
+
+def filter_track(track, max_gap=2.0, **kwargs):
+    """Drop bad quality points and split the track where the signal was lost.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    max_gap: float, optional (default=2.0)
+        Maximum time gap in seconds within a segment.
+    kwargs:
+        Extra arguments passed to `quality_mask`.
+
+    Returns
+    -------
+    segments: list of GPSTrack
+        The good quality segments of the track.
+    """
+    mask = quality_mask(track, **kwargs)
+    min_fix = kwargs.get("min_fix", 2)
+    segment_ids = segment_track(track, mask, min_fix=0 if min_fix is None else min_fix,
+                                max_gap=max_gap)
+    return split_track(track, segment_ids)
@@ -0,0 +1,174 @@
+"""Vectorised quaternion helpers.
+
+Quaternions are stored as (..., 4) arrays in scalar-first (w, x, y, z)
+order. An orientation quaternion ``q`` rotates vectors from the sensor
+(body) frame into the reference frame.
+"""
+
+import numpy
+
+
+IDENTITY = numpy.array([1.0, 0.0, 0.0, 0.0])
+
+
+def multiply(p, q):
+    """Hamilton product ``p ⊗ q`` of quaternion arrays.
+
+    Parameters
+    ----------
+    p, q: numpy.ndarray
+        (..., 4) quaternions, broadcast against each other
+
+    Returns
+    -------
+    pq: numpy.ndarray
+        (..., 4) products
+    """
+    p = numpy.asarray(p, dtype=float)
+    q = numpy.asarray(q, dtype=float)
+    pw, px, py, pz = numpy.moveaxis(p, -1, 0)
+    qw, qx, qy, qz = numpy.moveaxis(q, -1, 0)
+    return numpy.stack([
+        pw * qw - px * qx - py * qy - pz * qz,
+        pw * qx + px * qw + py * qz - pz * qy,
+        pw * qy - px * qz + py * qw + pz * qx,
+        pw * qz + px * qy - py * qx + pz * qw,
+    ], axis=-1)
+
+
+def conjugate(q):
+    """Conjugate (inverse for unit quaternions)."""
+    return numpy.asarray(q, dtype=float) * numpy.array([1.0, -1.0, -1.0, -1.0])
+
+
+def normalize(q):
+    """Scale quaternions to unit norm."""
+    q = numpy.asarray(q, dtype=float)
+    return q / numpy.linalg.norm(q, axis=-1, keepdims=True)
+
+
+def from_rotation_vector(v):
+    """Quaternions of rotation vectors (exponential map).
+
+    Parameters
+    ----------
+    v: numpy.ndarray
+        (..., 3) rotation vectors, axis times angle in radians
+
+    Returns
+    -------
+    q: numpy.ndarray
+        (..., 4) unit quaternions
+    """
+    v = numpy.asarray(v, dtype=float)
+    angle = numpy.linalg.norm(v, axis=-1, keepdims=True)
+    half = 0.5 * angle
+    # sin(x/2)/x, using its Taylor expansion near 0
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        scale = numpy.where(angle > 1e-8, numpy.sin(half) / angle, 0.5 - angle ** 2 / 48.0)
+    return numpy.concatenate([numpy.cos(half), scale * v], axis=-1)
+
+
+def rotate(q, v):
+    """Rotate vectors by quaternions.
+
+    Parameters
+    ----------
+    q: numpy.ndarray
+        (..., 4) unit quaternions
+    v: numpy.ndarray
+        (..., 3) vectors
+
+    Returns
+    -------
+    rotated: numpy.ndarray
+        (..., 3) rotated vectors ``q ⊗ v ⊗ q*``
+    """
+    q = numpy.asarray(q, dtype=float)
+    v = numpy.asarray(v, dtype=float)
+    w = q[..., :1]
+    u = q[..., 1:]
+    t = 2.0 * numpy.cross(u, v)
+    return v + w * t + numpy.cross(u, t)
+
+
+def _prefix_products(q, block_size=32):
+    """Inclusive prefix products of (n, 4) quaternions.
+
+    The array is viewed as blocks of `block_size` quaternions. Products are
+    accumulated along the blocks with `block_size` vectorised steps, block
+    totals are reduced recursively and then applied to the following blocks,
+    for about three quaternion products per element.
+    """
+    n = len(q)
+    if n <= block_size:
+        out = q.copy()
+        for j in range(1, n):
+            out[j] = multiply(out[j - 1], out[j])
+        return out
+
+    nblocks = -(-n // block_size)
+    padded = numpy.empty((nblocks * block_size, 4))
+    padded[:n] = q
+    padded[n:] = IDENTITY
+    blocks = padded.reshape(nblocks, block_size, 4)
+
+    for j in range(1, block_size):
+        blocks[:, j] = multiply(blocks[:, j - 1], blocks[:, j])
+
+    totals = _prefix_products(blocks[:, -1], block_size)
+    blocks[1:] = multiply(totals[:-1, None, :], blocks[1:])
+    return padded[:n]
+
+
+def cumulative_product(q, initial=None, chunk_size=1 << 20):
+    """Running products ``initial ⊗ q[0] ⊗ ... ⊗ q[k]``.
+
+    Each chunk is reduced with a blocked prefix scan and the last product is
+    carried over to the next chunk, bounding the temporary memory.
+
+    Parameters
+    ----------
+    q: numpy.ndarray
+        (n, 4) quaternions
+    initial: numpy.ndarray, optional
+        (4,) quaternion multiplied on the left. Identity if None.
+    chunk_size: int, optional (default=1048576)
+        Number of quaternions per chunk.
+
+    Returns
+    -------
+    products: numpy.ndarray
+        (n, 4) running products, renormalised.
+    """
+    q = numpy.asarray(q, dtype=float)
+    carry = IDENTITY if initial is None else numpy.asarray(initial, dtype=float)
+    out = numpy.empty_like(q)
+
+    for start in range(0, len(q), chunk_size):
+        chunk = _prefix_products(q[start:start + chunk_size])
+        chunk = normalize(multiply(carry, chunk))
+        out[start:start + len(chunk)] = chunk
+        carry = chunk[-1]
+
+    return out
+
+
+def to_euler(q):
+    """Roll, pitch and yaw angles (ZYX convention) of quaternions.
+
+    Parameters
+    ----------
+    q: numpy.ndarray
+        (..., 4) unit quaternions
+
+    Returns
+    -------
+    roll, pitch, yaw: numpy.ndarray
+        Angles in radians
+    """
+    w, x, y, z = numpy.moveaxis(numpy.asarray(q, dtype=float), -1, 0)
+    roll = numpy.arctan2(2.0 * (w * x + y * z), 1.0 - 2.0 * (x * x + y * y))
+    pitch = numpy.arcsin(numpy.clip(2.0 * (w * y - z * x), -1.0, 1.0))
+    yaw = numpy.arctan2(2.0 * (w * z + x * y), 1.0 - 2.0 * (y * y + z * z))
+    return roll, pitch, yaw
@@ -0,0 +1,264 @@
+"""Resampling of telemetry onto arbitrary timestamps.
+
+Source samples are bracketed once with `numpy.searchsorted` and all the
+columns are then interpolated with the same indices and weights. Target
+times outside of the source range take the value of the closest end sample.
+
+Quaternions use the scalar-first (w, x, y, z) convention.
+"""
+
+import numpy
+
+from .gps import GPSTrack
+from .gyro import SensorTrack
+
+
+def frame_times(nframes, fps, start=0.0):
+    """Timestamps of video frames.
+
+    Parameters
+    ----------
+    nframes: int
+        Number of frames
+    fps: float
+        Frame rate, e.g. ``60000 / 1001`` for 59.94 fps
+    start: float, optional (default=0.0)
+        Time of the first frame in seconds
+
+    Returns
+    -------
+    times: numpy.ndarray
+        Frame times in seconds
+    """
+    return start + numpy.arange(nframes) / float(fps)
+
+
+def uniform_times(start, stop, rate):
+    """Timestamps of a uniform clock over [start, stop).
+
+    Parameters
+    ----------
+    start, stop: float
+        Time range in seconds
+    rate: float
+        Sampling rate in Hz
+
+    Returns
+    -------
+    times: numpy.ndarray
+        Times in seconds
+    """
+    return start + numpy.arange(int(numpy.ceil((stop - start) * rate))) / float(rate)
+
+
+def to_seconds(time, reference=None):
+    """Convert times to float seconds.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        Either float seconds or `numpy.datetime64` values
+    reference: numpy.datetime64, optional
+        The origin for datetime values. If None, the first value is used.
+
+    Returns
+    -------
+    seconds: numpy.ndarray
+        Float seconds (relative to ``reference`` for datetime values)
+    """
+    time = numpy.asarray(time)
+    if numpy.issubdtype(time.dtype, numpy.datetime64):
+        if reference is None:
+            reference = time.flat[0]
+        return (time - reference) / numpy.timedelta64(1, "s")
+    return time.astype(float)
+
+
+def bracket(time, target_time):
+    """Find interpolation indices and weights.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        Sorted source times in seconds
+    target_time: numpy.ndarray
+        Target times in seconds
+
+    Returns
+    -------
+    index: numpy.ndarray
+        Index ``i`` of the left source sample for each target
+    weight: numpy.ndarray
+        Weight of sample ``i + 1``, in [0, 1]
+    """
+    time = numpy.asarray(time, dtype=float)
+    target_time = numpy.asarray(target_time, dtype=float)
+    if len(time) < 2:
+        return numpy.zeros(target_time.shape, dtype=int), numpy.zeros(target_time.shape)
+
+    index = numpy.searchsorted(time, target_time, side="right") - 1
+    index = numpy.clip(index, 0, len(time) - 2)
+    t0 = time[index]
+    dt = time[index + 1] - t0
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        weight = numpy.where(dt > 0, (target_time - t0) / dt, 0.0)
+    return index, numpy.clip(weight, 0.0, 1.0)
+
+
+def _take_linear(values, index, weight):
+    values = numpy.asarray(values, dtype=float)
+    if len(values) < 2:
+        return values[index]
+    w = weight.reshape(weight.shape + (1,) * (values.ndim - 1))
+    return (1.0 - w) * values[index] + w * values[index + 1]
+
+
+def _take_nearest(values, index, weight):
+    values = numpy.asarray(values)
+    if len(values) < 2:
+        return values[index]
+    return values[index + (weight >= 0.5)]
+
+
+def interpolate_linear(time, values, target_time):
+    """Linear interpolation of (n,) or (n, k) values.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        Sorted source times in seconds
+    values: numpy.ndarray
+        Source values, one row per sample
+    target_time: numpy.ndarray
+        Target times in seconds
+
+    Returns
+    -------
+    resampled: numpy.ndarray
+        Interpolated values, one row per target time
+    """
+    index, weight = bracket(time, target_time)
+    return _take_linear(values, index, weight)
+
+
+def slerp(time, quaternions, target_time):
+    """Spherical linear interpolation of unit quaternions.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        Sorted source times in seconds
+    quaternions: numpy.ndarray
+        (n, 4) array of unit quaternions (w, x, y, z)
+    target_time: numpy.ndarray
+        Target times in seconds
+
+    Returns
+    -------
+    resampled: numpy.ndarray
+        (m, 4) array of interpolated unit quaternions
+    """
+    quaternions = numpy.asarray(quaternions, dtype=float)
+    index, weight = bracket(time, target_time)
+    if len(quaternions) < 2:
+        return quaternions[index]
+
+    q0 = quaternions[index]
+    q1 = quaternions[index + 1]
+    dot = numpy.einsum("ij,ij->i", q0, q1)
+    # Take the shortest path
+    q1 = numpy.where(dot[:, None] < 0, -q1, q1)
+    dot = numpy.abs(dot)
+
+    theta = numpy.arccos(numpy.clip(dot, -1.0, 1.0))
+    sin_theta = numpy.sin(theta)
+    small = sin_theta < 1e-9
+    safe_sin = numpy.where(small, 1.0, sin_theta)
+    w0 = numpy.where(small, 1.0 - weight, numpy.sin((1.0 - weight) * theta) / safe_sin)
+    w1 = numpy.where(small, weight, numpy.sin(weight * theta) / safe_sin)
+
+    q = w0[:, None] * q0 + w1[:, None] * q1
+    return q / numpy.linalg.norm(q, axis=1, keepdims=True)
+
+
+def resample_gps_track(track, target_time):
+    """Resample a GPSTrack.
+
+    Positions, altitude and speeds are interpolated linearly; precision,
+    fix and block_id take the value of the nearest sample.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    target_time: numpy.ndarray
+        Either `numpy.datetime64` values or float seconds since the first
+        point of the track.
+
+    Returns
+    -------
+    resampled_track: GPSTrack
+        A GPSTrack with one point per target time.
+
+    Raises
+    ------
+    ValueError: If the track is empty.
+    """
+    if len(track.time) == 0:
+        raise ValueError("Cannot resample an empty GPS track")
+    reference = track.time[0]
+    time = to_seconds(track.time, reference)
+    target_time = numpy.asarray(target_time)
+    target_seconds = to_seconds(target_time, reference)
+    index, weight = bracket(time, target_seconds)
+
+    if numpy.issubdtype(target_time.dtype, numpy.datetime64):
+        new_time = target_time.astype(track.time.dtype)
+    else:
+        new_time = reference + numpy.round(target_seconds * 1e6).astype("timedelta64[us]")
+
+    return GPSTrack(
+        time=new_time,
+        latitude=_take_linear(track.latitude, index, weight),
+        longitude=_take_linear(track.longitude, index, weight),
+        altitude=_take_linear(track.altitude, index, weight),
+        speed_2d=_take_linear(track.speed_2d, index, weight),
+        speed_3d=_take_linear(track.speed_3d, index, weight),
+        precision=_take_nearest(track.precision, index, weight),
+        fix=_take_nearest(track.fix, index, weight),
+        block_id=_take_nearest(track.block_id, index, weight),
+    )
+
+
+def resample_sensor_track(track, target_time):
+    """Resample a gyroscope or accelerometer SensorTrack.
+
+    Parameters
+    ----------
+    track: SensorTrack
+        A SensorTrack as returned by `gpmf.gyro.concatenate_sensor_blocks`.
+    target_time: numpy.ndarray
+        Target times in seconds
+
+    Returns
+    -------
+    resampled_track: SensorTrack
+        A SensorTrack with one sample per target time.
+
+    Raises
+    ------
+    ValueError: If the track is empty.
+    """
+    if len(track.time) == 0:
+        raise ValueError("Cannot resample an empty sensor track")
+    target_time = numpy.asarray(target_time, dtype=float)
+    index, weight = bracket(track.time, target_time)
+    xyz = _take_linear(numpy.column_stack([track.x, track.y, track.z]), index, weight)
+
+    return SensorTrack(
+        time=target_time,
+        x=xyz[:, 0],
+        y=xyz[:, 1],
+        z=xyz[:, 2],
+        block_id=_take_nearest(track.block_id, index, weight),
+    )
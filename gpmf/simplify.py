@@ -0,0 +1,180 @@
+"""GPS track simplification.
+
+Both algorithms work on planar coordinates in metres and return a boolean
+mask of the points to keep, so that any per-point array of a track can be
+filtered consistently. The first and last points are always kept.
+"""
+
+import numpy
+
+from .geo import geodetic_to_enu
+from .gps import GPSTrack
+
+
+def _segment_distance(x, y, x0, y0, x1, y1):
+    """Distance from points (x, y) to segments [(x0, y0), (x1, y1)]."""
+    dx = x1 - x0
+    dy = y1 - y0
+    norm2 = dx * dx + dy * dy
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        t = ((x - x0) * dx + (y - y0) * dy) / norm2
+    t = numpy.clip(numpy.nan_to_num(t), 0.0, 1.0)
+    return numpy.hypot(x - (x0 + t * dx), y - (y0 + t * dy))
+
+
+def douglas_peucker(x, y, tolerance):
+    """Douglas-Peucker simplification of a planar polyline.
+
+    All the segments of a refinement level are processed at once, so the
+    number of python iterations is the depth of the recursion rather than
+    the number of kept points.
+
+    Parameters
+    ----------
+    x, y: numpy.ndarray
+        Planar coordinates of the polyline in metres
+    tolerance: float
+        Maximum distance in metres between the original and the simplified
+        polyline.
+
+    Returns
+    -------
+    keep: numpy.ndarray
+        Boolean mask of the points to keep.
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    n = len(x)
+
+    keep = numpy.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[[0, -1]] = True
+    if n < 3:
+        return keep
+
+    index = numpy.arange(n)
+    while True:
+        kept = numpy.flatnonzero(keep)
+        # segment j spans [kept[j], kept[j + 1]]
+        segment = numpy.searchsorted(kept, index, side="right") - 1
+        segment = numpy.minimum(segment, len(kept) - 2)
+        start = kept[segment]
+        stop = kept[segment + 1]
+
+        distance = _segment_distance(x, y, x[start], y[start], x[stop], y[stop])
+        distance[keep] = 0.0
+
+        segment_max = numpy.maximum.reduceat(distance, kept[:-1])
+        candidates = (distance > tolerance) & (distance == segment_max[segment])
+        if not candidates.any():
+            break
+
+        # Keep only the first farthest point of each segment
+        _, first = numpy.unique(segment[candidates], return_index=True)
+        keep[numpy.flatnonzero(candidates)[first]] = True
+
+    return keep
+
+
+def visvalingam_whyatt(x, y, tolerance):
+    """Visvalingam-Whyatt simplification of a planar polyline.
+
+    Points whose effective triangle area is smaller than ``tolerance ** 2``
+    are removed. At each pass, every point that is a local minimum of the
+    effective area and falls below the threshold is removed at once; the
+    areas of its neighbours are then recomputed.
+
+    Parameters
+    ----------
+    x, y: numpy.ndarray
+        Planar coordinates of the polyline in metres
+    tolerance: float
+        Tolerance in metres. The area threshold is ``tolerance ** 2``.
+
+    Returns
+    -------
+    keep: numpy.ndarray
+        Boolean mask of the points to keep.
+    """
+    x = numpy.asarray(x, dtype=float)
+    y = numpy.asarray(y, dtype=float)
+    n = len(x)
+
+    keep = numpy.ones(n, dtype=bool)
+    if n < 3:
+        return keep
+
+    threshold = tolerance ** 2
+    while True:
+        kept = numpy.flatnonzero(keep)
+        if len(kept) < 3:
+            break
+        prev, mid, nxt = kept[:-2], kept[1:-1], kept[2:]
+        area = 0.5 * numpy.abs(
+            (x[prev] - x[nxt]) * (y[mid] - y[prev]) - (x[prev] - x[mid]) * (y[nxt] - y[prev])
+        )
+
+        # Local minima, ties broken towards the left neighbour
+        padded = numpy.concatenate([[numpy.inf], area, [numpy.inf]])
+        local_min = (area < padded[:-2]) & (area <= padded[2:])
+        remove = local_min & (area < threshold)
+        if not remove.any():
+            break
+        keep[mid[remove]] = False
+
+    return keep
+
+
+SIMPLIFY_METHODS = {
+    "douglas-peucker": douglas_peucker,
+    "visvalingam": visvalingam_whyatt,
+}
+
+
+def simplify_latlon(latitude, longitude, tolerance, method="douglas-peucker"):
+    """Simplify a track given in geodetic coordinates.
+
+    Parameters
+    ----------
+    latitude, longitude: numpy.ndarray
+        Coordinates in degrees
+    tolerance: float
+        Simplification tolerance in metres
+    method: str, optional (default="douglas-peucker")
+        One of "douglas-peucker" or "visvalingam".
+
+    Returns
+    -------
+    keep: numpy.ndarray
+        Boolean mask of the points to keep.
+    """
+    if method not in SIMPLIFY_METHODS:
+        raise ValueError("Unknown simplification method: %s" % method)
+
+    latitude = numpy.asarray(latitude, dtype=float)
+    if len(latitude) == 0:
+        return numpy.zeros(0, dtype=bool)
+    east, north, _ = geodetic_to_enu(latitude, longitude)
+    return SIMPLIFY_METHODS[method](east, north, tolerance)
+
+
+def simplify_track(track, tolerance, method="douglas-peucker"):
+    """Simplify a GPSTrack.
+
+    Parameters
+    ----------
+    track: GPSTrack
+        A GPSTrack as returned by `gpmf.gps.concatenate_gps_blocks`.
+    tolerance: float
+        Simplification tolerance in metres
+    method: str, optional (default="douglas-peucker")
+        One of "douglas-peucker" or "visvalingam".
+
+    Returns
+    -------
+    simplified_track: GPSTrack
+        A GPSTrack holding only the kept points.
+    """
+    keep = simplify_latlon(track.latitude, track.longitude, tolerance, method=method)
+    return GPSTrack._make(values[keep] for values in track)
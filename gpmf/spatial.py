@@ -0,0 +1,235 @@
+"""Spatial index over GPS points of many tracks.
+
+Points are bucketed in a uniform latitude/longitude grid. The index is
+stored as flat arrays sorted by cell id, so a query only needs a
+`numpy.searchsorted` per candidate cell range and an exact distance check
+on the points of those cells. Hits are returned as contiguous sample ranges
+of the indexed tracks, without re-extracting any telemetry.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+from .geo import EARTH_RADIUS, haversine
+
+
+SpatialHit = namedtuple("SpatialHit", ["name", "start", "stop"])
+
+METERS_PER_DEGREE = numpy.pi * EARTH_RADIUS / 180.0
+
+
+class TrackIndex:
+    """Grid index of GPS samples.
+
+    Parameters
+    ----------
+    cell_size: float, optional (default=0.001)
+        Size of the grid cells in degrees (about 110 m in latitude).
+    """
+
+    def __init__(self, cell_size=0.001):
+        self.cell_size = float(cell_size)
+        self.names = []
+        self._ncols = int(numpy.ceil(360.0 / self.cell_size))
+        self._pending = []
+        self._latitude = numpy.empty(0)
+        self._longitude = numpy.empty(0)
+        self._track = numpy.empty(0, dtype=numpy.int32)
+        self._sample = numpy.empty(0, dtype=numpy.int64)
+        self._cells = numpy.empty(0, dtype=numpy.int64)
+        self._offsets = numpy.zeros(1, dtype=numpy.int64)
+
+    def __len__(self):
+        self._build()
+        return len(self._latitude)
+
+    def _cell_rows_cols(self, latitude, longitude):
+        rows = numpy.floor((numpy.asarray(latitude) + 90.0) / self.cell_size).astype(numpy.int64)
+        cols = numpy.floor((numpy.asarray(longitude) + 180.0) / self.cell_size).astype(numpy.int64)
+        return rows, cols % self._ncols
+
+    def add(self, name, latitude, longitude):
+        """Add the points of a track to the index.
+
+        Parameters
+        ----------
+        name: str
+            Name of the track, typically the source file name.
+        latitude, longitude: numpy.ndarray
+            Coordinates in degrees. Sample ranges returned by queries are
+            positions in these arrays.
+        """
+        latitude = numpy.asarray(latitude, dtype=float)
+        longitude = numpy.asarray(longitude, dtype=float)
+        valid = numpy.flatnonzero(numpy.isfinite(latitude) & numpy.isfinite(longitude))
+        self._pending.append((len(self.names), latitude[valid], longitude[valid], valid))
+        self.names.append(name)
+
+    def _build(self):
+        if not self._pending:
+            return
+
+        track = [self._track] + [numpy.full(len(p[1]), p[0], dtype=numpy.int32)
+                                 for p in self._pending]
+        latitude = [self._latitude] + [p[1] for p in self._pending]
+        longitude = [self._longitude] + [p[2] for p in self._pending]
+        sample = [self._sample] + [p[3] for p in self._pending]
+        self._pending = []
+
+        latitude = numpy.concatenate(latitude)
+        longitude = numpy.concatenate(longitude)
+        rows, cols = self._cell_rows_cols(latitude, longitude)
+        point_cells = rows * self._ncols + cols
+        order = numpy.argsort(point_cells, kind="stable")
+
+        self._latitude = latitude[order]
+        self._longitude = longitude[order]
+        self._track = numpy.concatenate(track)[order]
+        self._sample = numpy.concatenate(sample).astype(numpy.int64)[order]
+
+        point_cells = point_cells[order]
+        self._cells, starts = numpy.unique(point_cells, return_index=True)
+        self._offsets = numpy.append(starts, len(point_cells)).astype(numpy.int64)
+
+    def _candidates(self, row_min, row_max, col_min, col_max):
+        """Indices of the points in a range of grid cells."""
+        self._build()
+        if len(self._cells) == 0:
+            return numpy.empty(0, dtype=numpy.int64)
+
+        ncols = min(col_max - col_min + 1, self._ncols)
+        if (row_max - row_min + 1) * ncols > len(self._cells):
+            # Large query: test the indexed cells rather than enumerating the grid
+            rows, cols = numpy.divmod(self._cells, self._ncols)
+            found = numpy.flatnonzero((rows >= row_min) & (rows <= row_max)
+                                      & ((cols - col_min) % self._ncols < ncols))
+        else:
+            rows = numpy.arange(row_min, row_max + 1, dtype=numpy.int64)
+            cols = numpy.arange(col_min, col_min + ncols, dtype=numpy.int64) % self._ncols
+            wanted = (rows[:, None] * self._ncols + cols[None, :]).ravel()
+            position = numpy.minimum(numpy.searchsorted(self._cells, wanted),
+                                     len(self._cells) - 1)
+            found = position[self._cells[position] == wanted]
+
+        starts = self._offsets[found]
+        stops = self._offsets[found + 1]
+        lengths = stops - starts
+        # Concatenated aranges of [start, stop) for every found cell
+        index = numpy.arange(lengths.sum()) - numpy.repeat(numpy.cumsum(lengths) - lengths, lengths)
+        return numpy.repeat(starts, lengths) + index
+
+    def _hits(self, points):
+        """Group matching points into contiguous sample ranges per track."""
+        if len(points) == 0:
+            return []
+        track = self._track[points]
+        sample = self._sample[points]
+        order = numpy.lexsort((sample, track))
+        track = track[order]
+        sample = sample[order]
+        breaks = numpy.flatnonzero((numpy.diff(track) != 0) | (numpy.diff(sample) != 1)) + 1
+        starts = numpy.concatenate([[0], breaks])
+        stops = numpy.concatenate([breaks, [len(sample)]])
+        return [
+            SpatialHit(self.names[t], int(a), int(b) + 1)
+            for t, a, b in zip(track[starts], sample[starts], sample[stops - 1])
+        ]
+
+    def query_radius(self, latitude, longitude, radius):
+        """Find the samples within a distance of a point.
+
+        Parameters
+        ----------
+        latitude, longitude: float
+            Query point in degrees
+        radius: float
+            Distance in metres
+
+        Returns
+        -------
+        hits: list of SpatialHit
+            (name, start, stop) sample ranges of the matching tracks.
+        """
+        dlat = radius / METERS_PER_DEGREE
+        coslat = max(numpy.cos(numpy.radians(min(abs(latitude) + dlat, 90.0))), 1e-12)
+        dlon = min(dlat / coslat, 180.0)
+
+        (row_min, row_max), (col_min, _) = self._cell_rows_cols(
+            [latitude - dlat, latitude + dlat], [longitude - dlon] * 2)
+        col_max = col_min + int(numpy.ceil(2 * dlon / self.cell_size)) + 1
+
+        points = self._candidates(row_min, row_max, col_min, col_max)
+        distance = haversine(latitude, longitude, self._latitude[points], self._longitude[points])
+        return self._hits(points[distance <= radius])
+
+    def query_bbox(self, lat_min, lon_min, lat_max, lon_max):
+        """Find the samples within a bounding box.
+
+        Parameters
+        ----------
+        lat_min, lon_min, lat_max, lon_max: float
+            The bounding box in degrees. `lon_min` may be greater than
+            `lon_max` for boxes crossing the antimeridian.
+
+        Returns
+        -------
+        hits: list of SpatialHit
+            (name, start, stop) sample ranges of the matching tracks.
+        """
+        (row_min, row_max), (col_min, _) = self._cell_rows_cols([lat_min, lat_max], [lon_min] * 2)
+        span = (lon_max - lon_min) % 360.0 if lon_max != lon_min + 360.0 else 360.0
+        col_max = col_min + int(numpy.ceil(span / self.cell_size)) + 1
+
+        points = self._candidates(row_min, row_max, col_min, col_max)
+        lat = self._latitude[points]
+        lon = self._longitude[points]
+        inside_lon = ((lon >= lon_min) & (lon <= lon_max)) if lon_min <= lon_max \
+            else ((lon >= lon_min) | (lon <= lon_max))
+        return self._hits(points[(lat >= lat_min) & (lat <= lat_max) & inside_lon])
+
+    def save(self, path):
+        """Save the index to a `.npz` file.
+
+        Parameters
+        ----------
+        path: str
+            Output file path
+        """
+        self._build()
+        numpy.savez(
+            path,
+            cell_size=self.cell_size,
+            names=numpy.array(self.names, dtype=str),
+            latitude=self._latitude,
+            longitude=self._longitude,
+            track=self._track,
+            sample=self._sample,
+            cells=self._cells,
+            offsets=self._offsets,
+        )
+
+    @classmethod
+    def load(cls, path):
+        """Load an index saved with `save`.
+
+        Parameters
+        ----------
+        path: str
+            Input file path
+
+        Returns
+        -------
+        index: TrackIndex
+            The loaded index
+        """
+        with numpy.load(path) as data:
+            index = cls(cell_size=float(data["cell_size"]))
+            index.names = data["names"].tolist()
+            index._latitude = data["latitude"]
+            index._longitude = data["longitude"]
+            index._track = data["track"]
+            index._sample = data["sample"]
+            index._cells = data["cells"]
+            index._offsets = data["offsets"]
+        return index
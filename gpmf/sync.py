@@ -0,0 +1,283 @@
+"""Shared time base for streams recorded at different rates.
+
+GPS (10-18 Hz), ACCL (~200 Hz), GYRO (~400 Hz) and frame-rate streams each
+deliver a different number of samples per payload. Every stream carries
+(depending on the camera) a STMP timestamp of its first sample in
+microseconds and a TSMP total sample count, and every payload is an MP4
+sample with its own duration, holding one DEVC container. These are
+collected in a single walk over the GPMF data and turned into per-sample
+times in seconds on a common clock.
+
+Streams are then joined with `merge_asof`, which matches every sample of a
+stream to the previous, next or nearest sample of another stream with a
+single `numpy.searchsorted`.
+"""
+
+from collections import namedtuple
+
+import numpy
+
+from .gyro import SENSOR_FOURCCS
+from .parse import iter_klv
+
+
+# Per-block timing information of a stream
+BlockTiming = namedtuple("BlockTiming", [
+    "counts",   # number of samples in each block
+    "stmp",     # timestamp of the first sample of each block in µs, nan if missing
+    "tsmp",     # total number of samples delivered at the end of each block, -1 if missing
+    "payload",  # index of the payload (DEVC container) holding each block, None if unknown
+], defaults=(None,))
+
+TIMED_FOURCCS = SENSOR_FOURCCS + ("GPS5", "GPS9")
+
+
+def extract_block_timing(gpmf_bytes, fourccs=TIMED_FOURCCS):
+    """Collect the timing information of several streams in a single pass.
+
+    Parameters
+    ----------
+    gpmf_bytes: bytes
+        Raw GPMF data bytes
+    fourccs: seq of str, optional
+        FourCC codes of the streams (default: the sensor streams, GPS5 and GPS9)
+
+    Returns
+    -------
+    timing: dict
+        Mapping of each FourCC found to its BlockTiming
+    """
+    fourccs = frozenset(fourccs)
+    columns = {}
+    devices = (item for item in iter_klv(gpmf_bytes) if item.key == "DEVC")
+    for payload, device in enumerate(devices):
+        for stream in device.value:
+            if stream.key != "STRM":
+                continue
+            block_dict = {item.key: item for item in stream.value}
+            fourcc = next((key for key in block_dict if key in fourccs), None)
+            if fourcc is None:
+                continue
+            counts, stmp, tsmp, payloads = columns.setdefault(fourcc, ([], [], [], []))
+            counts.append(block_dict[fourcc].length.repeat)
+            stmp.append(float(block_dict["STMP"].value) if "STMP" in block_dict else numpy.nan)
+            tsmp.append(int(block_dict["TSMP"].value) if "TSMP" in block_dict else -1)
+            payloads.append(payload)
+
+    return {
+        fourcc: BlockTiming(numpy.array(counts, dtype=numpy.int64),
+                            numpy.array(stmp, dtype=float),
+                            numpy.array(tsmp, dtype=numpy.int64),
+                            numpy.array(payloads, dtype=numpy.int64))
+        for fourcc, (counts, stmp, tsmp, payloads) in columns.items()
+    }
+
+
+def payload_times(stream_info, npayloads=None):
+    """Start and end times of the GPMF payloads from the MP4 track timing.
+
+    Parameters
+    ----------
+    stream_info: dict
+        The GPMF stream info as returned by `gpmf.io.find_gpmf_stream`
+    npayloads: int, optional
+        Number of payloads (MP4 samples). If None, the ``nb_frames`` of the
+        stream is used.
+
+    Returns
+    -------
+    boundaries: numpy.ndarray
+        (npayloads + 1,) payload boundaries in seconds
+    """
+    duration = float(stream_info["duration"])
+    if npayloads is None:
+        npayloads = int(stream_info["nb_frames"])
+    start = float(stream_info.get("start_time", 0.0))
+    return start + duration * numpy.arange(npayloads + 1) / max(npayloads, 1)
+
+
+def sample_times(timing, boundaries=None, block_duration=1.0):
+    """Assign a time in seconds to every sample of a stream.
+
+    Samples are evenly spread between known block times:
+
+    * if every block has a STMP timestamp, between consecutive STMP values,
+      the last block being extrapolated at the mean sample rate;
+    * otherwise between the boundaries of the payload holding each block
+      (MP4 timing), or every `block_duration` seconds.
+
+    TSMP sample counts, when present, give the position of every block in
+    the stream so that dropped samples leave a gap instead of shifting the
+    following ones.
+
+    Parameters
+    ----------
+    timing: BlockTiming
+        The timing of the stream from `extract_block_timing`
+    boundaries: numpy.ndarray, optional
+        (npayloads + 1,) payload boundaries in seconds, see `payload_times`.
+        Blocks are matched to the payloads by `timing.payload`, or assumed
+        to be in consecutive payloads if it is None.
+    block_duration: float, optional (default=1.0)
+        Payload duration used when neither STMP nor `boundaries` are available
+
+    Returns
+    -------
+    time: numpy.ndarray
+        Per-sample times in seconds, in the order of the concatenated blocks
+
+    Raises
+    ------
+    ValueError: If a block is in a payload past the `boundaries`.
+    """
+    counts = numpy.asarray(timing.counts, dtype=numpy.int64)
+    nblocks = len(counts)
+    if nblocks == 0:
+        return numpy.empty(0)
+
+    # Stream index of the first sample of each block and past its last one
+    ends = numpy.cumsum(counts)
+    tsmp = numpy.asarray(timing.tsmp)
+    if numpy.all(tsmp >= 0):
+        ends = tsmp
+    first = ends - counts
+
+    # Stream index of every sample: its position in the concatenated
+    # blocks, shifted by the samples dropped before its block
+    concatenated_first = numpy.cumsum(counts) - counts
+    index = numpy.arange(counts.sum()) + numpy.repeat(first - concatenated_first, counts)
+
+    stmp = numpy.asarray(timing.stmp, dtype=float)
+    if numpy.all(numpy.isfinite(stmp)):
+        # STMP is the time of the first sample of each block
+        knot_index = numpy.append(first, ends[-1])
+        knot_time = stmp * 1e-6
+        if nblocks > 1 and knot_time[-1] > knot_time[0]:
+            rate = (first[-1] - first[0]) / (knot_time[-1] - knot_time[0])
+        else:
+            rate = counts[0] / block_duration
+        knot_time = numpy.append(knot_time, knot_time[-1] + counts[-1] / rate)
+        return numpy.interp(index, knot_index, knot_time)
+
+    # Every block spans the payload holding it. The samples dropped before a
+    # block belong to it if it directly follows the previous block.
+    payload = numpy.arange(nblocks) if timing.payload is None else numpy.asarray(timing.payload)
+    if boundaries is None:
+        boundaries = block_duration * numpy.arange(payload[-1] + 2)
+    boundaries = numpy.asarray(boundaries, dtype=float)
+    if payload[-1] + 1 >= len(boundaries):
+        raise ValueError("The blocks span more payloads than the boundaries")
+    follows = numpy.append(False, numpy.diff(payload) == 1)
+    span_first = numpy.where(follows, numpy.append(first[0], ends[:-1]), first)
+    span = numpy.maximum(ends - span_first, 1)
+    start = boundaries[payload]
+    duration = boundaries[payload + 1] - start
+    return (numpy.repeat(start, counts)
+            + (index - numpy.repeat(span_first, counts)) * numpy.repeat(duration / span, counts))
+
+
+def synchronize(gpmf_bytes, fourccs=TIMED_FOURCCS, stream_info=None, block_duration=1.0):
+    """Per-sample times of several streams on a common clock.
+
+    Parameters
+    ----------
+    gpmf_bytes: bytes
+        Raw GPMF data bytes
+    fourccs: seq of str, optional
+        FourCC codes of the streams (default: the sensor streams, GPS5 and GPS9)
+    stream_info: dict, optional
+        The GPMF stream info from `gpmf.io.find_gpmf_stream`, used for the
+        payload timing of streams without STMP timestamps. Its ``nb_frames``
+        must be the number of payloads (DEVC containers) of `gpmf_bytes`.
+    block_duration: float, optional (default=1.0)
+        Payload duration used without STMP timestamps nor stream info
+
+    Returns
+    -------
+    times: dict
+        Mapping of each FourCC found to its per-sample times in seconds,
+        aligned with the samples of the concatenated blocks (e.g.
+        `gpmf.gyro.concatenate_sensor_blocks`).
+    """
+    timing = extract_block_timing(gpmf_bytes, fourccs)
+    boundaries = None if stream_info is None else payload_times(stream_info)
+    return {fourcc: sample_times(block_timing, boundaries, block_duration)
+            for fourcc, block_timing in timing.items()}
+
+
+def merge_asof(left_time, right_time, direction="backward", tolerance=None):
+    """Match every left sample with a right sample, like `pandas.merge_asof`.
+
+    Parameters
+    ----------
+    left_time: numpy.ndarray
+        Times of the samples to match, in seconds
+    right_time: numpy.ndarray
+        Sorted times of the samples to match against, in seconds
+    direction: str, optional (default="backward")
+        "backward" (last right sample at or before the left one), "forward"
+        (first right sample at or after it) or "nearest".
+    tolerance: float, optional
+        Maximum time difference in seconds. Matches further apart are dropped.
+
+    Returns
+    -------
+    index: numpy.ndarray
+        Index of the matching right sample for every left sample, -1 if none
+    """
+    if direction not in ("backward", "forward", "nearest"):
+        raise ValueError("Unknown direction: %s" % direction)
+
+    left_time = numpy.asarray(left_time, dtype=float)
+    right_time = numpy.asarray(right_time, dtype=float)
+    n = len(right_time)
+    if n == 0:
+        return numpy.full(left_time.shape, -1, dtype=numpy.int64)
+
+    backward = numpy.searchsorted(right_time, left_time, side="right") - 1
+    forward = numpy.searchsorted(right_time, left_time, side="left")
+
+    if direction == "backward":
+        index = backward
+    elif direction == "forward":
+        index = numpy.where(forward < n, forward, -1)
+    else:
+        before = left_time - right_time[numpy.maximum(backward, 0)]
+        after = right_time[numpy.minimum(forward, n - 1)] - left_time
+        use_forward = (backward < 0) | ((forward < n) & (after < before))
+        index = numpy.where(use_forward, forward, backward)
+        index = numpy.where(index < n, index, -1)
+
+    if tolerance is not None:
+        matched = index >= 0
+        distance = numpy.abs(left_time - right_time[numpy.maximum(index, 0)])
+        index = numpy.where(matched & (distance <= tolerance), index, -1)
+    return index.astype(numpy.int64)
+
+
+def join(left_time, right_time, right_values, direction="backward", tolerance=None):
+    """Values of a stream at the samples of another stream.
+
+    Parameters
+    ----------
+    left_time: numpy.ndarray
+        Times of the samples to match, in seconds
+    right_time: numpy.ndarray
+        Sorted times of the other stream, in seconds
+    right_values: numpy.ndarray
+        (n,) or (n, k) values of the other stream
+    direction, tolerance:
+        See `merge_asof`
+
+    Returns
+    -------
+    values: numpy.ndarray
+        Matched values as floats, nan for unmatched samples
+    """
+    index = merge_asof(left_time, right_time, direction, tolerance)
+    right_values = numpy.asarray(right_values, dtype=float)
+    if len(right_values) == 0:
+        return numpy.full(index.shape + right_values.shape[1:], numpy.nan)
+    values = right_values[numpy.maximum(index, 0)]
+    values[index < 0] = numpy.nan
+    return values
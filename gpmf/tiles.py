@@ -0,0 +1,309 @@
+"""Offline basemap tiles.
+
+Tile sources read Web Mercator (XYZ) tiles from a local directory or from
+an MBTiles (SQLite) file, and keep the decoded tiles in an in-process LRU
+cache, so that repeated maps over the same area cost neither network
+access nor image decoding. A source can be passed as the `map_provider`
+of `gpmf.gps_plot.plot_gps_trace` in place of a contextily provider.
+
+Image decoding (Pillow) and projection (pyproj) dependencies are only
+imported when used.
+"""
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import io
+import os
+import pathlib
+import sqlite3
+
+import numpy
+
+from .projection import project, transform_bounds
+
+WEB_MERCATOR = "EPSG:3857"
+
+# Half of the Web Mercator world width in metres
+ORIGIN_SHIFT = 20037508.342789244
+
+
+class TileSource(ABC):
+    """Base class of the local tile sources.
+
+    Subclasses implement `read(zoom, x, y)`, returning the encoded image of
+    an XYZ tile or None when the tile is missing.
+
+    Parameters
+    ----------
+    cache_size: int, optional (default=256)
+        Maximum number of decoded tiles kept in memory
+    tile_size: int, optional (default=256)
+        Size of the tiles in pixels
+    """
+
+    def __init__(self, cache_size=256, tile_size=256):
+        self.cache_size = cache_size
+        self.tile_size = tile_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    @abstractmethod
+    def read(self, zoom, x, y):
+        """Encoded image of an XYZ tile, None if the tile is missing."""
+
+    def _decode(self, data):
+        from PIL import Image
+        image = Image.open(io.BytesIO(data)).convert("RGBA")
+        if image.size != (self.tile_size, self.tile_size):
+            image = image.resize((self.tile_size, self.tile_size))
+        return numpy.asarray(image)
+
+    def tile(self, zoom, x, y):
+        """Decoded tile.
+
+        Parameters
+        ----------
+        zoom, x, y: int
+            XYZ tile coordinates
+
+        Returns
+        -------
+        image: numpy.ndarray
+            (tile_size, tile_size, 4) RGBA uint8 image, transparent if the
+            tile is missing
+        """
+        key = (zoom, x, y)
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+
+        self.misses += 1
+        data = self.read(zoom, x, y)
+        if data is None:
+            image = numpy.zeros((self.tile_size, self.tile_size, 4), dtype=numpy.uint8)
+        else:
+            image = self._decode(data)
+        self._cache[key] = image
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return image
+
+    def clear_cache(self):
+        """Drop the decoded tiles."""
+        self._cache.clear()
+
+
+class DirectoryTileSource(TileSource):
+    """Tiles stored as ``{root}/{z}/{x}/{y}.{extension}`` files.
+
+    Parameters
+    ----------
+    root: str
+        Root directory of the tiles
+    extension: str, optional (default="png")
+        File extension of the tiles
+    tms: bool, optional (default=False)
+        If True the y coordinate counts from the south (TMS layout)
+    kwargs:
+        Extra arguments passed to `TileSource`
+    """
+
+    def __init__(self, root, extension="png", tms=False, **kwargs):
+        super().__init__(**kwargs)
+        self.root = root
+        self.extension = extension
+        self.tms = tms
+
+    def read(self, zoom, x, y):
+        if self.tms:
+            y = (1 << zoom) - 1 - y
+        path = os.path.join(self.root, str(zoom), str(x), "%i.%s" % (y, self.extension))
+        if not os.path.exists(path):
+            return None
+        with open(path, "rb") as tile_file:
+            return tile_file.read()
+
+
+class MBTilesSource(TileSource):
+    """Tiles stored in an MBTiles (SQLite) file.
+
+    Parameters
+    ----------
+    path: str
+        Path of the .mbtiles file, opened read-only
+    kwargs:
+        Extra arguments passed to `TileSource`
+    """
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._connection = None
+
+    @property
+    def connection(self):
+        # Opened on first use so that sources can be sent to worker processes
+        if self._connection is None:
+            # A file URI escapes the characters of the path that are special in URIs
+            uri = pathlib.Path(self.path).resolve().as_uri() + "?mode=ro"
+            self._connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        return self._connection
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_connection"] = None
+        return state
+
+    def metadata(self):
+        """The name/value pairs of the metadata table."""
+        return dict(self.connection.execute("SELECT name, value FROM metadata").fetchall())
+
+    def read(self, zoom, x, y):
+        # MBTiles rows count from the south
+        row = self.connection.execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+            (zoom, x, (1 << zoom) - 1 - y)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def close(self):
+        """Close the SQLite connection."""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def tile_range(left, bottom, right, top, zoom):
+    """XYZ tiles covering Web Mercator bounds.
+
+    Parameters
+    ----------
+    left, bottom, right, top: float
+        Bounds in EPSG:3857 metres
+    zoom: int
+        Zoom level
+
+    Returns
+    -------
+    x_min, x_max, y_min, y_max: int
+        Inclusive ranges of tile columns and rows (rows count from the north)
+    """
+    n = 1 << zoom
+    size = 2.0 * ORIGIN_SHIFT / n
+
+    def column(value):
+        return int(numpy.clip(numpy.floor((value + ORIGIN_SHIFT) / size), 0, n - 1))
+
+    def row(value):
+        return int(numpy.clip(numpy.floor((ORIGIN_SHIFT - value) / size), 0, n - 1))
+
+    return column(left), column(right), row(top), row(bottom)
+
+
+def bounds2img(left, bottom, right, top, zoom, source):
+    """Mosaic of the tiles covering Web Mercator bounds.
+
+    Parameters
+    ----------
+    left, bottom, right, top: float
+        Bounds in EPSG:3857 metres
+    zoom: int
+        Zoom level
+    source: TileSource
+        The tile source
+
+    Returns
+    -------
+    image: numpy.ndarray
+        (h, w, 4) RGBA uint8 mosaic
+    extent: tuple of float
+        (left, right, bottom, top) of the mosaic in EPSG:3857 metres
+    """
+    x_min, x_max, y_min, y_max = tile_range(left, bottom, right, top, zoom)
+    ts = source.tile_size
+    image = numpy.empty(((y_max - y_min + 1) * ts, (x_max - x_min + 1) * ts, 4),
+                        dtype=numpy.uint8)
+    for y in range(y_min, y_max + 1):
+        for x in range(x_min, x_max + 1):
+            image[(y - y_min) * ts:(y - y_min + 1) * ts,
+                  (x - x_min) * ts:(x - x_min + 1) * ts] = source.tile(zoom, x, y)
+
+    size = 2.0 * ORIGIN_SHIFT / (1 << zoom)
+    extent = (x_min * size - ORIGIN_SHIFT, (x_max + 1) * size - ORIGIN_SHIFT,
+              ORIGIN_SHIFT - (y_max + 1) * size, ORIGIN_SHIFT - y_min * size)
+    return image, extent
+
+
+def warp_image(image, extent, crs):
+    """Reproject a Web Mercator image into another coordinate system.
+
+    Every output pixel centre is projected back to Web Mercator and takes
+    the value of the nearest input pixel.
+
+    Parameters
+    ----------
+    image: numpy.ndarray
+        (h, w, 4) RGBA image
+    extent: tuple of float
+        (left, right, bottom, top) of the image in EPSG:3857 metres
+    crs: str or pyproj.CRS
+        Target coordinate system
+
+    Returns
+    -------
+    image: numpy.ndarray
+        (h, w, 4) warped image, transparent outside of the input
+    extent: tuple of float
+        (left, right, bottom, top) of the warped image in `crs`
+    """
+    left, right, bottom, top = extent
+    height, width = image.shape[:2]
+    x_min, y_min, x_max, y_max = transform_bounds(left, bottom, right, top, WEB_MERCATOR, crs)
+
+    x = x_min + (numpy.arange(width) + 0.5) * (x_max - x_min) / width
+    y = y_max - (numpy.arange(height) + 0.5) * (y_max - y_min) / height
+    xx, yy = numpy.meshgrid(x, y)
+    mx, my = project(xx, yy, WEB_MERCATOR, source=crs)
+
+    column = numpy.floor((mx - left) / (right - left) * width)
+    row = numpy.floor((top - my) / (top - bottom) * height)
+    inside = (column >= 0) & (column < width) & (row >= 0) & (row < height)
+
+    warped = numpy.zeros_like(image)
+    warped[inside] = image[row[inside].astype(int), column[inside].astype(int)]
+    return warped, (x_min, x_max, y_min, y_max)
+
+
+def add_basemap(ax, source, zoom=12, crs=WEB_MERCATOR, interpolation="bilinear"):
+    """Draw local tiles under the content of a matplotlib axis.
+
+    Parameters
+    ----------
+    ax: matplotlib.axes.Axes
+        The axis, whose current limits are covered
+    source: TileSource
+        The tile source
+    zoom: int, optional (default=12)
+        Zoom level of the tiles
+    crs: str or pyproj.CRS, optional (default="EPSG:3857")
+        Coordinate system of the axis. Tiles are warped into it.
+    interpolation: str, optional (default="bilinear")
+        Interpolation used by `imshow`
+    """
+    from pyproj import CRS
+
+    xmin, xmax, ymin, ymax = ax.axis()
+    crs = CRS.from_user_input(crs)
+    web_mercator = crs == CRS.from_user_input(WEB_MERCATOR)
+    if web_mercator:
+        left, bottom, right, top = xmin, ymin, xmax, ymax
+    else:
+        left, bottom, right, top = transform_bounds(xmin, ymin, xmax, ymax, crs, WEB_MERCATOR)
+
+    image, extent = bounds2img(left, bottom, right, top, zoom, source)
+    if not web_mercator:
+        image, extent = warp_image(image, extent, crs)
+
+    ax.imshow(image, extent=extent, interpolation=interpolation, zorder=0)
+    ax.axis((xmin, xmax, ymin, ymax))
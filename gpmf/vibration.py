@@ -0,0 +1,212 @@
+"""Windowed spectral analysis of accelerometer and gyroscope vibrations.
+
+Samples are cut into overlapping windows (short-time Fourier transform).
+For every window the analysis reports the RMS level, the frequency of the
+highest spectral peak and the energy in a set of frequency bands, while the
+power spectral densities are averaged over all the windows (Welch method).
+
+`VibrationAnalyzer` is fed chunk by chunk: the samples of an incomplete
+window are carried over to the next chunk, windows are viewed in place with
+`sliding_window_view` and transformed in batches of bounded size, so
+arbitrarily long recordings are processed in constant memory.
+"""
+
+from collections import namedtuple
+
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Per-window results of a vibration analysis
+VibrationReport = namedtuple("VibrationReport", [
+    "time",             # (n,) time of the centre of each window in seconds
+    "rms",              # (n, k) RMS of each axis, mean removed
+    "peak_frequency",   # (n, k) frequency of the highest PSD peak of each axis in Hz
+    "band_energy",      # (n, k, nbands) mean square of each axis in each band
+])
+
+DEFAULT_BANDS = ((0.5, 10.0), (10.0, 50.0), (50.0, 200.0))
+
+
+class VibrationAnalyzer:
+    """Streaming STFT/Welch analysis of sensor samples.
+
+    Parameters
+    ----------
+    rate: float
+        Sampling rate in Hz
+    window_size: int, optional (default=1024)
+        Number of samples per window
+    overlap: float, optional (default=0.5)
+        Fraction of overlap between consecutive windows, in [0, 1)
+    bands: seq of (float, float), optional
+        Frequency bands [low, high) in Hz for the band energies
+    detrend: bool, optional (default=True)
+        Remove the mean of every window (e.g. gravity) before the analysis
+    batch_size: int, optional (default=256)
+        Maximum number of windows transformed at once
+    """
+
+    def __init__(self, rate, window_size=1024, overlap=0.5, bands=DEFAULT_BANDS,
+                 detrend=True, batch_size=256):
+        if not 0 <= overlap < 1:
+            raise ValueError("The overlap must be in [0, 1)")
+        self.rate = float(rate)
+        self.window_size = int(window_size)
+        self.hop = max(int(round(self.window_size * (1.0 - overlap))), 1)
+        self.detrend = detrend
+        self.batch_size = int(batch_size)
+        self.bands = numpy.asarray(bands, dtype=float).reshape(-1, 2)
+
+        self.window = numpy.hanning(self.window_size)
+        self.frequencies = numpy.fft.rfftfreq(self.window_size, 1.0 / self.rate)
+        # One-sided PSD scaling, DC and Nyquist bins are not doubled
+        self._scale = numpy.full(len(self.frequencies), 2.0)
+        self._scale[0] = 1.0
+        if self.window_size % 2 == 0:
+            self._scale[-1] = 1.0
+        self._scale /= self.rate * numpy.sum(self.window ** 2)
+        self._band_masks = ((self.frequencies[None, :] >= self.bands[:, :1])
+                            & (self.frequencies[None, :] < self.bands[:, 1:])).astype(float)
+
+        self._time = None
+        self._values = None
+        self._psd_sum = None
+        self._count = 0
+
+    def _analyze(self, windows, time_windows):
+        """Analyse (nwindows, k, window_size) windows."""
+        if self.detrend:
+            windows = windows - windows.mean(axis=-1, keepdims=True)
+        rms = numpy.sqrt(numpy.mean(windows ** 2, axis=-1))
+        spectrum = numpy.fft.rfft(windows * self.window, axis=-1)
+        psd = (spectrum.real ** 2 + spectrum.imag ** 2) * self._scale
+
+        df = self.frequencies[1] - self.frequencies[0] if len(self.frequencies) > 1 else 0.0
+        band_energy = psd @ self._band_masks.T * df
+        peak_frequency = self.frequencies[numpy.argmax(psd[..., 1:], axis=-1) + 1] \
+            if len(self.frequencies) > 1 else numpy.zeros(rms.shape)
+
+        summed = psd.sum(axis=0)
+        self._psd_sum = summed if self._psd_sum is None else self._psd_sum + summed
+        self._count += len(windows)
+
+        center = 0.5 * (time_windows[:, (self.window_size - 1) // 2]
+                        + time_windows[:, self.window_size // 2])
+        return center, rms, peak_frequency, band_energy
+
+    def process(self, time, values):
+        """Analyse the complete windows of a chunk of samples.
+
+        Parameters
+        ----------
+        time: numpy.ndarray
+            (n,) sample times in seconds
+        values: numpy.ndarray
+            (n,) or (n, k) sample values
+
+        Returns
+        -------
+        report: VibrationReport
+            Results of the windows completed by this chunk
+        """
+        time = numpy.asarray(time, dtype=float)
+        values = numpy.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[:, None]
+        if self._time is not None:
+            time = numpy.concatenate([self._time, time])
+            values = numpy.concatenate([self._values, values])
+
+        nwindows = max((len(time) - self.window_size) // self.hop + 1, 0)
+        consumed = nwindows * self.hop
+        self._time = time[consumed:].copy()
+        self._values = values[consumed:].copy()
+
+        results = []
+        if nwindows:
+            windows = sliding_window_view(values, self.window_size, axis=0)[::self.hop]
+            time_windows = sliding_window_view(time, self.window_size)[::self.hop]
+            for start in range(0, nwindows, self.batch_size):
+                stop = min(start + self.batch_size, nwindows)
+                results.append(self._analyze(windows[start:stop], time_windows[start:stop]))
+
+        if not results:
+            k = values.shape[1]
+            return VibrationReport(numpy.empty(0), numpy.empty((0, k)), numpy.empty((0, k)),
+                                   numpy.empty((0, k, len(self.bands))))
+        return VibrationReport._make(numpy.concatenate(columns) for columns in zip(*results))
+
+    def welch(self):
+        """Power spectral density averaged over all the processed windows.
+
+        Returns
+        -------
+        frequencies: numpy.ndarray
+            (m,) frequencies in Hz
+        psd: numpy.ndarray
+            (k, m) power spectral density of each axis in unit²/Hz
+        """
+        if self._count == 0:
+            return self.frequencies, None
+        return self.frequencies, self._psd_sum / self._count
+
+
+def analyze_vibration(time, values, rate=None, chunk_size=1 << 18, **kwargs):
+    """Vibration analysis of sensor samples.
+
+    Parameters
+    ----------
+    time: numpy.ndarray
+        (n,) sample times in seconds
+    values: numpy.ndarray
+        (n,) or (n, k) sample values
+    rate: float, optional
+        Sampling rate in Hz. If None, it is estimated from the median time step.
+    chunk_size: int, optional (default=262144)
+        Number of samples processed at once
+    kwargs:
+        Extra arguments passed to `VibrationAnalyzer`
+
+    Returns
+    -------
+    report: VibrationReport
+        Per-window results
+    frequencies: numpy.ndarray
+        Frequencies of the Welch PSD in Hz
+    psd: numpy.ndarray
+        (k, m) Welch power spectral density of each axis
+    """
+    time = numpy.asarray(time, dtype=float)
+    if rate is None:
+        rate = 1.0 / numpy.median(numpy.diff(time))
+
+    analyzer = VibrationAnalyzer(rate, **kwargs)
+    reports = [analyzer.process(time[start:start + chunk_size], values[start:start + chunk_size])
+               for start in range(0, len(time), chunk_size)]
+    if not reports:
+        reports = [analyzer.process(time, values)]
+    report = VibrationReport._make(numpy.concatenate(columns) for columns in zip(*reports))
+    frequencies, psd = analyzer.welch()
+    return report, frequencies, psd
+
+
+def analyze_sensor_track(track, rate=None, **kwargs):
+    """Vibration analysis of the three axes of a SensorTrack.
+
+    Parameters
+    ----------
+    track: SensorTrack
+        A track from `gpmf.gyro.concatenate_sensor_blocks`
+    rate: float, optional
+        Sampling rate in Hz. If None, it is estimated from the track times.
+    kwargs:
+        Extra arguments passed to `analyze_vibration`
+
+    Returns
+    -------
+    report, frequencies, psd:
+        See `analyze_vibration`
+    """
+    return analyze_vibration(track.time, numpy.column_stack([track.x, track.y, track.z]),
+                             rate=rate, **kwargs)
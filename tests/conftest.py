@@ -1,6 +1,11 @@
 """Pytest configuration and fixtures."""
 import pytest
 import os
+import struct
+
+import numpy as np
+
+from gpmf import parse
 from pathlib import Path
 
 # Test data directory
@@ -31,3 +36,36 @@ def sample_gps_data():
         'speed_3d': 9.25,
         'timestamp': '2020-07-03T12:36:56.940000Z'
     }
+
+
+def _encode_klv(fourcc, type_str, payload=b"", size=None, repeat=None):
+    """Encode a single KLV item, with its payload padded to 4 bytes."""
+    if isinstance(payload, (list, tuple)):
+        # Nested items
+        payload = b"".join(payload)
+        type_str, size, repeat = "\x00", 1, len(payload)
+    elif not isinstance(payload, bytes):
+        array = np.asarray(payload)
+        if array.ndim == 0:
+            array = array.reshape(1, 1)
+        elif array.ndim == 1:
+            array = array.reshape(1, -1)
+        dtype = np.dtype(">" + parse.num_types[type_str][1])
+        size = dtype.itemsize * array.shape[1]
+        repeat = array.shape[0]
+        payload = array.astype(dtype).tobytes()
+    if size is None:
+        size, repeat = len(payload), 1
+    header = fourcc.encode("ascii") + type_str.encode("latin1") + struct.pack(">BH", size, repeat)
+    return header + payload + b"\x00" * (parse.ceil4(len(payload)) - len(payload))
+
+
+@pytest.fixture
+def klv():
+    """Provide a function encoding KLV items into GPMF bytes.
+
+    ``klv("STRM", "\\x00", [klv(...), ...])`` builds a nested container,
+    ``klv("GYRO", "s", array)`` encodes numeric rows, and
+    ``klv("STNM", "c", b"Gyroscope")`` encodes raw bytes.
+    """
+    return _encode_klv
@@ -74,6 +74,51 @@ class TestDataframeConversion:
             df = gps_plot.to_dataframe([])
 
 
+class TestColumnarDataframe:
+    """Test the columnar DataFrame builder."""
+
+    @pytest.fixture
+    def blocks(self):
+        return [
+            gps.GPSData(
+                description="Test",
+                timestamp=f"2024-01-12 10:00:{i:02d}.000",
+                precision=1.5,
+                fix=3 - i,
+                latitude=np.array([37.7749, 37.7750]) + i,
+                longitude=np.array([-122.4194, -122.4195]),
+                altitude=np.array([10.0, 11.0]),
+                speed_2d=np.array([5.0, 5.1]),
+                speed_3d=np.array([5.0, 5.1]),
+                units="m/s",
+                npoints=2
+            )
+            for i in range(2)
+        ]
+
+    def test_datetime_index(self, blocks):
+        """Samples get their own time, also used as the index."""
+        df = gps_plot.to_dataframe(blocks)
+        assert isinstance(df.index, pd.DatetimeIndex)
+        assert df["time"].dtype == "datetime64[us]"
+        assert df.index[1] == pd.Timestamp("2024-01-12 10:00:00.500")
+        assert df["block_id"].tolist() == [0, 0, 1, 1]
+
+    def test_compact_dtypes(self, blocks):
+        """Categorical fix and optional float32 columns."""
+        df = gps_plot.to_dataframe(blocks, float32=True)
+        assert isinstance(df["fix"].dtype, pd.CategoricalDtype)
+        assert df["fix"].tolist() == [3, 3, 2, 2]
+        assert df["altitude"].dtype == np.float32
+        assert df["latitude"].dtype == np.float64
+
+    def test_zero_copy(self, blocks):
+        """Columns are adopted from the track arrays."""
+        track = gps.concatenate_gps_blocks(blocks)
+        df = gps_plot.track_to_dataframe(track)
+        assert np.shares_memory(df["latitude"].to_numpy(), track.latitude)
+
+
 class TestOutlierFiltering:
     """Test outlier detection and filtering."""
     
@@ -177,6 +222,70 @@ class TestPlottingFunctions:
             pass
 
 
+class TestColoredTrack:
+    """Test tracks coloured by a per-point value."""
+
+    @pytest.fixture
+    def latlon(self):
+        t = np.linspace(0, 1, 500)
+        return np.column_stack([44.0 + 0.02 * t, 5.0 + 0.02 * np.sin(3 * t)])
+
+    @pytest.fixture(autouse=True)
+    def agg(self):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        with patch("gpmf.gps_plot.ctx.add_basemap"):
+            yield
+        plt.close("all")
+
+    def test_line(self, latlon):
+        import matplotlib.pyplot as plt
+        speed = np.arange(500, dtype=float)
+        gps_plot.plot_gps_trace(latlon, style="line", lod=False, values=speed, label="speed")
+        fig = plt.gcf()
+        collection = fig.axes[0].collections[0]
+        np.testing.assert_array_equal(collection.get_array(), speed[:-1])
+        # Colorbar
+        assert len(fig.axes) == 2
+        assert fig.axes[1].get_ylabel() == "speed"
+
+    def test_line_lod(self, latlon):
+        """Values follow the decimated points."""
+        import matplotlib.pyplot as plt
+        speed = np.arange(500, dtype=float)
+        gps_plot.plot_gps_trace(latlon, figsize=(1, 1), style="line", values=speed)
+        collection = plt.gcf().axes[0].collections[0]
+        colors = collection.get_array()
+        assert len(colors) == len(collection.get_segments()) < 499
+        assert np.all(np.diff(colors) > 0)
+
+    def test_scatter(self, latlon):
+        import matplotlib.pyplot as plt
+        gps_plot.plot_gps_trace(latlon, lod=False, values=latlon[:, 0], cmap="plasma")
+        collection = plt.gcf().axes[0].collections[0]
+        np.testing.assert_array_equal(collection.get_array(), latlon[:, 0])
+        assert collection.get_cmap().name == "plasma"
+
+    def test_color_by(self):
+        n = 10
+        block = gps.GPSData(
+            description="GPS", timestamp="2024-01-12 10:00:00.000", precision=1.0, fix=3,
+            latitude=np.linspace(45.0, 45.001, n), longitude=np.full(n, 5.0),
+            altitude=np.arange(n, dtype=float), speed_2d=np.ones(n), speed_3d=np.ones(n),
+            units="m/s", npoints=n
+        )
+        with patch("gpmf.gps_plot.extract_gps_blocks", return_value=["block"]), \
+                patch("gpmf.gps_plot.parse_gps_block", return_value=block), \
+                patch("gpmf.gps_plot.quality_mask", return_value=np.ones(n, dtype=bool)), \
+                patch("gpmf.gps_plot.plot_gps_trace") as mock_plot:
+            gps_plot.plot_gps_trace_from_stream(b"stream", color_by="altitude", style="line")
+        kwargs = mock_plot.call_args.kwargs
+        np.testing.assert_array_equal(kwargs["values"], np.arange(n))
+        assert kwargs["label"] == "altitude"
+        assert kwargs["style"] == "line"
+
+
 class TestCoordinateSystems:
     """Test coordinate system definitions."""
     
@@ -0,0 +1,90 @@
+"""Tests for gpmf.calibration module."""
+import numpy as np
+import pytest
+
+from gpmf import calibration
+from gpmf.gyro import GyroData, SensorTrack
+
+
+@pytest.fixture
+def recording():
+    """60 s at 200 Hz, at rest except for a rotation between 20 s and 40 s.
+
+    The bias drifts linearly with the temperature, which rises from 30 to 50 °C.
+    """
+    rng = np.random.default_rng(0)
+    time = np.arange(12000) / 200.0
+    temperature = 30.0 + time / 3.0
+    bias = np.column_stack([0.01 + 0.001 * (temperature - 40.0),
+                            -0.02 + 0.0005 * (temperature - 40.0),
+                            np.full(len(time), 0.005)])
+    moving = (time >= 20) & (time < 40)
+    gyro = bias + rng.normal(0, 0.002, (len(time), 3))
+    gyro[moving, 2] += 1.0
+    accel = np.tile([0.0, 0.0, 9.81], (len(time), 1)) + rng.normal(0, 0.02, (len(time), 3))
+    accel[moving, 0] += 3.0 * np.sin(np.arange(moving.sum()) / 10.0)
+    return time, gyro, accel, temperature, bias, moving
+
+
+class TestStationaryMask:
+    """Test the detection of stationary samples."""
+
+    def test_stationary_mask(self, recording):
+        time, gyro, accel, _, _, moving = recording
+        mask = calibration.stationary_mask(time, gyro, accel)
+        assert not (mask & moving).any()
+        assert mask[~moving].mean() > 0.95
+
+    def test_short_input(self):
+        assert calibration.stationary_mask([0.0], np.zeros((1, 3))).tolist() == [False]
+
+
+class TestBiasModel:
+    """Test the bias fit and correction."""
+
+    def test_fit_temperature_drift(self, recording):
+        time, gyro, accel, temperature, bias, moving = recording
+        model = calibration.fit_gyro_bias(gyro, temperature, ~moving)
+        assert model.coefficients.shape == (2, 3)
+        assert model.reference_temperature == pytest.approx(40.0, abs=0.5)
+        np.testing.assert_allclose(calibration.gyro_bias(model, temperature), bias, atol=5e-4)
+
+    def test_constant_bias(self, recording):
+        """Without temperature the bias is a constant."""
+        _, gyro, _, _, bias, moving = recording
+        model = calibration.fit_gyro_bias(gyro, mask=~moving)
+        assert model.coefficients.shape == (1, 3)
+        np.testing.assert_allclose(calibration.gyro_bias(model), bias[~moving].mean(axis=0),
+                                   atol=5e-4)
+        assert calibration.gyro_bias(model, n=4).shape == (4, 3)
+
+    def test_constant_temperature(self):
+        """The degree is lowered when the temperature does not vary."""
+        model = calibration.fit_gyro_bias(np.ones((10, 3)), np.full(10, 25.0), degree=2)
+        np.testing.assert_allclose(model.coefficients, [[1.0, 1.0, 1.0]])
+
+    def test_no_stationary_sample(self):
+        with pytest.raises(ValueError):
+            calibration.fit_gyro_bias(np.ones((10, 3)), mask=np.zeros(10, dtype=bool))
+
+    def test_estimate_and_correct(self, recording):
+        """Per-block temperatures are expanded to the samples."""
+        time, gyro, accel, temperature, bias, moving = recording
+        block_id = (time // 1).astype(np.int32)
+        gyro_track = SensorTrack(time, *gyro.T, block_id)
+        accel_track = SensorTrack(time, *accel.T, block_id)
+        blocks = [GyroData("", "", None, None, None, temperature[i * 200], "", 200)
+                  for i in range(60)]
+        model, sample_temperature = calibration.estimate_gyro_bias(
+            gyro_track, accel_track, calibration.block_temperatures(blocks))
+        assert len(sample_temperature) == len(time)
+
+        corrected = calibration.correct_gyro_track(gyro_track, model, sample_temperature)
+        residual = np.column_stack([corrected.x, corrected.y, corrected.z])[~moving]
+        np.testing.assert_allclose(residual.mean(axis=0), 0.0, atol=5e-4)
+        assert np.abs(residual.mean(axis=0)).max() < np.abs(gyro[~moving].mean(axis=0)).max()
+
+    def test_block_temperatures(self):
+        blocks = [GyroData("", "", None, None, None, t, "", 0) for t in (31.5, None)]
+        result = calibration.block_temperatures(blocks)
+        assert result[0] == 31.5 and np.isnan(result[1])
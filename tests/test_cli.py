@@ -101,7 +101,7 @@ class TestCommands:
     def test_command_registry(self):
         """Test that all commands are registered."""
         assert hasattr(__main__, 'COMMANDS')
-        assert 'gpx-extract' in __main__.COMMANDS
+        assert 'gps-extract' in __main__.COMMANDS
         assert 'gps-first' in __main__.COMMANDS
         assert 'gps-plot' in __main__.COMMANDS
     
@@ -137,6 +137,8 @@ class TestGPXExtract:
         args.gpx_version = '1.1'
         args.first_only = False
         args.no_speed = False
+        args.simplify = None
+        args.quality_filter = False
         
         # Execute command
         __main__.command_gpx_extract(args)
@@ -166,6 +168,8 @@ class TestGPXExtract:
         args.output_file = None
         args.output_directory = '/output'
         args.gpx_version = '1.1'
+        args.simplify = None
+        args.quality_filter = False
         
         # Execute command
         __main__.command_gpx_extract(args)
@@ -266,6 +270,11 @@ class TestGPSPlot:
         args.output_file = None
         args.output_directory = None
         args.first_only = False
+        args.simplify = None
+        args.files = []
+        args.jobs = None
+        args.tiles = None
+        args.tile_cache = None
         
         # Execute command
         __main__.command_gps_plot(args)
@@ -275,3 +284,199 @@ class TestGPSPlot:
         mock_plot.assert_called_once()
         mock_savefig.assert_called_once()
 
+
+class TestBatchPlot:
+    """Test gps-plot with several input files."""
+
+    def make_args(self, files, **kwargs):
+        args = MagicMock()
+        args.file = files[0]
+        args.files = files[1:]
+        args.output_file = None
+        args.output_directory = None
+        args.first_only = False
+        args.simplify = None
+        args.simplify_method = 'douglas-peucker'
+        args.jobs = 1
+        args.tiles = None
+        args.tile_cache = None
+        for key, value in kwargs.items():
+            setattr(args, key, value)
+        return args
+
+    def test_parse_args_many_files(self):
+        with patch('sys.argv', ['gpmf', 'gps-plot', 'a.mp4', 'b.mp4', 'c.mp4', '-j', '2',
+                                '-d', 'maps']):
+            args = __main__.parse_args()
+            assert [args.file] + args.files == ['a.mp4', 'b.mp4', 'c.mp4']
+            assert args.jobs == 2
+            assert args.output_directory == 'maps'
+
+    @pytest.mark.parametrize('jobs', ['0', '-1', 'two'])
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_parse_args_invalid_jobs(self, mock_stderr, jobs):
+        with patch('sys.argv', ['gpmf', 'gps-plot', 'a.mp4', '-j', jobs]):
+            with pytest.raises(SystemExit) as error:
+                __main__.parse_args()
+        assert error.value.code == 2
+        assert '--jobs' in mock_stderr.getvalue()
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_parse_args_output_file_many_inputs(self, mock_stderr):
+        with patch('sys.argv', ['gpmf', 'gps-plot', 'a.mp4', 'b.mp4', '-o', 'map.png']):
+            with pytest.raises(SystemExit) as error:
+                __main__.parse_args()
+        assert error.value.code == 2
+        assert '--output-file' in mock_stderr.getvalue()
+
+    @patch('gpmf.__main__.render_gps_plot')
+    def test_sequential(self, mock_render):
+        args = self.make_args(['in/a.mp4', 'in/b.mp4'], output_directory='maps')
+        __main__.command_gps_plot(args)
+        outputs = [call.args[1] for call in mock_render.call_args_list]
+        assert outputs == [os.path.join('maps', 'a.png'), os.path.join('maps', 'b.png')]
+
+    @patch('sys.stderr', new_callable=StringIO)
+    @patch('sys.stdout', new_callable=StringIO)
+    @patch('gpmf.__main__.render_gps_plot')
+    def test_sequential_errors(self, mock_render, mock_stdout, mock_stderr):
+        """A single worker reports like the pool: outputs printed, errors skipped."""
+        mock_render.side_effect = [RuntimeError('no GPS'), 'b.png']
+        args = self.make_args(['a.mp4', 'b.mp4'])
+        with pytest.raises(SystemExit) as error:
+            __main__.command_gps_plot(args)
+        assert error.value.code == 1
+        assert mock_render.call_count == 2
+        assert mock_stdout.getvalue() == 'b.png\n'
+        assert mock_stderr.getvalue() == 'a.mp4: no GPS\n'
+
+    @patch('sys.stderr', new_callable=StringIO)
+    @patch('gpmf.__main__.render_gps_plot')
+    def test_output_file_many_inputs(self, mock_render, mock_stderr):
+        args = self.make_args(['a.mp4', 'b.mp4'], output_file='map.png')
+        with pytest.raises(SystemExit) as error:
+            __main__.command_gps_plot(args)
+        assert error.value.code == 2
+        mock_render.assert_not_called()
+        assert '--output-file' in mock_stderr.getvalue()
+
+    @patch('sys.stderr', new_callable=StringIO)
+    def test_process_pool_errors(self, mock_stderr, tmp_path):
+        """Files failing in the workers are reported without stopping the batch."""
+        files = [str(tmp_path / ('missing%i.mp4' % i)) for i in range(3)]
+        cache = tmp_path / 'cache'
+        cache.mkdir()
+        args = self.make_args(files, jobs=2, tile_cache=str(cache))
+        with pytest.raises(SystemExit) as error:
+            __main__.command_gps_plot(args)
+        assert error.value.code == 1
+        errors = mock_stderr.getvalue()
+        assert all(f in errors for f in files)
+        # A user provided cache directory is kept
+        assert cache.exists()
+
+
+
+class TestSimplifyOption:
+    """Test the --simplify option."""
+
+    def test_parse_args_simplify(self):
+        """Test simplify tolerance parsing for gps-extract and gps-plot."""
+        for command in ['gps-extract', 'gps-plot']:
+            with patch('sys.argv', ['gpmf', command, 'test.mp4', '--simplify', '2.5',
+                                    '--simplify-method', 'visvalingam']):
+                args = __main__.parse_args()
+                assert args.simplify == 2.5
+                assert args.simplify_method == 'visvalingam'
+
+    def test_parse_args_simplify_default(self):
+        """Test that simplification is disabled by default."""
+        with patch('sys.argv', ['gpmf', 'gps-plot', 'test.mp4']):
+            args = __main__.parse_args()
+            assert args.simplify is None
+
+    @patch('gpmf.__main__.extract_gpmf_stream')
+    @patch('gpmf.__main__.extract_gps_blocks')
+    def test_command_gpx_extract_simplify(self, mock_extract_blocks, mock_extract_stream, tmp_path):
+        """Test GPX extraction with simplification of a straight track."""
+        import numpy as np
+        from gpmf import gps
+
+        mock_extract_stream.return_value = b'fake_stream'
+        mock_extract_blocks.return_value = ['block']
+        block = gps.GPSData(
+            description="GPS", timestamp="2024-01-12 10:00:00.000", precision=1.0, fix=3,
+            latitude=np.linspace(45.0, 45.001, 10), longitude=np.full(10, 5.0),
+            altitude=np.zeros(10), speed_2d=np.ones(10), speed_3d=np.ones(10),
+            units="m/s", npoints=10
+        )
+
+        args = MagicMock()
+        args.file = 'test.mp4'
+        args.output_file = str(tmp_path / 'out.gpx')
+        args.gpx_version = '1.1'
+        args.first_only = False
+        args.no_speed = False
+        args.simplify = 1.0
+        args.quality_filter = False
+        args.simplify_method = 'douglas-peucker'
+
+        with patch('gpmf.__main__.parse_gps_block', return_value=block):
+            __main__.command_gpx_extract(args)
+
+        content = (tmp_path / 'out.gpx').read_text(encoding='utf-8')
+        assert content.count('<trkpt') == 2
+
+    @patch('gpmf.__main__.extract_gpmf_stream')
+    @patch('gpmf.__main__.extract_gps_blocks')
+    def test_main_gps_extract_simplify(self, mock_extract_blocks, mock_extract_stream, tmp_path):
+        """The simplification options are reachable from the command line."""
+        import numpy as np
+        from gpmf import gps
+
+        mock_extract_stream.return_value = b'fake_stream'
+        mock_extract_blocks.return_value = ['block']
+        block = gps.GPSData(
+            description="GPS", timestamp="2024-01-12 10:00:00.000", precision=1.0, fix=3,
+            latitude=np.linspace(45.0, 45.001, 10), longitude=np.full(10, 5.0),
+            altitude=np.zeros(10), speed_2d=np.ones(10), speed_3d=np.ones(10),
+            units="m/s", npoints=10
+        )
+        output = tmp_path / 'out.gpx'
+        with patch('sys.argv', ['gpmf', 'gps-extract', 'test.mp4', '-o', str(output),
+                                '--simplify', '1', '--simplify-method', 'visvalingam']), \
+                patch('gpmf.__main__.parse_gps_block', return_value=block):
+            __main__.main()
+
+        assert output.read_text(encoding='utf-8').count('<trkpt') == 2
+
+    @patch('gpmf.__main__.extract_gpmf_stream')
+    @patch('gpmf.__main__.extract_gps_blocks')
+    def test_main_gps_extract_quality_filter(self, mock_extract_blocks, mock_extract_stream,
+                                             tmp_path):
+        """The quality filter options are reachable from the command line."""
+        import numpy as np
+        from gpmf import gps
+
+        mock_extract_stream.return_value = b'fake_stream'
+        mock_extract_blocks.return_value = ['good', 'bad']
+        blocks = {
+            name: gps.GPSData(
+                description="GPS", timestamp="2024-01-12 10:00:%02i.000" % second,
+                precision=precision, fix=3,
+                latitude=np.full(10, 45.0), longitude=np.full(10, 5.0),
+                altitude=np.zeros(10), speed_2d=np.zeros(10), speed_3d=np.zeros(10),
+                units="m/s", npoints=10
+            )
+            for name, second, precision in [('good', 0, 1.0), ('bad', 1, 9.0)]
+        }
+        output = tmp_path / 'out.gpx'
+        argv = ['gpmf', 'gps-extract', 'test.mp4', '-o', str(output), '--quality-filter',
+                '--precision-max', '5', '--max-gap', '2']
+        with patch('sys.argv', argv), \
+                patch('gpmf.__main__.parse_gps_block', side_effect=lambda b: blocks[b]):
+            __main__.main()
+
+        content = output.read_text(encoding='utf-8')
+        assert content.count('<trkseg') == 1
+        assert content.count('<trkpt') == 10
@@ -0,0 +1,81 @@
+"""Tests for gpmf.decimate module."""
+import numpy as np
+import pytest
+
+from gpmf import decimate
+from gpmf.gyro import SensorTrack
+
+
+@pytest.fixture
+def signal():
+    """10 s at 400 Hz: a 2 Hz sine and a 190 Hz vibration."""
+    time = np.arange(4000) / 400.0
+    slow = np.sin(2 * np.pi * 2 * time)
+    fast = np.sin(2 * np.pi * 190 * time)
+    return time, slow, fast
+
+
+class TestDecimate:
+    """Test anti-aliased decimation."""
+
+    def test_fir_times(self, signal):
+        """FIR output samples are aligned with every factor-th input sample."""
+        time, slow, _ = signal
+        out_time, out_values = decimate.decimate(time, slow, 10)
+        np.testing.assert_allclose(out_time, time[::10])
+        assert out_values.shape == (400,)
+
+    def test_mean_times(self, signal):
+        """Moving average outputs are at the centre of their block."""
+        time, slow, _ = signal
+        out_time, _ = decimate.decimate(time, slow, 4, method="mean")
+        np.testing.assert_allclose(out_time, time[:4000].reshape(-1, 4).mean(axis=1))
+
+    def test_passband(self, signal):
+        """Low frequencies go through the filter."""
+        time, slow, _ = signal
+        out_time, out_values = decimate.decimate(time, slow, 10)
+        inner = slice(20, -20)
+        np.testing.assert_allclose(out_values[inner],
+                                   np.sin(2 * np.pi * 2 * out_time[inner]), atol=0.02)
+
+    def test_anti_aliasing(self, signal):
+        """A vibration above the output Nyquist frequency is removed."""
+        time, slow, fast = signal
+        _, out_values = decimate.decimate(time, np.column_stack([slow, fast]), 10)
+        # 190 Hz aliases to 10 Hz with naive slicing
+        assert np.abs(fast[::10]).max() > 0.9
+        assert np.abs(out_values[20:-20, 1]).max() < 0.01
+
+    def test_chunked(self, signal):
+        """Chunked processing matches a single pass."""
+        time, slow, fast = signal
+        values = np.column_stack([slow, fast])
+        expected = decimate.decimate(time, values, 8)
+        result = decimate.decimate(time, values, 8, chunk_size=333)
+        np.testing.assert_allclose(result[0], expected[0])
+        np.testing.assert_allclose(result[1], expected[1])
+
+    def test_constant(self):
+        """A constant signal is preserved up to the edges."""
+        time = np.arange(100) / 100.0
+        _, out_values = decimate.decimate(time, np.full(100, 3.0), 5)
+        np.testing.assert_allclose(out_values, 3.0)
+
+    def test_invalid_arguments(self):
+        with pytest.raises(ValueError):
+            decimate.Decimator(4, method="median")
+        with pytest.raises(ValueError):
+            decimate.Decimator(0)
+
+    def test_empty_flush(self):
+        out_time, out_values = decimate.Decimator(4).flush()
+        assert len(out_time) == 0 and len(out_values) == 0
+
+    def test_decimate_sensor_track(self, signal):
+        """Tracks keep their block ids."""
+        time, slow, fast = signal
+        track = SensorTrack(time, slow, fast, slow, (time // 1).astype(np.int32))
+        result = decimate.decimate_sensor_track(track, 40)
+        assert len(result.time) == 100
+        assert result.block_id.tolist() == np.repeat(np.arange(10), 10).tolist()
@@ -0,0 +1,105 @@
+"""Tests for gpmf.events module."""
+import numpy as np
+import pytest
+
+from gpmf import events
+
+
+class TestRuns:
+    """Test run-length encoding and hysteresis."""
+
+    def test_runs(self):
+        starts, stops = events.runs([0, 1, 1, 0, 1, 0, 0, 1])
+        assert starts.tolist() == [1, 4, 7]
+        assert stops.tolist() == [3, 5, 8]
+
+    def test_runs_empty(self):
+        starts, stops = events.runs([])
+        assert len(starts) == len(stops) == 0
+
+    def test_hysteresis(self):
+        """Events start above the high threshold and end under the low one."""
+        signal = np.array([0, 2, 4, 3, 2, 1, 2, 3, 2, 5, 0])
+        mask = events.hysteresis(signal, high=3.5, low=1.5)
+        assert mask.astype(int).tolist() == [0, 0, 1, 1, 1, 0, 0, 0, 0, 1, 0]
+
+    def test_hysteresis_no_trigger(self):
+        assert not events.hysteresis(np.ones(5), high=2.0, low=0.5).any()
+
+    def test_intervals(self):
+        """Close runs are merged and short ones dropped."""
+        time = np.arange(12) * 0.1
+        mask = np.array([1, 1, 0, 1, 0, 0, 0, 0, 1, 0, 0, 0], dtype=bool)
+        starts, stops = events.intervals(time, mask, max_gap=0.25)
+        assert starts.tolist() == [0, 8]
+        assert stops.tolist() == [4, 9]
+        starts, stops = events.intervals(time, mask, min_duration=0.1, max_gap=0.25)
+        assert starts.tolist() == [0]
+
+
+class TestDetectors:
+    """Test the event detectors."""
+
+    @pytest.fixture
+    def accel(self):
+        """10 s at 200 Hz at rest, a 0.5 s free fall then a landing impact."""
+        time = np.arange(2000) / 200.0
+        norm = np.full(len(time), events.STANDARD_GRAVITY)
+        norm[1000:1100] = 0.05 * events.STANDARD_GRAVITY
+        norm[1100:1105] = 6.0 * events.STANDARD_GRAVITY
+        norm[1102] = 8.0 * events.STANDARD_GRAVITY
+        return time, np.column_stack([np.zeros_like(norm), np.zeros_like(norm), norm])
+
+    def test_detect_impacts(self, accel):
+        time, values = accel
+        found = events.detect_impacts(time, values)
+        assert len(found.start) == 1
+        assert found.start[0] == pytest.approx(5.5)
+        assert found.stop[0] == pytest.approx(5.52)
+        assert found.peak[0] == pytest.approx(8.0)
+        assert found.kind[0] == "impact"
+
+    def test_detect_free_fall(self, accel):
+        time, values = accel
+        found = events.detect_free_fall(time, values)
+        assert found.start.tolist() == [5.0]
+        assert found.stop[0] == pytest.approx(5.495)
+        assert found.peak[0] == pytest.approx(0.05)
+
+    def test_detect_hard_braking(self):
+        """Speed dropping at 6 m/s² for 2 s."""
+        time = np.datetime64("2020-01-01T00:00:00") + np.arange(100) * np.timedelta64(100, "ms")
+        speed = np.concatenate([np.full(40, 20.0), 20.0 - 0.6 * np.arange(1, 21),
+                                np.full(40, 8.0)])
+        found = events.detect_hard_braking(time, speed)
+        assert len(found.start) == 1
+        assert found.start[0] == time[40]
+        assert found.peak[0] == pytest.approx(6.0)
+
+    def test_peak_within_event(self):
+        """A short spike between two events does not count in their peaks."""
+        time = np.arange(80) * 0.1
+        steps = np.zeros(80)
+        steps[10:20] = 0.5
+        steps[40] = 1.5
+        steps[65:] = 0.5
+        speed = 30.0 - np.cumsum(steps)
+        found = events.detect_hard_braking(time, speed)
+        assert len(found.start) == 2
+        np.testing.assert_allclose(found.peak, [5.0, 5.0])
+        assert found.stop[1] == time[-1]
+
+    def test_detect_stops(self):
+        time = np.arange(60.0)
+        speed = np.full(60, 10.0)
+        speed[10:30] = 0.1
+        speed[40:42] = 0.0
+        found = events.detect_stops(time, speed)
+        assert found.start.tolist() == [10.0]
+        assert found.stop.tolist() == [29.0]
+
+    def test_concatenate_events(self, accel):
+        time, values = accel
+        found = events.concatenate_events(events.detect_impacts(time, values),
+                                          events.detect_free_fall(time, values))
+        assert found.kind.tolist() == ["free-fall", "impact"]
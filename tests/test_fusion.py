@@ -0,0 +1,112 @@
+"""Tests for gyroscope/accelerometer fusion."""
+import numpy as np
+import pytest
+from gpmf import fusion, gyro, quaternion
+
+
+def up_direction(q):
+    """Estimated up direction in the sensor frame."""
+    return quaternion.rotate(quaternion.conjugate(q), np.array([0.0, 0.0, 1.0]))
+
+
+class TestFuseIMU:
+    """Test the block Mahony/Madgwick filters."""
+
+    def test_initial_orientation(self):
+        a = np.array([0.3, -0.2, 0.9])
+        q = fusion.initial_orientation(a)
+        np.testing.assert_allclose(up_direction(q), a / np.linalg.norm(a), atol=1e-12)
+
+    def test_static_tilt(self):
+        n = 1000
+        accel = np.tile([0.0, 9.81 * np.sin(0.3), 9.81 * np.cos(0.3)], (n, 1))
+        q, _ = fusion.fuse_imu(np.arange(n) / 400.0, np.zeros((n, 3)), accel)
+        roll, pitch, _ = quaternion.to_euler(q[-1])
+        assert roll == pytest.approx(0.3, abs=1e-6)
+        assert pitch == pytest.approx(0.0, abs=1e-6)
+
+    @pytest.mark.parametrize("method", ["mahony", "madgwick"])
+    def test_gyro_bias_is_corrected(self, method):
+        n = 400 * 60
+        t = np.arange(n) / 400.0
+        omega = np.tile([0.02, 0.0, 0.0], (n, 1))
+        accel = np.tile([0.0, 0.0, 9.81], (n, 1))
+        q, _ = fusion.fuse_imu(t, omega, accel, method=method, kp=2.0, ki=0.1, beta=0.05)
+        drift = np.degrees(np.arccos(np.clip(up_direction(q[-1])[2], -1, 1)))
+        integrated = gyro.integrate_gyro(t, omega)[-1]
+        assert drift < 1.0
+        assert np.degrees(np.arccos(up_direction(integrated)[2])) > 60
+
+    def test_converges_from_wrong_state(self):
+        n = 400 * 20
+        accel = np.tile([0.0, 0.0, 9.81], (n, 1))
+        state = fusion.FusionState(quaternion.from_rotation_vector([0.5, 0.0, 0.0]),
+                                   np.zeros(3), -1 / 400.0, np.zeros(3))
+        q, _ = fusion.fuse_imu(np.arange(n) / 400.0, np.zeros((n, 3)), accel,
+                               method="madgwick", beta=0.2, state=state)
+        assert up_direction(q[-1])[2] == pytest.approx(1.0, abs=1e-6)
+
+    def test_yaw_follows_gyro(self):
+        n = 800
+        t = np.arange(n) / 400.0
+        omega = np.tile([0.0, 0.0, 1.0], (n, 1))
+        accel = np.tile([0.0, 0.0, 9.81], (n, 1))
+        q, _ = fusion.fuse_imu(t, omega, accel)
+        _, _, yaw = quaternion.to_euler(q[-1])
+        assert yaw == pytest.approx(t[-1], abs=1e-6)
+
+    def test_chunked_matches_single_call(self):
+        rng = np.random.default_rng(0)
+        n = 4096
+        t = np.arange(n) / 400.0
+        omega = rng.normal(0, 0.5, (n, 3))
+        accel = np.tile([0.0, 0.0, 9.81], (n, 1))
+        full, _ = fusion.fuse_imu(t, omega, accel, ki=0.1)
+        first, state = fusion.fuse_imu(t[:1024], omega[:1024], accel[:1024], ki=0.1)
+        second, _ = fusion.fuse_imu(t[1024:], omega[1024:], accel[1024:], ki=0.1, state=state)
+        np.testing.assert_allclose(np.vstack([first, second]), full, atol=1e-12)
+
+    @pytest.mark.parametrize("method", ["mahony", "madgwick"])
+    def test_split_does_not_change_output(self, method):
+        rng = np.random.default_rng(1)
+        n = 1000
+        t = np.arange(n) / 400.0
+        omega = rng.normal(0, 0.5, (n, 3))
+        accel = np.tile([0.0, 0.0, 9.81], (n, 1)) * rng.uniform(0.8, 1.2, (n, 1))
+        full, _ = fusion.fuse_imu(t, omega, accel, method=method, ki=0.1)
+        parts, state = [], None
+        for start, stop in [(0, 7), (7, 45), (45, 300), (300, 301), (301, n)]:
+            part, state = fusion.fuse_imu(t[start:stop], omega[start:stop], accel[start:stop],
+                                          method=method, ki=0.1, state=state)
+            parts.append(part)
+        np.testing.assert_allclose(np.vstack(parts), full, atol=1e-12)
+
+    def test_unknown_method(self):
+        with pytest.raises(ValueError):
+            fusion.fuse_imu([0.0], np.zeros((1, 3)), [[0, 0, 1.0]], method="kalman")
+
+
+class TestFuseTracks:
+    """Test fusion of SensorTrack objects on a common clock."""
+
+    def test_fuse_imu_tracks(self):
+        gyro_track = gyro.SensorTrack(np.arange(800) / 400.0, np.zeros(800), np.zeros(800),
+                                      np.ones(800), np.zeros(800, dtype=np.int32))
+        accel_track = gyro.SensorTrack(np.arange(400) / 200.0, np.zeros(400), np.zeros(400),
+                                       np.full(400, 9.81), np.zeros(400, dtype=np.int32))
+        orientation = fusion.fuse_imu_tracks(gyro_track, accel_track, rate=100.0, chunk_size=64)
+        assert orientation.quaternions.shape == (200, 4)
+        _, _, yaw = quaternion.to_euler(orientation.quaternions[-1])
+        assert yaw == pytest.approx(orientation.time[-1], abs=1e-6)
+
+    def test_chunk_size_does_not_change_output(self):
+        rng = np.random.default_rng(2)
+        n = 2000
+        gyro_track = gyro.SensorTrack(np.arange(n) / 400.0, *rng.normal(0, 0.5, (3, n)),
+                                      np.zeros(n, dtype=np.int32))
+        accel = np.array([0.0, 0.0, 9.81])[:, None] * rng.uniform(0.8, 1.2, n)
+        accel_track = gyro.SensorTrack(np.arange(n) / 400.0, *accel, np.zeros(n, dtype=np.int32))
+        full = fusion.fuse_imu_tracks(gyro_track, accel_track, chunk_size=n)
+        for chunk_size in (37, 500):
+            chunked = fusion.fuse_imu_tracks(gyro_track, accel_track, chunk_size=chunk_size)
+            np.testing.assert_allclose(chunked.quaternions, full.quaternions, atol=1e-12)
@@ -110,3 +110,49 @@ class TestGPSValidation:
                 npoints=1
             )
             assert gps_data.fix == fix_val
+
+
+class TestGPSTrack:
+    """Test concatenation of GPS blocks into per-point tracks."""
+
+    @staticmethod
+    def make_block(timestamp, npoints, fix=3):
+        import numpy as np
+        return gps.GPSData(
+            description="GPS", timestamp=timestamp, precision=1.5, fix=fix,
+            latitude=np.linspace(45.0, 45.001, npoints),
+            longitude=np.full(npoints, 5.0), altitude=np.zeros(npoints),
+            speed_2d=np.ones(npoints), speed_3d=np.ones(npoints),
+            units="m/s", npoints=npoints
+        )
+
+    def test_concatenate_gps_blocks(self):
+        """Samples are spread over the second following GPSU."""
+        import numpy as np
+        blocks = [self.make_block("2024-01-12 10:00:00.000", 10),
+                  self.make_block("2024-01-12 10:00:01.000", 10, fix=2)]
+        track = gps.concatenate_gps_blocks(blocks)
+        assert len(track.latitude) == 20
+        assert track.time[1] - track.time[0] == np.timedelta64(100, "ms")
+        assert track.time[10] == np.datetime64("2024-01-12T10:00:01")
+        assert track.fix.tolist() == [3] * 10 + [2] * 10
+        assert track.block_id.tolist() == [0] * 10 + [1] * 10
+
+    def test_concatenate_first_only(self):
+        """Only the first sample of each block is kept."""
+        blocks = [self.make_block("2024-01-12 10:00:00.000", 10),
+                  self.make_block("2024-01-12 10:00:01.000", 10)]
+        track = gps.concatenate_gps_blocks(blocks, first_only=True)
+        assert len(track.latitude) == 2
+
+    def test_concatenate_empty(self):
+        """An empty sequence gives an empty track."""
+        track = gps.concatenate_gps_blocks([])
+        assert len(track.time) == 0
+
+    def test_make_gpx_segment_from_track(self):
+        """Every track point becomes a GPX point."""
+        track = gps.concatenate_gps_blocks([self.make_block("2024-01-12 10:00:00.000", 5)])
+        segment = gps.make_gpx_segment_from_track(track)
+        assert len(segment.points) == 5
+        assert segment.points[0].type_of_gpx_fix == "3d"
@@ -1,4 +1,5 @@
 """Tests for gyroscope and accelerometer data extraction."""
+import io
 import pytest
 import numpy as np
 from collections import namedtuple
@@ -132,37 +133,294 @@ class TestGyroDataContainers:
         assert accel_data.temperature == 25.0
 
 
-class TestGyroIntegrationPlaceholders:
-    """Test placeholder implementations for future features."""
-    
-    def test_calculate_rotation_not_implemented(self):
-        """Test that rotation calculation raises NotImplementedError."""
-        gyro_data = gyro.GyroData(
-            description='Test',
-            timestamp='2024-01-12 10:00:00.000',
-            x=np.array([0.1]),
-            y=np.array([0.05]),
-            z=np.array([-0.025]),
-            temperature=25.0,
-            units='rad/s',
-            npoints=1
-        )
-        
-        with pytest.raises(NotImplementedError):
-            gyro.calculate_rotation_from_gyro(gyro_data)
-    
-    def test_gyroflow_export_not_implemented(self):
-        """Test that GyroFlow export raises NotImplementedError."""
-        gyro_data = gyro.GyroData(
-            description='Test',
-            timestamp='2024-01-12 10:00:00.000',
-            x=np.array([0.1]),
-            y=np.array([0.05]),
-            z=np.array([-0.025]),
-            temperature=25.0,
-            units='rad/s',
-            npoints=1
-        )
-        
-        with pytest.raises(NotImplementedError):
-            gyro.export_gyroflow_json(gyro_data)
+class TestSensorBlockExtraction:
+    """Test single-pass extraction of sensor streams."""
+
+    @pytest.fixture
+    def stream(self, klv):
+        """A DEVC with GYRO, ACCL, GPS5 and MAGN streams, repeated twice."""
+        def strm(fourcc, name):
+            return klv("STRM", "\x00", [
+                klv("STNM", "c", name),
+                klv("SCAL", "s", np.int16(10)),
+                klv(fourcc, "s", np.arange(6, dtype=np.int16).reshape(2, 3)),
+            ])
+        devc = klv("DEVC", "\x00", [
+            klv("DVNM", "c", b"Camera"),
+            strm("GYRO", b"Gyroscope"),
+            strm("ACCL", b"Accelerometer"),
+            strm("GPS5", b"GPS"),
+            strm("MAGN", b"Magnetometer"),
+        ])
+        return devc + devc
+
+    def test_extract_sensor_blocks(self, stream):
+        """Every requested stream is routed to its FourCC."""
+        keys = [key for key, _ in gyro.extract_sensor_blocks(stream)]
+        assert keys == ["GYRO", "ACCL", "MAGN"] * 2
+
+    def test_extract_sensor_blocks_any_fourcc(self, stream):
+        """Arbitrary FourCCs can be requested."""
+        blocks = list(gyro.extract_sensor_blocks(stream, ["GPS5"]))
+        assert len(blocks) == 2
+        assert blocks[0][1][0].value == "GPS"
+
+    def test_group_sensor_blocks(self, stream):
+        """Blocks are grouped by FourCC, missing sensors give empty lists."""
+        groups = gyro.group_sensor_blocks(stream, ["GYRO", "ACCL", "CORI"])
+        assert [len(groups[k]) for k in ["GYRO", "ACCL", "CORI"]] == [2, 2, 0]
+        accel = gyro.parse_accel_block(groups["ACCL"][0])
+        assert accel.x.tolist() == [0.0, 0.3]
+
+    def test_extract_gyro_and_accel_blocks(self, stream):
+        """Legacy generators use the single-pass extractor."""
+        gyro_blocks = list(gyro.extract_gyro_blocks(stream))
+        accel_blocks = list(gyro.extract_accel_blocks(stream))
+        assert len(gyro_blocks) == len(accel_blocks) == 2
+        assert gyro.parse_gyro_block(gyro_blocks[0]).description == "Gyroscope"
+
+
+class TestGyroIntegration:
+    """Test orientation integration from gyroscope data."""
+
+    def test_constant_yaw_rate(self):
+        """A constant rate about z integrates to a yaw angle."""
+        t = np.sort(np.random.default_rng(0).uniform(0, 2.0, 800))
+        omega = np.tile([0.0, 0.0, 1.0], (800, 1))
+        for method in ["rk4", "exp"]:
+            q = gyro.integrate_gyro(t, omega, method=method)
+            np.testing.assert_allclose(q[-1], [np.cos((t[-1] - t[0]) / 2), 0, 0,
+                                               np.sin((t[-1] - t[0]) / 2)], atol=1e-12)
+
+    def test_rk4_accuracy(self):
+        """RK4 tracks a time varying rotation better than the exponential map."""
+        from gpmf import quaternion
+        t = np.linspace(0, 1, 201)
+        omega = np.column_stack([np.sin(5 * t), np.cos(3 * t), t])
+        fine_t = np.linspace(0, 1, 20001)
+        fine_omega = np.column_stack([np.sin(5 * fine_t), np.cos(3 * fine_t), fine_t])
+        reference = gyro.integrate_gyro(fine_t, fine_omega)[-1]
+
+        def error(q):
+            return 1 - abs(np.dot(q, reference))
+
+        assert error(gyro.integrate_gyro(t, omega, method="rk4")[-1]) < 1e-9
+        assert error(gyro.integrate_gyro(t, omega, method="rk4")[-1]) < \
+            error(gyro.integrate_gyro(t, omega, method="exp")[-1])
+        assert np.allclose(np.linalg.norm(quaternion.normalize(reference)), 1.0)
+
+    def test_chunked_matches_single_pass(self):
+        """Chunked prefix products with carried state match a single scan."""
+        from gpmf import quaternion
+        rng = np.random.default_rng(1)
+        increments = quaternion.from_rotation_vector(rng.normal(0, 0.01, (1000, 3)))
+        np.testing.assert_allclose(quaternion.cumulative_product(increments, chunk_size=64),
+                                   quaternion.cumulative_product(increments), atol=1e-12)
+
+    def test_calculate_rotation_with_bias(self):
+        """Bias removal cancels a constant drift."""
+        n = 400
+        gyro_data = gyro.GyroData('Test', '', np.full(n, 0.01), np.zeros(n),
+                                  np.full(n, 0.02), None, 'rad/s', n)
+        roll, pitch, yaw = gyro.calculate_rotation_from_gyro(gyro_data, sample_rate=400.0)
+        assert yaw[-1] == pytest.approx(np.degrees(0.02 * (n - 1) / 400), rel=1e-3)
+        roll, pitch, yaw = gyro.calculate_rotation_from_gyro(gyro_data, bias="initial")
+        np.testing.assert_allclose([roll[-1], pitch[-1], yaw[-1]], 0.0, atol=1e-9)
+
+    def test_calculate_rotation_from_track(self):
+        """SensorTrack times are used for integration."""
+        track = gyro.SensorTrack(time=np.linspace(0, 1, 101), x=np.zeros(101),
+                                 y=np.zeros(101), z=np.full(101, np.pi / 2),
+                                 block_id=np.zeros(101, dtype=np.int32))
+        roll, pitch, yaw, q = gyro.calculate_rotation_from_gyro(track, return_quaternions=True)
+        assert yaw[-1] == pytest.approx(90.0)
+        assert q.shape == (101, 4)
+
+    def test_unknown_method(self):
+        """Unknown integration methods raise ValueError."""
+        with pytest.raises(ValueError):
+            gyro.integrate_gyro([0, 1], np.zeros((2, 3)), method="euler")
+
+
+class TestGyroFlowExport:
+    """Test streaming GyroFlow writers."""
+
+    @pytest.fixture
+    def blocks(self):
+        gyro_blocks = [
+            gyro.GyroData('Gyro', '', np.arange(4.0) + 4 * i, np.zeros(4), np.ones(4),
+                          None, 'rad/s', 4)
+            for i in range(3)
+        ]
+        accel_blocks = [
+            gyro.AccelData('Accel', '', np.full(2, 9.80665), np.zeros(2), np.zeros(2),
+                           None, 'm/s²', 2)
+            for i in range(3)
+        ]
+        return gyro_blocks, accel_blocks
+
+    def test_json_dict(self, blocks):
+        gyro_blocks, accel_blocks = blocks
+        result = gyro.export_gyroflow_json(gyro_blocks, accel_blocks)
+        assert result["columns"] == ["t", "gx", "gy", "gz", "ax", "ay", "az"]
+        assert len(result["samples"]) == 12
+        assert result["samples"][5] == pytest.approx([1.25, 5.0, 0.0, 1.0, 9.80665, 0.0, 0.0])
+
+    def test_json_file_from_generator(self, blocks, tmp_path):
+        import json
+        gyro_blocks, _ = blocks
+        path = tmp_path / "gyro.json"
+        assert gyro.export_gyroflow_json((b for b in gyro_blocks), output_path=str(path)) is None
+        result = json.loads(path.read_text(encoding="utf-8"))
+        assert [row[1] for row in result["samples"]] == list(range(12))
+
+    def test_json_chunked_track(self, blocks):
+        gyro_blocks, accel_blocks = blocks
+        track = gyro.concatenate_sensor_blocks(gyro_blocks)
+        accel_track = gyro.concatenate_sensor_blocks(accel_blocks)
+        chunked = gyro.export_gyroflow_json(track, accel_track, chunk_size=5)
+        assert chunked == gyro.export_gyroflow_json(gyro_blocks, accel_blocks)
+
+    def test_unequal_block_counts(self, blocks, tmp_path):
+        """Every gyroscope sample is written whatever the accelerometer blocks."""
+        gyro_blocks, _ = blocks
+        # Accelerometer ramp over two seconds, x = 10 * t
+        accel_blocks = [
+            gyro.AccelData('Accel', '', 10.0 * (i + np.arange(4) / 4.0), np.zeros(4),
+                           np.zeros(4), None, 'm/s²', 4)
+            for i in range(2)
+        ]
+        result = gyro.export_gyroflow_json(gyro_blocks, accel_blocks)
+        samples = np.array(result["samples"])
+        assert len(samples) == 12
+        np.testing.assert_allclose(samples[:8, 4], 10.0 * samples[:8, 0])
+        # Held at the last accelerometer sample
+        np.testing.assert_allclose(samples[8:, 4], 17.5)
+
+        single = gyro.export_gyroflow_json(gyro_blocks, accel_blocks[0])
+        assert len(single["samples"]) == 12
+
+        track = gyro.concatenate_sensor_blocks(gyro_blocks)
+        assert gyro.export_gyroflow_json(track, accel_blocks, chunk_size=5) == result
+
+        path = tmp_path / "gyro.gcsv"
+        gyro.export_gyroflow_gcsv(gyro_blocks, str(path), accel_blocks)
+        assert len(path.read_text(encoding="utf-8").splitlines()) == 10 + 12
+
+    def test_streamed_block_counts(self):
+        """Generators of both streams are read together, not concatenated."""
+        rng = np.random.default_rng(0)
+        gyro_blocks = [
+            gyro.GyroData('Gyro', '', rng.normal(size=8), np.zeros(8), np.zeros(8),
+                          None, 'rad/s', 8)
+            for i in range(6)
+        ]
+        accel_blocks = [
+            gyro.AccelData('Accel', '', rng.normal(size=3), np.zeros(3), np.zeros(3),
+                           None, 'm/s²', 3)
+            for i in range(4)
+        ]
+        read = []
+
+        def accel_generator():
+            for block in accel_blocks:
+                read.append(block)
+                yield block
+
+        chunks = gyro._imu_chunks((b for b in gyro_blocks), accel_generator())
+        time, _, accel = next(chunks)
+        # Only the blocks bracketing the first gyroscope block are read
+        assert len(read) == 2
+        chunks = [(time, accel)] + [(t, a) for t, _, a in chunks]
+        assert len(chunks) == 6
+
+        accel_track = gyro.concatenate_sensor_blocks(accel_blocks)
+        for time, accel in chunks:
+            np.testing.assert_allclose(accel[:, 0], np.interp(time, accel_track.time,
+                                                              accel_track.x))
+
+    def test_json_non_finite(self, blocks):
+        import json
+        gyro_blocks, _ = blocks
+        gyro_blocks[0] = gyro_blocks[0]._replace(y=np.array([np.nan, np.inf, -np.inf, 0.0]))
+        buffer = io.StringIO()
+        gyro.export_gyroflow_json(gyro_blocks, output_path=buffer)
+        result = json.loads(buffer.getvalue())
+        assert [row[2] for row in result["samples"][:4]] == [None, None, None, 0.0]
+
+    def test_gcsv(self, blocks, tmp_path):
+        gyro_blocks, accel_blocks = blocks
+        path = tmp_path / "gyro.gcsv"
+        gyro.export_gyroflow_gcsv(gyro_blocks, str(path), accel_blocks, video_filename="GX01.MP4")
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert lines[0] == "GYROFLOW IMU LOG"
+        assert "videofilename,GX01.MP4" in lines
+        header = lines.index("t,gx,gy,gz,ax,ay,az")
+        rows = lines[header + 1:]
+        assert len(rows) == 12
+        assert rows[1].split(",")[0] == "250000"
+        ascale = float([l for l in lines if l.startswith("ascale")][0].split(",")[1])
+        assert float(rows[1].split(",")[4]) * ascale == pytest.approx(1.0)
+
+    def test_gcsv_gyro_only(self, blocks, tmp_path):
+        gyro_blocks, _ = blocks
+        path = tmp_path / "gyro.gcsv"
+        gyro.export_gyroflow_gcsv(gyro_blocks[0], str(path))
+        lines = path.read_text(encoding="utf-8").splitlines()
+        assert lines[-5] == "t,gx,gy,gz"
+
+
+class TestOrientationStreams:
+    """Test CORI/IORI/GRAV decoding."""
+
+    @pytest.fixture
+    def stream(self, klv):
+        quaternions = np.array([[32767, 0, 0, 0], [23170, 0, 0, 23170]], dtype=np.int16)
+        gravity = np.array([[0, 0, 32767], [0, 23170, 23170]], dtype=np.int16)
+        devc = klv("DEVC", "\x00", [
+            klv("STRM", "\x00", [klv("STNM", "c", b"CameraOrientation"),
+                                 klv("SCAL", "s", np.int16(32767)),
+                                 klv("CORI", "s", quaternions)]),
+            klv("STRM", "\x00", [klv("SCAL", "s", np.int16(32767)),
+                                 klv("IORI", "s", quaternions[::-1])]),
+            klv("STRM", "\x00", [klv("SCAL", "s", np.int16(32767)),
+                                 klv("GRAV", "s", gravity)]),
+        ])
+        return devc + devc
+
+    def test_parse_orientation_block(self, stream):
+        _, block = next(gyro.extract_sensor_blocks(stream, ["CORI"]))
+        data = gyro.parse_orientation_block(block)
+        assert data.description == "CameraOrientation"
+        assert data.npoints == 2
+        np.testing.assert_allclose(np.linalg.norm(data.quaternions, axis=1), 1.0)
+        np.testing.assert_allclose(data.quaternions[1], [np.sqrt(0.5), 0, 0, np.sqrt(0.5)])
+
+    def test_parse_gravity_block(self, stream):
+        _, block = next(gyro.extract_sensor_blocks(stream, ["GRAV"]))
+        data = gyro.parse_gravity_block(block)
+        assert data.z[0] == pytest.approx(1.0)
+        assert data.y[1] == pytest.approx(np.sqrt(0.5))
+        np.testing.assert_allclose(np.linalg.norm([data.x, data.y, data.z], axis=0), 1.0)
+
+    def test_parse_gravity_block_normalised(self, klv):
+        gravity = np.array([[0, 16384, 0], [3000, 0, 4000], [0, 0, 0]], dtype=np.int16)
+        stream = klv("DEVC", "\x00", [
+            klv("STRM", "\x00", [klv("SCAL", "s", np.int16(32767)), klv("GRAV", "s", gravity)])])
+        _, block = next(gyro.extract_sensor_blocks(stream, ["GRAV"]))
+        data = gyro.parse_gravity_block(block)
+        np.testing.assert_allclose(np.column_stack([data.x, data.y, data.z]),
+                                   [[0, 1, 0], [0.6, 0, 0.8], [0, 0, 0]])
+
+    def test_extract_orientation(self, stream):
+        result = gyro.extract_orientation(stream)
+        np.testing.assert_allclose(result["CORI"].time, [0.0, 0.5, 1.0, 1.5])
+        assert result["CORI"].quaternions.shape == (4, 4)
+        np.testing.assert_allclose(result["IORI"].quaternions[0],
+                                   [np.sqrt(0.5), 0, 0, np.sqrt(0.5)])
+        assert len(result["GRAV"].x) == 4
+
+    def test_extract_orientation_missing_streams(self):
+        result = gyro.extract_orientation(b"")
+        assert result["CORI"].quaternions.shape == (0, 4)
+        assert len(result["GRAV"].time) == 0
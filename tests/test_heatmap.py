@@ -0,0 +1,126 @@
+"""Tests for gpmf.heatmap module."""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from gpmf import heatmap
+from gpmf.gps import GPSTrack
+
+
+def make_track(latitude, longitude, speed):
+    n = len(latitude)
+    return GPSTrack(latitude=np.asarray(latitude), longitude=np.asarray(longitude),
+                    altitude=np.zeros(n), speed_2d=np.asarray(speed, dtype=float),
+                    speed_3d=np.zeros(n), time=np.arange(n).astype("datetime64[s]"),
+                    precision=np.ones(n), fix=np.full(n, 3), block_id=np.zeros(n, dtype=int))
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(0)
+    return rng.uniform(0, 1000, 5000), rng.uniform(-500, 500, 5000), rng.uniform(0, 10, 5000)
+
+
+class TestHeatmapGrid:
+    """Test the grid accumulator."""
+
+    def test_counts(self, points):
+        """Counts match numpy.histogram2d over the same cells."""
+        x, y, _ = points
+        grid = heatmap.HeatmapGrid(cell_size=100.0).add_points(x, y)
+        xmin, xmax, ymin, ymax = grid.extent
+        assert grid.extent == (0.0, 1000.0, -500.0, 500.0)
+        expected, _, _ = np.histogram2d(y, x, bins=grid.count.shape,
+                                        range=[[ymin, ymax], [xmin, xmax]])
+        np.testing.assert_array_equal(grid.count, expected)
+
+    def test_incremental(self, points):
+        """Chunks growing the grid in every direction give the same result."""
+        x, y, speed = points
+        whole = heatmap.HeatmapGrid(cell_size=100.0).add_points(x, y, speed)
+        grid = heatmap.HeatmapGrid(cell_size=100.0)
+        order = np.argsort(np.hypot(x - 500, y))
+        for chunk in np.array_split(order, 10):
+            grid.add_points(x[chunk], y[chunk], speed[chunk])
+        assert grid.extent == whole.extent
+        np.testing.assert_array_equal(grid.count, whole.count)
+        np.testing.assert_allclose(grid.speed_sum, whole.speed_sum)
+
+    def test_merge(self, points):
+        x, y, speed = points
+        whole = heatmap.HeatmapGrid(cell_size=100.0).add_points(x, y, speed)
+        left = heatmap.HeatmapGrid(cell_size=100.0).add_points(x[x < 300], y[x < 300],
+                                                                speed[x < 300])
+        right = heatmap.HeatmapGrid(cell_size=100.0).add_points(x[x >= 300], y[x >= 300],
+                                                                 speed[x >= 300])
+        merged = left.merge(right).merge(heatmap.HeatmapGrid(cell_size=100.0))
+        np.testing.assert_array_equal(merged.count, whole.count)
+        np.testing.assert_allclose(merged.mean_speed(), whole.mean_speed())
+
+    def test_merge_mismatch(self):
+        with pytest.raises(ValueError):
+            heatmap.HeatmapGrid(cell_size=10.0).merge(heatmap.HeatmapGrid(cell_size=20.0))
+
+    def test_max_cells(self):
+        grid = heatmap.HeatmapGrid(cell_size=1.0, max_cells=100)
+        with pytest.raises(ValueError):
+            grid.add_points([0.0, 1000.0], [0.0, 1000.0])
+
+    def test_mean_speed(self):
+        grid = heatmap.HeatmapGrid(cell_size=10.0).add_points([1.0, 2.0, 25.0], [1.0, 2.0, 1.0],
+                                                                [2.0, 4.0, np.nan])
+        speed = grid.mean_speed()
+        assert speed[0, 0] == 3.0
+        assert np.isnan(speed[0, 1])
+        assert speed[0, 2] == 0.0
+
+    def test_add_track(self):
+        track = make_track([45.0, 45.0, np.nan], [5.0, 5.0, 5.0], [1.0, 3.0, 0.0])
+        grid = heatmap.HeatmapGrid().add_track(track)
+        assert grid.count.sum() == 2
+        assert grid.count.shape == (1, 1)
+        grid = heatmap.HeatmapGrid().add_track(track, mask=np.array([True, False, False]))
+        assert grid.count.sum() == 1
+
+
+class TestHeatmapPlot:
+    """Test gpmf.gps_plot.heatmap."""
+
+    @pytest.fixture
+    def tracks(self):
+        t = np.linspace(0, 1, 1000)
+        return [make_track(45.0 + 0.01 * t, 5.0 + 0.01 * t * k, 10 * t) for k in range(3)]
+
+    @pytest.mark.parametrize("value", ["count", "speed"])
+    def test_heatmap(self, tracks, value, tmp_path):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from gpmf import gps_plot
+
+        output = tmp_path / "heatmap.png"
+        with patch("gpmf.gps_plot.ctx.add_basemap") as add_basemap:
+            grid = gps_plot.heatmap(iter(tracks), value=value, output_path=str(output))
+        add_basemap.assert_called_once()
+        assert grid.count.sum() == 3000
+        assert output.exists()
+        plt.close("all")
+
+    def test_merge_grids(self, tracks):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from gpmf import gps_plot
+
+        partial = heatmap.HeatmapGrid().add_track(tracks[0])
+        grid = gps_plot.heatmap([partial, tracks[1]], basemap=False)
+        assert grid.count.sum() == 2000
+        plt.close("all")
+
+    def test_invalid(self, tracks):
+        from gpmf import gps_plot
+        with pytest.raises(ValueError):
+            gps_plot.heatmap(tracks, value="altitude")
+        with pytest.raises(ValueError):
+            gps_plot.heatmap([], basemap=False)
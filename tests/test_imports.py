@@ -0,0 +1,37 @@
+"""Tests for the lazy loading of the plotting dependencies."""
+import subprocess
+import sys
+
+import pytest
+
+
+HEAVY_MODULES = ["matplotlib", "geopandas", "contextily", "pandas"]
+
+
+def _run(code):
+    """Run python code in a fresh interpreter and return its stdout."""
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                            check=True)
+    return result.stdout.strip()
+
+
+class TestLazyImports:
+    """Test that parsing does not import the plotting dependencies."""
+
+    @pytest.mark.parametrize("module", ["gpmf", "gpmf.__main__"])
+    def test_no_heavy_imports(self, module):
+        loaded = _run("import sys, %s; print(' '.join(m for m in %r if m in sys.modules))"
+                      % (module, HEAVY_MODULES))
+        assert loaded == ""
+
+    def test_lazy_attribute(self):
+        """The plotting module is loaded on first access."""
+        loaded = _run("import sys, gpmf; gpmf.gps_plot.to_dataframe; "
+                      "print('matplotlib' in sys.modules)")
+        assert loaded == "True"
+
+    def test_dir_and_missing_attribute(self):
+        import gpmf
+        assert "gps_plot" in dir(gpmf)
+        with pytest.raises(AttributeError):
+            gpmf.not_a_module
@@ -0,0 +1,102 @@
+"""Tests for Kalman / RTS smoothing of GPS tracks."""
+
+import numpy as np
+import pytest
+from gpmf import gps, kalman
+
+
+def reference_smoother(t, z, std, q, p0=100.0, u=None):
+    """Textbook per-sample Kalman filter and RTS smoother."""
+    n = len(z)
+    u = np.zeros(n) if u is None else u
+    H = np.array([[1.0, 0.0]])
+    xf, Pf, xp, Pp, Fs = [], [], [], [], []
+    x = np.array([z[0], 0.0])
+    P = np.diag([std[0] ** 2, p0])
+    xf.append(x), Pf.append(P), xp.append(x), Pp.append(P), Fs.append(np.eye(2))
+    for k in range(1, n):
+        h = t[k] - t[k - 1]
+        F = np.array([[1.0, h], [0.0, 1.0]])
+        Q = q * np.array([[h ** 3 / 3, h ** 2 / 2], [h ** 2 / 2, h]])
+        x = F @ x + np.array([0.5 * h * h, h]) * u[k]
+        P = F @ P @ F.T + Q
+        xp.append(x), Pp.append(P), Fs.append(F)
+        S = (H @ P @ H.T)[0, 0] + std[k] ** 2
+        K = (P @ H.T)[:, 0] / S
+        x = x + K * (z[k] - x[0])
+        P = (np.eye(2) - np.outer(K, H)) @ P
+        xf.append(x), Pf.append(P)
+    xs = [xf[-1]]
+    for k in range(n - 2, -1, -1):
+        C = Pf[k] @ Fs[k + 1].T @ np.linalg.inv(Pp[k + 1])
+        xs.append(xf[k] + C @ (xs[-1] - xp[k + 1]))
+    return np.array(xf), np.array(xs[::-1])
+
+
+class TestKalmanSmooth:
+    """Test the array smoother against a reference implementation."""
+
+    @pytest.fixture
+    def signal(self):
+        rng = np.random.default_rng(1)
+        t = np.cumsum(rng.uniform(0.05, 0.15, 200))
+        truth = 3.0 * t + np.sin(t)
+        std = rng.uniform(1.0, 3.0, 200)
+        return t, truth, truth + rng.normal(0, std), std
+
+    def test_matches_reference_filter(self, signal):
+        t, _, z, std = signal
+        expected, _ = reference_smoother(t, z, std, 0.5)
+        position, velocity = kalman.kalman_smooth(t, z, std, process_noise=0.5, smooth=False)
+        np.testing.assert_allclose(position, expected[:, 0], rtol=1e-8, atol=1e-8)
+        np.testing.assert_allclose(velocity, expected[:, 1], rtol=1e-8, atol=1e-8)
+
+    def test_matches_reference_smoother(self, signal):
+        t, _, z, std = signal
+        _, expected = reference_smoother(t, z, std, 0.5)
+        position, velocity = kalman.kalman_smooth(t, z, std, process_noise=0.5)
+        np.testing.assert_allclose(position, expected[:, 0], rtol=1e-8, atol=1e-8)
+        np.testing.assert_allclose(velocity, expected[:, 1], rtol=1e-8, atol=1e-8)
+
+    def test_matches_reference_with_acceleration(self, signal):
+        t, _, z, std = signal
+        u = np.cos(t)
+        _, expected = reference_smoother(t, z, std, 0.1, u=u)
+        position, _ = kalman.kalman_smooth(t, z, std, process_noise=0.1, acceleration=u)
+        np.testing.assert_allclose(position, expected[:, 0], rtol=1e-8, atol=1e-8)
+
+    def test_reduces_noise(self, signal):
+        t, truth, z, std = signal
+        position, _ = kalman.kalman_smooth(t, np.column_stack([z, z]), std)
+        assert np.sqrt(np.mean((position[:, 0] - truth) ** 2)) < np.sqrt(np.mean((z - truth) ** 2))
+
+    @pytest.mark.slow
+    def test_one_hour_at_10hz(self):
+        n = 36000
+        t = np.arange(n) * 0.1
+        z = np.random.default_rng(0).normal(0, 1, (n, 2))
+        position, _ = kalman.kalman_smooth(t, z, 2.0)
+        assert position.shape == (n, 2)
+        assert np.all(np.isfinite(position))
+
+
+class TestSmoothTrack:
+    """Test smoothing of GPSTrack objects."""
+
+    def test_smooth_track(self):
+        n = 50
+        rng = np.random.default_rng(2)
+        latitude = 45.0 + np.arange(n) * 1e-5
+        block = gps.GPSData(
+            description="GPS", timestamp="2024-01-12 10:00:00.000", precision=1.0, fix=3,
+            latitude=latitude + rng.normal(0, 2e-5, n), longitude=np.full(n, 5.0),
+            altitude=rng.normal(100.0, 3.0, n), speed_2d=np.ones(n), speed_3d=np.ones(n),
+            units="m/s", npoints=n
+        )
+        track = gps.concatenate_gps_blocks([block])
+        smoothed = kalman.smooth_track(track)
+        assert len(smoothed.latitude) == n
+        error = np.abs(smoothed.latitude - latitude).mean()
+        assert error < np.abs(track.latitude - latitude).mean()
+        assert smoothed.altitude.std() < track.altitude.std()
+        assert (smoothed.speed_3d >= smoothed.speed_2d).all()
@@ -0,0 +1,95 @@
+"""Tests for gpmf.lod module."""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from gpmf import lod
+
+
+class TestDecimation:
+    """Test the screen resolution decimation."""
+
+    def test_pixel_indices(self):
+        column, row = lod.pixel_indices([0.0, 0.5, 1.0], [0.0, 0.26, 1.0], 4, 4)
+        assert column.tolist() == [0, 2, 3]
+        assert row.tolist() == [0, 1, 3]
+
+    def test_pixel_indices_degenerate(self):
+        """A single point or a straight line does not divide by zero."""
+        column, row = lod.pixel_indices([1.0, 1.0], [2.0, 3.0], 10, 10)
+        assert column.tolist() == [0, 0]
+        assert row.tolist() == [0, 9]
+
+    def test_decimate_points(self):
+        """At most one point per pixel."""
+        rng = np.random.default_rng(0)
+        x, y = rng.random((2, 100000))
+        index = lod.decimate_points(x, y, 50, 40)
+        assert len(index) == 2000
+        assert np.all(np.diff(index) > 0)
+
+    def test_decimate_path(self):
+        """A dense back and forth path keeps its turning points."""
+        t = np.linspace(0, 1, 100001)
+        x = t
+        y = np.where(t < 0.5, t, 1 - t)
+        index = lod.decimate_path(x, y, 100, 100)
+        assert index[0] == 0 and index[-1] == len(t) - 1
+        assert len(index) <= 2 * (100 + 100)
+        # Every dropped point lies in the pixel of the previous kept one
+        column, row = lod.pixel_indices(x, y, 100, 100)
+        kept = np.searchsorted(index, np.arange(len(t)), side="right") - 1
+        assert np.all(column == column[index[kept]])
+        assert np.all(row == row[index[kept]])
+
+    def test_decimate_short_path(self):
+        assert lod.decimate_path([0.0, 1.0], [0.0, 1.0], 10, 10).tolist() == [0, 1]
+
+    def test_path_segments(self):
+        segments = lod.path_segments(np.array([0.0, 1.0, 2.0]), np.array([0.0, 1.0, 0.0]))
+        assert segments.shape == (2, 2, 2)
+        assert segments[1].tolist() == [[1.0, 1.0], [2.0, 0.0]]
+
+
+class TestLodPlot:
+    """Test plot_gps_trace with level of detail."""
+
+    @pytest.fixture
+    def latlon(self):
+        t = np.linspace(0, 1, 200000)
+        return np.column_stack([44.0 + 0.05 * np.sin(6 * t), 5.0 + 0.05 * t])
+
+    @pytest.mark.parametrize("style", ["scatter", "line"])
+    def test_plot_styles(self, latlon, style):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from gpmf import gps_plot
+
+        with patch("gpmf.gps_plot.ctx.add_basemap"):
+            gps_plot.plot_gps_trace(latlon, figsize=(2, 2), style=style)
+        ax = plt.gca()
+        assert len(ax.collections) == 1
+        collection = ax.collections[0]
+        drawn = len(collection.get_offsets()) if style == "scatter" \
+            else len(collection.get_segments())
+        # 2 in at 100 dpi
+        assert drawn < 2 * 200 * 2
+        plt.close("all")
+
+    def test_without_lod(self, latlon):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from gpmf import gps_plot
+
+        with patch("gpmf.gps_plot.ctx.add_basemap"):
+            gps_plot.plot_gps_trace(latlon[:1000], figsize=(2, 2), style="line", lod=False)
+        assert len(plt.gca().collections[0].get_segments()) == 999
+        plt.close("all")
+
+    def test_invalid_style(self, latlon):
+        from gpmf import gps_plot
+        with pytest.raises(ValueError):
+            gps_plot.plot_gps_trace(latlon, style="heatmap")
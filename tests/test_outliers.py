@@ -0,0 +1,100 @@
+"""Tests for gpmf.outliers module."""
+import numpy as np
+import pytest
+
+from gpmf import outliers
+from gpmf.gps import GPSTrack
+
+
+@pytest.fixture
+def samples():
+    return np.random.default_rng(0).standard_normal(200000)
+
+
+class TestQuantileSketch:
+    """Test the streaming quantile sketch."""
+
+    def test_accuracy(self, samples):
+        """Rank error of the estimated quantiles, tails included."""
+        sketch = outliers.QuantileSketch()
+        for chunk in np.array_split(samples, 37):
+            sketch.update(chunk)
+        q = np.array([0.001, 0.01, 0.1, 0.5, 0.9, 0.99, 0.999])
+        ranks = np.searchsorted(np.sort(samples), sketch.quantile(q)) / len(samples)
+        np.testing.assert_allclose(ranks, q, atol=2e-3)
+        assert sketch.count == len(samples)
+        assert len(sketch.means) <= 200
+
+    def test_extremes(self, samples):
+        sketch = outliers.QuantileSketch().update(samples)
+        assert sketch.quantile(0.0) == samples.min()
+        assert sketch.quantile(1.0) == samples.max()
+
+    def test_merge(self, samples):
+        """Merged sketches of two halves match a sketch of the whole."""
+        left = outliers.QuantileSketch().update(samples[:50000])
+        right = outliers.QuantileSketch().update(samples[50000:])
+        merged = left.merge(right)
+        whole = outliers.QuantileSketch().update(samples)
+        np.testing.assert_allclose(merged.quantile([0.01, 0.5, 0.99]),
+                                   whole.quantile([0.01, 0.5, 0.99]), atol=0.02)
+
+    def test_empty(self):
+        sketch = outliers.QuantileSketch().update([np.nan])
+        assert np.isnan(sketch.quantile(0.5))
+        assert sketch.count == 0
+
+    def test_filter_outliers(self, samples):
+        """The sketch based filter agrees with the exact one."""
+        from gpmf import gps_plot
+        data = np.concatenate([samples, [100.0, -50.0]])
+        sketch = outliers.QuantileSketch().update(data)
+        exact = gps_plot.filter_outliers(data)
+        approx = gps_plot.filter_outliers(data, sketch=sketch)
+        assert not approx[-2:].any()
+        assert np.mean(exact != approx) < 1e-3
+
+
+class TestHampelFilter:
+    """Test the streaming Hampel filter."""
+
+    @pytest.fixture
+    def signal(self):
+        rng = np.random.default_rng(1)
+        values = np.sin(np.linspace(0, 20, 10000)) + 0.01 * rng.standard_normal(10000)
+        spikes = np.array([30, 500, 501, 7000, 9998])
+        values[spikes] += 5.0
+        return values, spikes
+
+    def test_spikes(self, signal):
+        values, spikes = signal
+        mask = outliers.hampel_filter(values, window=21, n_sigmas=6.0)
+        assert mask.shape == values.shape
+        # The last spike has no complete window
+        np.testing.assert_array_equal(np.flatnonzero(~mask), spikes[:-1])
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 5, 333])
+    def test_chunks(self, signal, chunk_size):
+        """Chunked filtering matches the one-shot result."""
+        values, _ = signal
+        np.testing.assert_array_equal(
+            outliers.hampel_filter(values[:2000], window=9, chunk_size=chunk_size),
+            outliers.hampel_filter(values[:2000], window=9))
+
+    def test_short(self):
+        assert outliers.hampel_filter(np.array([1.0, 100.0, 1.0])).tolist() == [True] * 3
+
+    def test_invalid_window(self):
+        with pytest.raises(ValueError):
+            outliers.HampelFilter(window=4)
+
+    def test_track(self):
+        n = 100
+        latitude = 45.0 + 1e-5 * np.arange(n)
+        longitude = 5.0 + 1e-5 * np.arange(n)
+        longitude[40] += 0.01
+        track = GPSTrack(latitude=latitude, longitude=longitude,
+                         altitude=np.zeros(n), speed_2d=np.zeros(n), speed_3d=np.zeros(n),
+                         time=np.arange(n).astype("datetime64[s]"), precision=np.ones(n),
+                         fix=np.full(n, 3), block_id=np.zeros(n, dtype=int))
+        assert np.flatnonzero(~outliers.track_outlier_mask(track)).tolist() == [40]
@@ -0,0 +1,45 @@
+"""Tests for gpmf.projection module."""
+import numpy as np
+import pytest
+
+from gpmf import projection
+
+
+class TestProjection:
+    """Test cached coordinate projections."""
+
+    def test_transformer_cache(self):
+        """Transformers are built once per pair of coordinate systems."""
+        a = projection.get_transformer("EPSG:4326", "EPSG:2154")
+        b = projection.get_transformer("EPSG:4326", "EPSG:2154")
+        assert a is b
+        assert projection.get_transformer("EPSG:4326", "EPSG:3857") is not a
+
+    def test_unhashable_crs(self):
+        from pyproj import CRS
+        target = CRS.from_user_input("EPSG:3857").to_json_dict()
+        x, _ = projection.project([180.0], [0.0], target)
+        assert x[0] == pytest.approx(20037508.342789244)
+
+    def test_project(self):
+        """Longitude first, as arrays."""
+        x, y = projection.project(np.array([0.0, 3.0]), np.array([0.0, 46.5]), "EPSG:3857")
+        assert x.shape == (2,)
+        assert x[0] == pytest.approx(0.0) and y[0] == pytest.approx(0.0)
+        # Lambert 93 origin
+        x, y = projection.project([3.0], [46.5], "EPSG:2154")
+        assert x[0] == pytest.approx(700000.0) and y[0] == pytest.approx(6600000.0)
+
+    def test_round_trip(self):
+        lon = np.linspace(4.0, 6.0, 1000)
+        lat = np.linspace(43.0, 45.0, 1000)
+        x, y = projection.project(lon, lat, "EPSG:2154")
+        back_lon, back_lat = projection.project(x, y, "EPSG:4326", source="EPSG:2154")
+        np.testing.assert_allclose(back_lon, lon, atol=1e-9)
+        np.testing.assert_allclose(back_lat, lat, atol=1e-9)
+
+    def test_transform_bounds(self):
+        left, bottom, right, top = projection.transform_bounds(
+            -180.0, 0.0, 180.0, 85.0511287798, "EPSG:4326", "EPSG:3857")
+        assert right == pytest.approx(20037508.342789244)
+        assert top == pytest.approx(20037508.342789244, rel=1e-6)
@@ -0,0 +1,110 @@
+"""Tests for gpmf.pyramid module."""
+import json
+
+import numpy as np
+import pytest
+
+from gpmf import pyramid
+from gpmf.gps import GPSTrack
+
+
+@pytest.fixture
+def track():
+    """An hour at 10 Hz along a wavy line."""
+    t = np.linspace(0, 1, 36000)
+    latitude = 45.0 + 0.1 * t + 0.002 * np.sin(40 * np.pi * t)
+    longitude = 5.0 + 0.1 * t
+    return latitude, longitude
+
+
+class TestPyramid:
+    """Test the multi-resolution pyramid."""
+
+    def test_resolution(self):
+        assert pyramid.zoom_resolution(0) == pytest.approx(156543.03, rel=1e-6)
+        assert pyramid.zoom_resolution(1, 60.0) == pytest.approx(156543.03 / 4, rel=1e-6)
+
+    def test_levels(self, track):
+        latitude, longitude = track
+        levels = pyramid.build_pyramid(latitude, longitude, min_zoom=6, max_zoom=16)
+        # Zoom ranges cover [min_zoom, max_zoom] without gaps
+        assert levels[0].min_zoom == 6 and levels[-1].max_zoom == 16
+        for coarse, fine in zip(levels[:-1], levels[1:]):
+            assert fine.min_zoom == coarse.max_zoom + 1
+            # Nested levels, growing with the zoom
+            assert np.all(np.isin(coarse.index, fine.index))
+            assert len(coarse.index) < len(fine.index)
+            assert coarse.tolerance > fine.tolerance
+        assert len(levels[-1].index) < len(latitude) // 10
+        for level in levels:
+            assert level.index[0] == 0 and level.index[-1] == len(latitude) - 1
+
+    def test_invalid_zooms(self, track):
+        with pytest.raises(ValueError):
+            pyramid.build_pyramid(*track, min_zoom=10, max_zoom=5)
+
+    def test_non_finite(self, track):
+        latitude, longitude = track
+        latitude = latitude.copy()
+        latitude[10] = np.nan
+        with pytest.raises(ValueError):
+            pyramid.build_pyramid(latitude, longitude)
+
+    def test_geojson(self, track):
+        latitude, longitude = track
+        levels = pyramid.build_pyramid(latitude, longitude, min_zoom=8, max_zoom=12)
+        collection = pyramid.pyramid_geojson(latitude, longitude, levels)
+        assert len(collection["features"]) == len(levels)
+        feature = collection["features"][0]
+        assert feature["geometry"]["coordinates"][0] == [5.0, 45.0]
+        assert feature["properties"]["npoints"] == len(levels[0].index)
+        json.dumps(collection)
+
+    def test_geojson_levels(self, track, tmp_path):
+        latitude, longitude = track
+        levels = pyramid.build_pyramid(latitude, longitude, min_zoom=8, max_zoom=12)
+        paths = pyramid.write_geojson_levels(str(tmp_path / "web"), latitude, longitude, levels)
+        index = json.loads((tmp_path / "web" / "levels.json").read_text())
+        assert [entry["file"] for entry in index] == [p.split("/")[-1] for p in paths]
+        with open(paths[-1]) as level_file:
+            feature = json.load(level_file)
+        assert len(feature["geometry"]["coordinates"]) == len(levels[-1].index)
+
+    def test_html(self, track, tmp_path):
+        latitude, longitude = track
+        n = len(latitude)
+        gps_track = GPSTrack(latitude=latitude, longitude=longitude, altitude=np.zeros(n),
+                             speed_2d=np.zeros(n), speed_3d=np.zeros(n),
+                             time=np.arange(n).astype("datetime64[ms]"), precision=np.ones(n),
+                             fix=np.full(n, 3), block_id=np.zeros(n, dtype=int))
+        path = tmp_path / "track.html"
+        levels = pyramid.write_track_html(str(path), gps_track, max_zoom=14,
+                                          title="</script><b>ride</b>")
+        page = path.read_text()
+        assert "&lt;/script&gt;&lt;b&gt;ride" in page
+        assert page.count("</script>") == 2
+        data = page.split("var pyramid = ", 1)[1].split(";\n", 1)[0]
+        collection = json.loads(data)
+        assert [f["properties"]["max_zoom"] for f in collection["features"]] == \
+            [level.max_zoom for level in levels]
+        assert levels[-1].max_zoom == 14
+
+    def test_html_tiles_escaped(self, track, tmp_path):
+        """The tile URL is embedded as a JavaScript string literal."""
+        latitude, longitude = track
+        levels = pyramid.build_pyramid(latitude, longitude, min_zoom=8, max_zoom=10)
+        tiles = 'https://tiles.example/{z}/{x}/{y}.png?key="a"</script>'
+        path = tmp_path / "track.html"
+        pyramid.write_html(str(path), latitude, longitude, levels, tiles=tiles)
+        page = path.read_text()
+        assert page.count("</script>") == 2
+        literal = page.split("L.tileLayer(", 1)[1].split(", {", 1)[0]
+        assert json.loads(literal) == tiles
+
+    def test_html_empty_track(self, tmp_path):
+        """An empty track would leave the map without bounds."""
+        path = tmp_path / "track.html"
+        levels = pyramid.build_pyramid([], [])
+        with pytest.raises(ValueError):
+            pyramid.write_html(str(path), [], [], levels)
+        assert not path.exists()
@@ -0,0 +1,97 @@
+"""Tests for GPS quality filtering and segmentation."""
+import numpy as np
+from gpmf import gps, quality
+
+
+def make_track(n=20, precision=1.0, fix=3):
+    """Build a 10 Hz track heading north at about 1 m/s."""
+    block = gps.GPSData(
+        description="GPS", timestamp="2024-01-12 10:00:00.000", precision=precision, fix=fix,
+        latitude=45.0 + np.arange(n) * 1e-6, longitude=np.full(n, 5.0),
+        altitude=np.zeros(n), speed_2d=np.ones(n), speed_3d=np.ones(n),
+        units="m/s", npoints=n
+    )
+    track = gps.concatenate_gps_blocks([block])
+    time = np.datetime64("2024-01-12T10:00:00", "us") + \
+        (np.arange(n) * 100000).astype("timedelta64[us]")
+    return track._replace(time=time)
+
+
+class TestQualityMask:
+    """Test the combined quality mask."""
+
+    def test_good_track(self):
+        """A clean track is fully kept."""
+        assert quality.quality_mask(make_track()).all()
+
+    def test_precision_and_fix(self):
+        """Points with high DOP or no fix are dropped."""
+        track = make_track()
+        precision = track.precision.copy()
+        precision[3] = 10.0
+        fix = track.fix.copy()
+        fix[5] = 0
+        mask = quality.quality_mask(track._replace(precision=precision, fix=fix))
+        assert np.flatnonzero(~mask).tolist() == [3, 5]
+
+    def test_position_spike(self):
+        """An isolated position jump is dropped, its neighbours are kept."""
+        track = make_track()
+        latitude = track.latitude.copy()
+        latitude[10] += 0.01
+        mask = quality.quality_mask(track._replace(latitude=latitude))
+        assert np.flatnonzero(~mask).tolist() == [10]
+
+    def test_speed_spike(self):
+        """An isolated speed reading implying huge accelerations is dropped."""
+        track = make_track()
+        speed_3d = track.speed_3d.copy()
+        speed_3d[-1] = 50.0
+        mask = quality.quality_mask(track._replace(speed_3d=speed_3d))
+        assert np.flatnonzero(~mask).tolist() == [19]
+
+    def test_disabled_criteria(self):
+        """Criteria can be disabled with None."""
+        track = make_track(fix=0)
+        assert not quality.quality_mask(track).any()
+        assert quality.quality_mask(track, min_fix=None).all()
+
+
+class TestSegmentation:
+    """Test fix-aware segmentation."""
+
+    def test_split_on_fix_loss(self):
+        """A loss of fix starts a new segment."""
+        track = make_track()
+        fix = track.fix.copy()
+        fix[8:10] = 0
+        track = track._replace(fix=fix)
+        ids = quality.segment_track(track, quality.quality_mask(track))
+        assert ids[:8].tolist() == [0] * 8
+        assert ids[8:10].tolist() == [-1, -1]
+        assert ids[10:].tolist() == [1] * 10
+
+    def test_split_on_gap(self):
+        """A long time gap starts a new segment."""
+        track = make_track()
+        time = track.time.copy()
+        time[10:] += np.timedelta64(5, "s")
+        segments = quality.split_track(track, quality.segment_track(track._replace(time=time)))
+        assert [len(s.latitude) for s in segments] == [10, 10]
+
+    def test_dropped_spike_keeps_segment(self):
+        """A dropped outlier does not break the segment."""
+        track = make_track()
+        latitude = track.latitude.copy()
+        latitude[10] += 0.01
+        segments = quality.filter_track(track._replace(latitude=latitude))
+        assert len(segments) == 1
+        assert len(segments[0].latitude) == 19
+
+    def test_make_gpx_track(self):
+        """Each segment becomes a GPX segment."""
+        track = make_track()
+        fix = track.fix.copy()
+        fix[10] = 0
+        gpx_track = gps.make_gpx_track(quality.filter_track(track._replace(fix=fix)))
+        assert [len(s.points) for s in gpx_track.segments] == [10, 9]
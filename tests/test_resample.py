@@ -0,0 +1,97 @@
+"""Tests for telemetry resampling."""
+import pytest
+import numpy as np
+from gpmf import gps, gyro, resample
+
+
+class TestClocks:
+    """Test target clock helpers."""
+
+    def test_frame_times(self):
+        """Frame times follow the frame rate."""
+        t = resample.frame_times(3, 60000 / 1001)
+        np.testing.assert_allclose(t, [0.0, 1001 / 60000, 2002 / 60000])
+
+    def test_uniform_times(self):
+        """Uniform clock covers [start, stop)."""
+        np.testing.assert_allclose(resample.uniform_times(0.0, 2.0, 1.0), [0.0, 1.0])
+
+
+class TestInterpolation:
+    """Test linear and spherical interpolation."""
+
+    def test_linear_2d(self):
+        """Columns are interpolated with shared weights."""
+        values = np.array([[0.0, 10.0], [1.0, 20.0]])
+        out = resample.interpolate_linear([0.0, 1.0], values, [0.25, 0.5])
+        np.testing.assert_allclose(out, [[0.25, 12.5], [0.5, 15.0]])
+
+    def test_linear_holds_ends(self):
+        """Targets outside the source range are not extrapolated."""
+        out = resample.interpolate_linear([0.0, 1.0], [1.0, 2.0], [-1.0, 5.0])
+        np.testing.assert_allclose(out, [1.0, 2.0])
+
+    def test_slerp_halfway(self):
+        """Halfway between identity and 90 degrees about z is 45 degrees."""
+        q0 = [1.0, 0.0, 0.0, 0.0]
+        q1 = [np.cos(np.pi / 4), 0.0, 0.0, np.sin(np.pi / 4)]
+        out = resample.slerp([0.0, 1.0], np.array([q0, q1]), [0.5])
+        np.testing.assert_allclose(out[0], [np.cos(np.pi / 8), 0, 0, np.sin(np.pi / 8)])
+
+    def test_slerp_shortest_path(self):
+        """Antipodal representations interpolate along the shortest arc."""
+        q = np.array([[1.0, 0.0, 0.0, 0.0], [-1.0, 0.0, 0.0, 0.0]])
+        out = resample.slerp([0.0, 1.0], q, [0.5])
+        np.testing.assert_allclose(np.abs(out[0]), [1.0, 0.0, 0.0, 0.0])
+
+
+class TestTrackResampling:
+    """Test resampling of GPS and sensor tracks."""
+
+    def test_resample_gps_track_seconds(self):
+        """GPS tracks resample onto seconds since the first point."""
+        block = gps.GPSData(
+            description="GPS", timestamp="2024-01-12 10:00:00.000", precision=1.5, fix=3,
+            latitude=np.linspace(45.0, 45.9, 10), longitude=np.full(10, 5.0),
+            altitude=np.arange(10.0), speed_2d=np.ones(10), speed_3d=np.ones(10),
+            units="m/s", npoints=10
+        )
+        track = gps.concatenate_gps_blocks([block])
+        out = resample.resample_gps_track(track, [0.05, 0.5])
+        np.testing.assert_allclose(out.altitude, [0.5, 5.0])
+        assert out.fix.tolist() == [3, 3]
+        assert out.time[1] == np.datetime64("2024-01-12T10:00:00.500")
+
+    def test_resample_gps_track_datetime(self):
+        """Datetime targets are accepted."""
+        block = gps.GPSData(
+            description="GPS", timestamp="2024-01-12 10:00:00.000", precision=1.5, fix=3,
+            latitude=np.linspace(45.0, 45.9, 10), longitude=np.full(10, 5.0),
+            altitude=np.arange(10.0), speed_2d=np.ones(10), speed_3d=np.ones(10),
+            units="m/s", npoints=10
+        )
+        track = gps.concatenate_gps_blocks([block])
+        out = resample.resample_gps_track(track, np.array(["2024-01-12T10:00:00.250"],
+                                                           dtype="datetime64[us]"))
+        assert out.altitude[0] == pytest.approx(2.5)
+
+    def test_resample_sensor_track(self):
+        """Sensor blocks resample onto a uniform clock."""
+        blocks = [
+            gyro.GyroData('Gyro', '', np.arange(4.0), np.zeros(4), np.zeros(4), None, 'rad/s', 4),
+            gyro.GyroData('Gyro', '', np.arange(4.0, 8.0), np.zeros(4), np.zeros(4), None,
+                          'rad/s', 4),
+        ]
+        track = gyro.concatenate_sensor_blocks(blocks)
+        np.testing.assert_allclose(track.time, np.arange(8) * 0.25)
+        out = resample.resample_sensor_track(track, resample.uniform_times(0.0, 2.0, 2.0))
+        np.testing.assert_allclose(out.x, [0.0, 2.0, 4.0, 6.0])
+
+    def test_resample_empty_tracks(self):
+        """Empty tracks cannot be resampled."""
+        gps_track = gps.GPSTrack(*(np.empty(0) for _ in gps.GPSTrack._fields))
+        with pytest.raises(ValueError):
+            resample.resample_gps_track(gps_track, np.arange(3.0))
+        sensor_track = gyro.SensorTrack(*(np.empty(0) for _ in gyro.SensorTrack._fields))
+        with pytest.raises(ValueError):
+            resample.resample_sensor_track(sensor_track, np.arange(3.0))
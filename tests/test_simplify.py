@@ -0,0 +1,104 @@
+"""Tests for GPS track simplification."""
+import pytest
+import numpy as np
+from gpmf import geo, gps, simplify
+
+
+class TestDouglasPeucker:
+    """Test Douglas-Peucker simplification."""
+
+    def test_straight_line(self):
+        """Collinear points are reduced to the end points."""
+        x = np.linspace(0, 100, 50)
+        keep = simplify.douglas_peucker(x, np.zeros_like(x), 0.1)
+        assert keep.sum() == 2
+        assert keep[0] and keep[-1]
+
+    def test_corner_is_kept(self):
+        """A corner farther than the tolerance is kept."""
+        x = np.array([0.0, 1.0, 2.0, 3.0, 4.0])
+        y = np.array([0.0, 1.0, 2.0, 1.0, 0.0])
+        keep = simplify.douglas_peucker(x, y, 0.5)
+        assert keep.tolist() == [True, False, True, False, True]
+
+    def test_error_is_bounded(self):
+        """Every dropped point is within tolerance of the simplified track."""
+        rng = np.random.default_rng(0)
+        x = np.cumsum(rng.uniform(0.5, 1.5, 2000))
+        y = np.cumsum(rng.normal(0, 1, 2000))
+        tolerance = 2.0
+        keep = simplify.douglas_peucker(x, y, tolerance)
+        kept = np.flatnonzero(keep)
+        segment = np.clip(np.searchsorted(kept, np.arange(len(x)), side="right") - 1,
+                          0, len(kept) - 2)
+        d = simplify._segment_distance(x, y, x[kept[segment]], y[kept[segment]],
+                                       x[kept[segment + 1]], y[kept[segment + 1]])
+        assert d.max() <= tolerance
+        assert keep.sum() < len(x)
+
+    def test_small_inputs(self):
+        """Empty and tiny inputs are handled."""
+        assert simplify.douglas_peucker([], [], 1.0).tolist() == []
+        assert simplify.douglas_peucker([0.0, 1.0], [0.0, 1.0], 1.0).tolist() == [True, True]
+
+
+class TestVisvalingam:
+    """Test Visvalingam-Whyatt simplification."""
+
+    def test_straight_line(self):
+        """Collinear points have zero area and are removed."""
+        x = np.linspace(0, 100, 50)
+        keep = simplify.visvalingam_whyatt(x, np.zeros_like(x), 0.1)
+        assert keep.sum() == 2
+
+    def test_large_triangle_is_kept(self):
+        """A point with a large effective area is kept."""
+        x = np.array([0.0, 5.0, 10.0])
+        y = np.array([0.0, 10.0, 0.0])
+        keep = simplify.visvalingam_whyatt(x, y, 1.0)
+        assert keep.all()
+
+
+class TestSimplifyTrack:
+    """Test simplification of geodetic tracks."""
+
+    def test_simplify_latlon_unknown_method(self):
+        """Unknown methods raise ValueError."""
+        with pytest.raises(ValueError):
+            simplify.simplify_latlon([45.0], [5.0], 1.0, method="unknown")
+
+    def test_simplify_track(self):
+        """Simplifying a track filters every column consistently."""
+        block = gps.GPSData(
+            description="GPS", timestamp="2024-01-12 10:00:00.000", precision=1.5, fix=3,
+            latitude=np.linspace(45.0, 45.01, 20), longitude=np.full(20, 5.0),
+            altitude=np.arange(20.0), speed_2d=np.ones(20), speed_3d=np.ones(20),
+            units="m/s", npoints=20
+        )
+        track = gps.concatenate_gps_blocks([block])
+        simplified = simplify.simplify_track(track, 1.0)
+        assert len(simplified.latitude) == 2
+        assert simplified.altitude.tolist() == [0.0, 19.0]
+        assert simplified.time[-1] == track.time[-1]
+
+
+class TestGeo:
+    """Test geodesy helpers."""
+
+    def test_enu_round_trip(self):
+        """ENU coordinates convert back to the original coordinates."""
+        lat = np.array([45.0, 45.001, 45.01])
+        lon = np.array([5.0, 5.002, 5.02])
+        alt = np.array([100.0, 120.0, 90.0])
+        origin = (45.0, 5.0, 100.0)
+        e, n, u = geo.geodetic_to_enu(lat, lon, alt, origin=origin)
+        lat2, lon2, alt2 = geo.enu_to_geodetic(e, n, u, origin)
+        np.testing.assert_allclose(lat2, lat, atol=1e-9)
+        np.testing.assert_allclose(lon2, lon, atol=1e-9)
+        np.testing.assert_allclose(alt2, alt, atol=1e-3)
+
+    def test_enu_matches_haversine(self):
+        """Horizontal ENU distance matches the great-circle distance."""
+        e, n, _ = geo.geodetic_to_enu([45.0, 45.01], [5.0, 5.0])
+        assert np.hypot(e[1], n[1]) == pytest.approx(
+            geo.haversine(45.0, 5.0, 45.01, 5.0), rel=5e-3)
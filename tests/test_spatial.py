@@ -0,0 +1,68 @@
+"""Tests for the GPS spatial index."""
+import numpy as np
+from gpmf import spatial
+
+
+def make_index():
+    index = spatial.TrackIndex(cell_size=0.001)
+    # Heading north from (45, 5), about 11 m between samples
+    index.add("north.mp4", 45.0 + np.arange(100) * 1e-4, np.full(100, 5.0))
+    # Heading east from (45.005, 4.99), crossing the first track
+    index.add("east.mp4", np.full(100, 45.005), 4.995 + np.arange(100) * 1e-4)
+    return index
+
+
+class TestTrackIndex:
+    """Test radius and bounding-box queries."""
+
+    def test_len(self):
+        assert len(make_index()) == 200
+
+    def test_query_radius(self):
+        hits = make_index().query_radius(45.005, 5.0, 30.0)
+        assert sorted(h.name for h in hits) == ["east.mp4", "north.mp4"]
+        north = [h for h in hits if h.name == "north.mp4"][0]
+        assert (north.start, north.stop) == (48, 53)
+
+    def test_query_radius_matches_brute_force(self):
+        rng = np.random.default_rng(0)
+        lat = 45.0 + rng.uniform(0, 0.05, 5000)
+        lon = 5.0 + rng.uniform(0, 0.05, 5000)
+        index = spatial.TrackIndex(cell_size=0.002)
+        index.add("random", lat, lon)
+        hits = index.query_radius(45.02, 5.02, 300.0)
+        found = np.concatenate([np.arange(h.start, h.stop) for h in hits])
+        expected = np.flatnonzero(spatial.haversine(45.02, 5.02, lat, lon) <= 300.0)
+        assert np.array_equal(np.sort(found), expected)
+
+    def test_query_bbox(self):
+        hits = make_index().query_bbox(44.99, 4.99, 45.00405, 5.001)
+        assert hits == [spatial.SpatialHit("north.mp4", 0, 41)]
+
+    def test_query_bbox_antimeridian(self):
+        index = spatial.TrackIndex()
+        index.add("pacific", np.zeros(5), np.array([179.8, 179.9, 179.99, -179.95, -179.8]))
+        assert index.query_bbox(-1, 179.85, 1, -179.9) == [spatial.SpatialHit("pacific", 1, 4)]
+
+    def test_no_hits(self):
+        assert make_index().query_radius(10.0, 10.0, 100.0) == []
+        assert spatial.TrackIndex().query_bbox(0, 0, 1, 1) == []
+
+    def test_incremental_add(self):
+        index = make_index()
+        index.query_radius(45.0, 5.0, 10.0)
+        index.add("late.mp4", [45.0], [5.0])
+        assert "late.mp4" in [h.name for h in index.query_radius(45.0, 5.0, 10.0)]
+
+    def test_save_load(self, tmp_path):
+        index = make_index()
+        path = str(tmp_path / "index.npz")
+        index.save(path)
+        loaded = spatial.TrackIndex.load(path)
+        assert loaded.names == index.names
+        assert loaded.query_radius(45.005, 5.0, 30.0) == index.query_radius(45.005, 5.0, 30.0)
+
+    def test_large_bbox(self):
+        hits = make_index().query_bbox(-90, -180, 90, 180)
+        assert sorted(hits) == [spatial.SpatialHit("east.mp4", 0, 100),
+                                spatial.SpatialHit("north.mp4", 0, 100)]
@@ -0,0 +1,131 @@
+"""Tests for gpmf.sync module."""
+import numpy as np
+import pytest
+
+from gpmf import sync
+
+
+class TestBlockTiming:
+    """Test the extraction of STMP/TSMP timing."""
+
+    @pytest.fixture
+    def stream(self, klv):
+        """Two payloads with GYRO at 4 samples and GPS5 at 2 samples per block."""
+        def strm(fourcc, n, stmp, tsmp):
+            return klv("STRM", "\x00", [
+                klv("STMP", "J", np.uint64(stmp)),
+                klv("TSMP", "L", np.uint32(tsmp)),
+                klv("SCAL", "s", np.int16(1)),
+                klv(fourcc, "s", np.zeros((n, 3), dtype=np.int16)),
+            ])
+        return b"".join(
+            klv("DEVC", "\x00", [strm("GYRO", 4, 1000000 * k + 500, 4 * (k + 1)),
+                                 strm("GPS5", 2, 1000000 * k, 2 * (k + 1))])
+            for k in range(2))
+
+    def test_extract_block_timing(self, stream):
+        """Counts, STMP and TSMP are collected per stream."""
+        timing = sync.extract_block_timing(stream)
+        assert set(timing) == {"GYRO", "GPS5"}
+        assert timing["GYRO"].counts.tolist() == [4, 4]
+        assert timing["GYRO"].stmp.tolist() == [500.0, 1000500.0]
+        assert timing["GPS5"].tsmp.tolist() == [2, 4]
+
+    def test_gps9_is_timed(self, klv):
+        """GPS9 streams are timed like GPS5 streams."""
+        stream = klv("DEVC", "\x00", [klv("STRM", "\x00", [
+            klv("GPS9", "l", np.zeros((2, 9), dtype=np.int32))])])
+        timing = sync.extract_block_timing(stream)
+        assert timing["GPS9"].counts.tolist() == [2]
+
+    def test_payload_count_from_container(self, klv):
+        """Blocks missing from some payloads keep the timing of their payload."""
+        def devc(fourccs):
+            return klv("DEVC", "\x00", [
+                klv("STRM", "\x00", [klv(fourcc, "s", np.zeros((2, 3), dtype=np.int16))])
+                for fourcc in fourccs])
+        # GYRO is in the three payloads, ACCL only in the first and last
+        stream = devc(["GYRO", "ACCL"]) + devc(["GYRO"]) + devc(["GYRO", "ACCL"])
+        timing = sync.extract_block_timing(stream)
+        assert timing["ACCL"].payload.tolist() == [0, 2]
+        info = {"duration": "3.0", "nb_frames": "3"}
+        times = sync.synchronize(stream, stream_info=info)
+        np.testing.assert_allclose(times["GYRO"], np.arange(6) / 2.0)
+        np.testing.assert_allclose(times["ACCL"], [0.0, 0.5, 2.0, 2.5])
+
+    def test_synchronize(self, stream):
+        """Every stream gets per-sample times on the STMP clock."""
+        times = sync.synchronize(stream)
+        np.testing.assert_allclose(times["GYRO"], 0.0005 + np.arange(8) / 4.0)
+        np.testing.assert_allclose(times["GPS5"], np.arange(4) / 2.0)
+
+
+class TestSampleTimes:
+    """Test the assignment of sample times."""
+
+    def test_block_duration(self):
+        """Without STMP samples are spread over fixed block durations."""
+        timing = sync.BlockTiming(np.array([2, 4]), np.full(2, np.nan), np.full(2, -1))
+        time = sync.sample_times(timing)
+        np.testing.assert_allclose(time, [0.0, 0.5, 1.0, 1.25, 1.5, 1.75])
+
+    def test_payload_boundaries(self):
+        """MP4 payload timing is used when STMP is missing."""
+        info = {"duration": "3.003", "nb_frames": "3"}
+        boundaries = sync.payload_times(info)
+        np.testing.assert_allclose(boundaries, [0.0, 1.001, 2.002, 3.003])
+        timing = sync.BlockTiming(np.array([1, 1, 1]), np.full(3, np.nan), np.full(3, -1))
+        np.testing.assert_allclose(sync.sample_times(timing, boundaries), boundaries[:3])
+
+    def test_dropped_samples(self):
+        """TSMP counts leave a gap for dropped samples."""
+        # 2 samples are missing from the second block
+        timing = sync.BlockTiming(np.array([4, 2, 4]), np.full(3, np.nan), np.array([4, 8, 12]))
+        time = sync.sample_times(timing)
+        np.testing.assert_allclose(time[4:6], [1.5, 1.75])
+        np.testing.assert_allclose(time[6:], [2.0, 2.25, 2.5, 2.75])
+
+    def test_stmp_irregular_blocks(self):
+        """Blocks follow their STMP timestamps, the last one at the mean rate."""
+        timing = sync.BlockTiming(np.array([2, 2]), np.array([0.0, 1.1e6]), np.full(2, -1))
+        np.testing.assert_allclose(sync.sample_times(timing), [0.0, 0.55, 1.1, 1.65])
+
+    def test_empty(self):
+        timing = sync.BlockTiming(np.empty(0, int), np.empty(0), np.empty(0, int))
+        assert len(sync.sample_times(timing)) == 0
+
+
+class TestMergeAsof:
+    """Test as-of joins between streams."""
+
+    right = np.array([0.0, 1.0, 2.0])
+
+    def test_backward(self):
+        index = sync.merge_asof([-0.5, 0.0, 0.9, 2.5], self.right)
+        assert index.tolist() == [-1, 0, 0, 2]
+
+    def test_forward(self):
+        index = sync.merge_asof([-0.5, 0.0, 0.9, 2.5], self.right, direction="forward")
+        assert index.tolist() == [0, 0, 1, -1]
+
+    def test_nearest(self):
+        index = sync.merge_asof([-0.5, 0.4, 0.6, 2.5], self.right, direction="nearest")
+        assert index.tolist() == [0, 0, 1, 2]
+
+    def test_tolerance(self):
+        index = sync.merge_asof([0.1, 0.4, 3.0], self.right, direction="nearest", tolerance=0.2)
+        assert index.tolist() == [0, -1, -1]
+
+    def test_invalid_direction(self):
+        with pytest.raises(ValueError):
+            sync.merge_asof([0.0], self.right, direction="sideways")
+
+    def test_empty_right(self):
+        assert sync.merge_asof([0.0, 1.0], []).tolist() == [-1, -1]
+
+    def test_join(self):
+        """Matched values are gathered, unmatched ones are nan."""
+        values = np.array([[1.0, 10.0], [2.0, 20.0], [3.0, 30.0]])
+        joined = sync.join([-1.0, 1.5], self.right, values)
+        assert np.isnan(joined[0]).all()
+        assert joined[1].tolist() == [2.0, 20.0]
@@ -0,0 +1,161 @@
+"""Tests for gpmf.tiles module."""
+import io
+import os
+import pickle
+import sqlite3
+
+import numpy as np
+import pytest
+
+from gpmf import tiles
+
+
+def _png(color, size=256):
+    from PIL import Image
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def tile_directory(tmp_path):
+    """Two zoom-1 tiles in an XYZ directory."""
+    for x, y, color in [(0, 0, (255, 0, 0)), (1, 0, (0, 255, 0))]:
+        os.makedirs(tmp_path / "1" / str(x), exist_ok=True)
+        (tmp_path / "1" / str(x) / ("%i.png" % y)).write_bytes(_png(color))
+    return str(tmp_path)
+
+
+@pytest.fixture
+def mbtiles(tmp_path):
+    """The same tiles in an MBTiles file (rows counted from the south)."""
+    path = str(tmp_path / "tiles.mbtiles")
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE metadata (name TEXT, value TEXT)")
+    connection.execute("CREATE TABLE tiles (zoom_level INTEGER, tile_column INTEGER, "
+                       "tile_row INTEGER, tile_data BLOB)")
+    connection.execute("INSERT INTO metadata VALUES ('format', 'png')")
+    connection.executemany("INSERT INTO tiles VALUES (1, ?, 1, ?)",
+                           [(0, _png((255, 0, 0))), (1, _png((0, 255, 0)))])
+    connection.commit()
+    connection.close()
+    return path
+
+
+class TestTileSources:
+    """Test reading and caching tiles."""
+
+    def test_directory_source(self, tile_directory):
+        source = tiles.DirectoryTileSource(tile_directory)
+        tile = source.tile(1, 0, 0)
+        assert tile.shape == (256, 256, 4)
+        assert tile[0, 0].tolist() == [255, 0, 0, 255]
+        # Missing tiles are transparent
+        assert source.tile(1, 0, 1)[..., 3].max() == 0
+
+    def test_mbtiles_source(self, mbtiles):
+        source = tiles.MBTilesSource(mbtiles)
+        assert source.tile(1, 1, 0)[0, 0].tolist() == [0, 255, 0, 255]
+        assert source.metadata() == {"format": "png"}
+        source.close()
+
+    def test_mbtiles_special_path(self, mbtiles, tmp_path):
+        """Paths with characters special in URIs are opened as such."""
+        directory = tmp_path / "maps #1?"
+        directory.mkdir()
+        path = directory / "tiles %20.mbtiles"
+        os.rename(mbtiles, path)
+        source = tiles.MBTilesSource(str(path))
+        assert source.metadata() == {"format": "png"}
+        source.close()
+
+    def test_abstract_source(self):
+        """Sources must implement read."""
+        with pytest.raises(TypeError):
+            tiles.TileSource()
+
+    def test_mbtiles_pickle(self, mbtiles):
+        """Sources can be sent to worker processes."""
+        source = tiles.MBTilesSource(mbtiles)
+        source.tile(1, 0, 0)
+        copy = pickle.loads(pickle.dumps(source))
+        assert copy.tile(1, 0, 0)[0, 0].tolist() == [255, 0, 0, 255]
+
+    def test_lru_cache(self, tile_directory):
+        """Decoded tiles are reused and the least recently used are evicted."""
+        source = tiles.DirectoryTileSource(tile_directory, cache_size=2)
+        source.tile(1, 0, 0)
+        source.tile(1, 1, 0)
+        source.tile(1, 0, 0)
+        assert (source.hits, source.misses) == (1, 2)
+        source.tile(1, 0, 1)
+        source.tile(1, 1, 0)
+        assert source.misses == 4
+        source.clear_cache()
+        source.tile(1, 0, 0)
+        assert source.misses == 5
+
+
+class TestMosaic:
+    """Test tile mosaics."""
+
+    def test_tile_range(self):
+        assert tiles.tile_range(-1.0, 1.0, 1.0, 2.0, 1) == (0, 1, 0, 0)
+        r = tiles.ORIGIN_SHIFT
+        assert tiles.tile_range(-r, -r, r, r, 2) == (0, 3, 0, 3)
+
+    def test_bounds2img(self, tile_directory):
+        source = tiles.DirectoryTileSource(tile_directory)
+        image, extent = tiles.bounds2img(-1e6, 1e6, 1e6, 2e6, 1, source)
+        assert image.shape == (256, 512, 4)
+        np.testing.assert_allclose(extent, [-tiles.ORIGIN_SHIFT, tiles.ORIGIN_SHIFT,
+                                            0.0, tiles.ORIGIN_SHIFT])
+        assert image[0, 0, :3].tolist() == [255, 0, 0]
+        assert image[0, -1, :3].tolist() == [0, 255, 0]
+
+    @pytest.mark.parametrize("crs", ["EPSG:3857", "EPSG:4326"])
+    def test_add_basemap(self, tile_directory, crs):
+        """Tiles are drawn under the axis content, warped if needed."""
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+
+        source = tiles.DirectoryTileSource(tile_directory)
+        fig, ax = plt.subplots()
+        limits = (-1e6, 1e6, 1e6, 2e6) if crs == "EPSG:3857" else (-10.0, 10.0, 10.0, 20.0)
+        ax.axis(limits)
+        tiles.add_basemap(ax, source, zoom=1, crs=crs)
+        assert len(ax.images) == 1
+        np.testing.assert_allclose(ax.axis(), limits)
+        plt.close(fig)
+
+    def test_warp_image(self):
+        """Warping into lat/lon keeps the colours in place."""
+        image = np.zeros((256, 512, 4), dtype=np.uint8)
+        image[:, :256] = [255, 0, 0, 255]
+        image[:, 256:] = [0, 255, 0, 255]
+        r = tiles.ORIGIN_SHIFT
+        warped, extent = tiles.warp_image(image, (-r, r, 0.0, r), "EPSG:4326")
+        np.testing.assert_allclose(extent, [-180.0, 180.0, 0.0, 85.0511], atol=1e-3)
+        assert warped[128, 10].tolist() == [255, 0, 0, 255]
+        assert warped[128, -10].tolist() == [0, 255, 0, 255]
+
+
+class TestOfflinePlot:
+    """Test plotting a track over local tiles."""
+
+    def test_plot_gps_trace(self, tile_directory):
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+        from unittest.mock import patch
+        from gpmf import gps_plot
+
+        source = tiles.DirectoryTileSource(tile_directory)
+        latlon = np.array([[44.0, 5.0], [44.01, 5.01], [44.02, 5.02]])
+        with patch("gpmf.gps_plot.ctx.add_basemap") as online:
+            gps_plot.plot_gps_trace(latlon, map_provider=source, zoom=1)
+        online.assert_not_called()
+        assert len(plt.gca().images) == 1
+        assert source.misses > 0
+        plt.close("all")
@@ -0,0 +1,73 @@
+"""Tests for gpmf.vibration module."""
+import numpy as np
+import pytest
+
+from gpmf import vibration
+from gpmf.gyro import SensorTrack
+
+
+@pytest.fixture
+def signal():
+    """20 s at 400 Hz: gravity on z, a 30 Hz vibration on x, a 120 Hz one on y."""
+    time = np.arange(8000) / 400.0
+    values = np.column_stack([
+        2.0 * np.sin(2 * np.pi * 30 * time),
+        0.5 * np.sin(2 * np.pi * 120 * time),
+        np.full(len(time), 9.81),
+    ])
+    return time, values
+
+
+class TestVibrationAnalyzer:
+    """Test the windowed spectral analysis."""
+
+    def test_report(self, signal):
+        """RMS, peak frequencies and band energies of every window."""
+        time, values = signal
+        report, _, _ = vibration.analyze_vibration(time, values, window_size=400)
+        # 400-sample windows with a 200-sample hop
+        assert len(report.time) == 39
+        np.testing.assert_allclose(report.time[:2], [0.49875, 0.99875])
+        np.testing.assert_allclose(report.rms[:, 0], 2.0 / np.sqrt(2), rtol=1e-3)
+        np.testing.assert_allclose(report.rms[:, 2], 0.0, atol=1e-9)
+        np.testing.assert_allclose(report.peak_frequency[:, :2], [[30.0, 120.0]] * 39)
+        # The energy of each sine lands in its band
+        np.testing.assert_allclose(report.band_energy[:, 0, 1], 2.0, rtol=0.02)
+        np.testing.assert_allclose(report.band_energy[:, 1, 2], 0.125, rtol=0.02)
+        assert report.band_energy[:, 0, [0, 2]].max() < 1e-3
+
+    def test_welch(self, signal):
+        """The averaged PSD integrates to the signal variance."""
+        time, values = signal
+        _, frequencies, psd = vibration.analyze_vibration(time, values, rate=400.0)
+        assert psd.shape == (3, len(frequencies))
+        df = frequencies[1] - frequencies[0]
+        np.testing.assert_allclose(psd.sum(axis=1) * df, [2.0, 0.125, 0.0], atol=1e-3)
+        assert frequencies[np.argmax(psd[0])] == pytest.approx(30.0, abs=df)
+
+    def test_chunked(self, signal):
+        """Chunked processing matches a single pass."""
+        time, values = signal
+        expected, _, expected_psd = vibration.analyze_vibration(time, values, window_size=256)
+        report, _, psd = vibration.analyze_vibration(time, values, window_size=256,
+                                                     chunk_size=777, batch_size=5)
+        for a, b in zip(report, expected):
+            np.testing.assert_allclose(a, b)
+        np.testing.assert_allclose(psd, expected_psd)
+
+    def test_short_input(self):
+        """Inputs shorter than a window give no result."""
+        analyzer = vibration.VibrationAnalyzer(400.0, window_size=64)
+        report = analyzer.process(np.arange(10) / 400.0, np.zeros(10))
+        assert report.rms.shape == (0, 1)
+        assert analyzer.welch()[1] is None
+
+    def test_invalid_overlap(self):
+        with pytest.raises(ValueError):
+            vibration.VibrationAnalyzer(400.0, overlap=1.0)
+
+    def test_analyze_sensor_track(self, signal):
+        time, values = signal
+        track = SensorTrack(time, *values.T, np.zeros(len(time), dtype=np.int32))
+        report, _, _ = vibration.analyze_sensor_track(track, window_size=800, overlap=0.0)
+        assert report.rms.shape == (10, 3)